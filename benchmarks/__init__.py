@@ -0,0 +1 @@
+"""Benchmarks for grants_builder on a synthetic grant corpus."""
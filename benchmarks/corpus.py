@@ -0,0 +1,212 @@
+"""Generate a synthetic grant registry for benchmarking."""
+
+import random
+from pathlib import Path
+
+import yaml
+
+WORDS = (
+    "policy benefit household income tax credit simulation model state "
+    "federal program analysis reform poverty child earnings microdata "
+    "open source rules engine calculator outcome impact data research "
+    "eligibility phase-out marginal rate budget agency partner"
+).split()
+
+LAYOUTS = ("legacy-list", "legacy-dict", "nsf", "named", "new")
+
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def _paragraph(rng):
+    pieces = []
+    for _ in range(rng.randint(3, 8)):
+        sentence = _words(rng, rng.randint(6, 18))
+        roll = rng.random()
+        if roll < 0.15:
+            sentence = f"**{sentence}**"
+        elif roll < 0.25:
+            sentence = f"*{sentence}*"
+        elif roll < 0.35:
+            sentence += f" see [{rng.choice(WORDS)}](https://example.org/"
+            sentence += f"{rng.choice(WORDS)}_{rng.randint(1, 99)})"
+        elif roll < 0.4:
+            sentence += f" using `{rng.choice(WORDS)}()`"
+        pieces.append(sentence.capitalize() + ".")
+    return " ".join(pieces)
+
+
+def _table(rng):
+    columns = rng.randint(2, 5)
+    header = "| " + " | ".join(_words(rng, 1) for _ in range(columns)) + " |"
+    rule = "|" + "---|" * columns
+    rows = [
+        "| "
+        + " | ".join(f"**{rng.randint(1, 10**6):,}**" for _ in range(columns))
+        + " |"
+        for _ in range(rng.randint(3, 10))
+    ]
+    return "\n".join([header, rule, *rows])
+
+
+def _code_block(rng):
+    lines = [
+        f"{rng.choice(WORDS)}_{i} = {rng.randint(0, 100)}"
+        for i in range(rng.randint(2, 8))
+    ]
+    return "```python\n" + "\n".join(lines) + "\n```"
+
+
+def _list(rng):
+    if rng.random() < 0.5:
+        return "\n".join(
+            f"- {_words(rng, rng.randint(3, 12))}"
+            for _ in range(rng.randint(3, 8))
+        )
+    return "\n".join(
+        f"{i}. {_words(rng, rng.randint(3, 12))}"
+        for i in range(1, rng.randint(4, 9))
+    )
+
+
+def markdown_document(rng, blocks):
+    """Return a response of ``blocks`` mixed markdown blocks."""
+    parts = []
+    for _ in range(blocks):
+        roll = rng.random()
+        if roll < 0.1:
+            parts.append(f"## {_words(rng, 3).title()}")
+        elif roll < 0.2:
+            parts.append(_table(rng))
+        elif roll < 0.28:
+            parts.append(_code_block(rng))
+        elif roll < 0.45:
+            parts.append(_list(rng))
+        elif roll < 0.5:
+            parts.append(f"> {_paragraph(rng)}")
+        else:
+            parts.append(_paragraph(rng))
+    if rng.random() < 0.05:
+        parts.append("[TO BE COMPLETED]")
+    return "\n\n".join(parts) + "\n"
+
+
+def _sections(rng, directory, prefix, count, as_list, exports):
+    """Write ``count`` responses and return their questions entries."""
+    directory.mkdir(parents=True, exist_ok=True)
+    entries = []
+    for i in range(count):
+        section_id = f"{prefix}_{i}"
+        text = markdown_document(rng, rng.randint(3, 40))
+        (directory / f"{section_id}.md").write_text(text)
+        entry = {
+            "id": section_id,
+            "title": section_id.replace("_", " ").title(),
+            "question": f"Describe {_words(rng, 4)}?",
+            "file": f"{directory.name}/{section_id}.md",
+        }
+        # Generous limits, so limit checks run without ever failing
+        if rng.random() < 0.5:
+            entry["char_limit"] = len(text) + 100
+        else:
+            entry["word_limit"] = len(text.split()) + 10
+        if exports and rng.random() < 0.2:
+            entry["needs_export"] = True
+        entries.append(entry)
+    if as_list:
+        return entries
+    return {entry.pop("id"): entry for entry in entries}
+
+
+def _write_yaml(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.safe_dump(data, sort_keys=False))
+
+
+def generate_corpus(root, grants=300, sections=8, seed=0, exports=True):
+    """Write a registry of ``grants`` synthetic grants under ``root``.
+
+    Grants cycle through every layout the builder reads: legacy
+    ``questions.yaml`` with list- and dict-form sections,
+    ``nsf_config.yaml``, ``<id>_questions.yaml``, and ``application/``
+    plus ``reports/<period>/`` directories. Output is deterministic for
+    a given ``seed``. Returns the registry path.
+    """
+    root = Path(root)
+    rng = random.Random(seed)
+    registry = {}
+    for index in range(grants):
+        grant_id = f"grant-{index:04d}"
+        layout = LAYOUTS[index % len(LAYOUTS)]
+        grant_path = root / grant_id
+        registry[grant_id] = {
+            "name": f"Synthetic Grant {index}",
+            "foundation": f"{_words(rng, 2).title()} Foundation",
+            "status": rng.choice(["draft", "submitted", "awarded"]),
+            "amount_requested": rng.randint(10, 2000) * 1000,
+            "path": f"{grant_id}/",
+        }
+        _write_yaml(
+            grant_path / "grant.yaml",
+            {"program": _words(rng, 3), "deadline": "2026-01-01"},
+        )
+
+        if layout == "new":
+            application = grant_path / "application"
+            _write_yaml(
+                application / "questions.yaml",
+                {
+                    "metadata": {"stage": "application"},
+                    "sections": _sections(
+                        rng,
+                        application / "responses",
+                        "app",
+                        sections,
+                        as_list=index % 2 == 0,
+                        exports=exports,
+                    ),
+                },
+            )
+            for quarter in range(1, rng.randint(2, 5)):
+                report = grant_path / "reports" / f"2025-q{quarter}"
+                _write_yaml(
+                    report / "questions.yaml",
+                    {
+                        "metadata": {"period": f"2025-q{quarter}"},
+                        "sections": _sections(
+                            rng,
+                            report / "responses",
+                            "report",
+                            max(1, sections // 3),
+                            as_list=False,
+                            exports=exports,
+                        ),
+                    },
+                )
+            continue
+
+        questions_name = {
+            "legacy-list": "questions.yaml",
+            "legacy-dict": "questions.yaml",
+            "nsf": "nsf_config.yaml",
+            "named": f"{grant_id}_questions.yaml",
+        }[layout]
+        _write_yaml(
+            grant_path / questions_name,
+            {
+                "metadata": {"program": _words(rng, 2)},
+                "sections": _sections(
+                    rng,
+                    grant_path / "responses",
+                    "section",
+                    sections,
+                    as_list=layout != "legacy-dict",
+                    exports=exports,
+                ),
+            },
+        )
+
+    registry_path = root / "grant_registry.yaml"
+    _write_yaml(registry_path, {"grants": registry})
+    return registry_path
@@ -0,0 +1,248 @@
+"""Time the builder on a synthetic corpus and compare against a baseline.
+
+Usage::
+
+    python -m benchmarks.run --save    # record benchmarks/baseline.json
+    python -m benchmarks.run           # fail on >20% regressions
+    python -m benchmarks.run --threshold 0.1 --grants 500
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+import yaml
+
+from grants_builder import builder
+from grants_builder.builder import (
+    build_all_grants,
+    plan_grant,
+    process_grant,
+    process_sections,
+)
+from grants_builder.converters import Converters
+from grants_builder.exporter import DEFAULT_EXPORT_FORMATS, export_paths
+from grants_builder.scheduler import ExportScheduler
+from grants_builder.utils import strip_markdown_formatting
+
+from .corpus import generate_corpus
+
+DEFAULT_BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_THRESHOLD = 0.2
+
+
+def _stub_export_response(
+    grant_id,
+    grant_name,
+    foundation,
+    response_key,
+    response_data,
+    response_markdown,
+    output_dir,
+    cache=None,
+    formats=DEFAULT_EXPORT_FORMATS,
+):
+    """Write the response markdown to each export path."""
+    paths = export_paths(grant_id, response_key, output_dir, formats)
+    for path in paths.values():
+        path.write_text(response_markdown)
+    return {
+        fmt: str(path.relative_to(Path(output_dir).parent))
+        for fmt, path in paths.items()
+    }
+
+
+class StubExportScheduler(ExportScheduler):
+    """Writes each document as-is instead of running pandoc or soffice."""
+
+    def __init__(self, *args, **kwargs):
+        # No converter is ever run, so none is probed either
+        super().__init__(*args, **kwargs, converters=Converters({}))
+
+    def _render_pandoc(self, job):
+        for fmt, path in job.paths.items():
+            path.write_text(job.document)
+            job.done.add(fmt)
+
+
+@contextlib.contextmanager
+def stubbed_exports():
+    """Replace the exporters so benchmarks never start a converter."""
+    with (
+        mock.patch.object(builder, "export_response", _stub_export_response),
+        mock.patch.object(builder, "ExportScheduler", StubExportScheduler),
+    ):
+        yield
+
+
+def _time(func, repeat):
+    """Return the best wall time of ``repeat`` calls to ``func``.
+
+    The minimum is the least noisy estimate; slower runs only measure
+    interference from the rest of the machine.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_benchmarks(repeat=5):
+    """Time each builder stage on the corpus in the working directory.
+
+    Returns a dict of benchmark name to seconds, plus a
+    ``_corpus`` entry describing what was timed.
+    """
+    registry = yaml.safe_load(Path("grant_registry.yaml").read_text())
+    grants = registry["grants"]
+    plans = {
+        grant_id: plan_grant(grant_id, grant_config)
+        for grant_id, grant_config in grants.items()
+    }
+    documents = [
+        (group.base_path / item["file"]).read_text()
+        for plan in plans.values()
+        for group in plan.groups
+        for item in group.sections.values()
+    ]
+
+    def strip_all():
+        for document in documents:
+            strip_markdown_formatting(document)
+
+    def every_group():
+        # Already planned, so only the per-section work is timed
+        for grant_id, plan in plans.items():
+            grant_config = grants[grant_id]
+            for group in plan.groups:
+                process_sections(
+                    Path(grant_config["path"]),
+                    group.base_path,
+                    group.sections,
+                    grant_id,
+                    grant_config["name"],
+                    grant_config["foundation"],
+                    scope=group.scope,
+                )
+
+    def every_grant():
+        for key, config in grants.items():
+            process_grant(key, config)
+
+    def full_build():
+        # pandoc is never run, so neither look for it nor start a server
+        build_all_grants(sharded=True, pandoc_server=False, backend="native")
+
+    results = {}
+    with stubbed_exports(), contextlib.redirect_stdout(io.StringIO()):
+        results["strip_markdown_formatting"] = _time(strip_all, repeat)
+        results["process_sections"] = _time(every_group, repeat)
+        results["process_grant"] = _time(every_grant, repeat)
+        results["build_all_grants"] = _time(full_build, repeat)
+    results["_corpus"] = {
+        "grants": len(grants),
+        "documents": len(documents),
+        "bytes": sum(len(document) for document in documents),
+    }
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return a line per benchmark and whether any regressed.
+
+    A benchmark regresses when it is more than ``threshold`` (a
+    fraction) slower than the baseline.
+    """
+    lines = []
+    regressed = False
+    for name, seconds in results.items():
+        if name.startswith("_"):
+            continue
+        before = baseline.get(name)
+        if before is None:
+            lines.append(f"  {name:28} {seconds * 1000:9.1f} ms  (new)")
+            continue
+        change = seconds / before - 1
+        flag = ""
+        if change > threshold:
+            regressed = True
+            flag = "  ❌ regression"
+        lines.append(
+            f"  {name:28} {seconds * 1000:9.1f} ms  "
+            f"{change:+7.1%} vs {before * 1000:.1f} ms{flag}"
+        )
+    return lines, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Benchmark grants_builder on a synthetic corpus.",
+    )
+    parser.add_argument("--grants", type=int, default=150)
+    parser.add_argument("--sections", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed slowdown as a fraction (default: 0.2)",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Write the results as the new baseline instead of comparing",
+    )
+    args = parser.parse_args(argv)
+    baseline_path = args.baseline.resolve()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(
+            root, grants=args.grants, sections=args.sections, seed=args.seed
+        )
+        os.chdir(root)
+        try:
+            results = run_benchmarks(repeat=args.repeat)
+        finally:
+            os.chdir(cwd)
+    results["_environment"] = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+    corpus = results["_corpus"]
+    print(
+        f"Corpus: {corpus['grants']} grants, {corpus['documents']} "
+        f"responses, {corpus['bytes'] / 2**20:.1f} MB"
+    )
+
+    if args.save or not baseline_path.exists():
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        for name, seconds in results.items():
+            if not name.startswith("_"):
+                print(f"  {name:28} {seconds * 1000:9.1f} ms")
+        print(f"Saved baseline to {baseline_path}")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text())
+    if baseline.get("_corpus") != corpus:
+        print("Warning: the baseline was recorded on a different corpus")
+    lines, regressed = compare(results, baseline, args.threshold)
+    print("\n".join(lines))
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
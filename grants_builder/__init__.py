@@ -3,6 +3,19 @@
 __version__ = "0.1.0"
 
 from .builder import build_all_grants, process_grant
-from .utils import strip_markdown_formatting
+from .search import SearchIndex, search
+from .utils import (
+    analyze_markdown,
+    analyze_markdown_file,
+    strip_markdown_formatting,
+)
 
-__all__ = ["build_all_grants", "process_grant", "strip_markdown_formatting"]
+__all__ = [
+    "analyze_markdown",
+    "analyze_markdown_file",
+    "build_all_grants",
+    "process_grant",
+    "search",
+    "SearchIndex",
+    "strip_markdown_formatting",
+]
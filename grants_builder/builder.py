@@ -1,110 +1,209 @@
 """Build all grant viewers from grant directories."""
 
-import json
-import yaml
+import collections
+import contextlib
+import io
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
-from .utils import strip_markdown_formatting
-from .exporter import export_response
-
-
-def _old_strip_markdown_formatting(text):
-    """Remove markdown formatting to get plain text."""
-    # Remove headers
-    text = re.sub(r"^#+\s+", "", text, flags=re.MULTILINE)
-    # Remove bold/italic
-    text = re.sub(r"\*\*([^*]+)\*\*", r"\1", text)
-    text = re.sub(r"\*([^*]+)\*", r"\1", text)
-    text = re.sub(r"__([^_]+)__", r"\1", text)
-    text = re.sub(r"_([^_]+)_", r"\1", text)
-    # Remove links but keep text
-    text = re.sub(r"\[([^\]]+)\]\([^\)]+\)", r"\1", text)
-    # Remove list markers
-    text = re.sub(r"^\s*[-*+]\s+", "", text, flags=re.MULTILINE)
-    text = re.sub(r"^\s*\d+\.\s+", "", text, flags=re.MULTILINE)
-    # Remove code blocks
-    text = re.sub(r"```[^`]*```", "", text, flags=re.DOTALL)
-    text = re.sub(r"`([^`]+)`", r"\1", text)
-    # Remove blockquotes
-    text = re.sub(r"^>\s+", "", text, flags=re.MULTILINE)
-    # Clean up extra whitespace
-    text = re.sub(r"\n\n+", "\n\n", text)
-    return text.strip()
+from .utils import COMPLETION_MARKERS, analyze_markdown, analyze_markdown_file
+from .config_cache import load_yaml
+from . import trace
+from .exporter import (
+    DEFAULT_EXPORT_BACKEND,
+    DEFAULT_EXPORT_FORMATS,
+    export_backend,
+    export_response,
+)
+from .pandoc_server import PandocServer
+from .repo_index import RepoIndex
+from .scheduler import ExportScheduler
+from .manifest import DEFAULT_MANIFEST_PATH, BuildManifest
+from .search import SearchIndexBuilder
+from .shards import PartialStream, assign_shards, grant_cost, partial_path
+from .output import (
+    DEFAULT_SCHEMA,
+    SHARD_DIR,
+    GrantsDataStream,
+    JsonWriter,
+    ShardedStream,
+)
+
+# Response files larger than this are analyzed in one streaming pass
+# instead of being read whole.
+STREAM_THRESHOLD = 1 << 20
+
+
+def starts_with_question(response_markdown, question_text):
+    """Whether a response repeats its question as a leading H1."""
+    return bool(question_text) and response_markdown.strip().startswith(
+        f"# {question_text}"
+    )
+
+
+def limit_violations(
+    section_key,
+    char_count,
+    word_count,
+    char_limit=None,
+    word_limit=None,
+    exact=True,
+):
+    """Return ``(kind, message)`` for each limit a response exceeds."""
+    at_least = "" if exact else "at least "
+    violations = []
+    if char_limit and char_count > char_limit:
+        violations.append(
+            (
+                "char_limit",
+                f"Response '{section_key}' exceeds character limit: "
+                f"{at_least}{char_count} > {char_limit}",
+            )
+        )
+    if word_limit and word_count > word_limit:
+        violations.append(
+            (
+                "word_limit",
+                f"Response '{section_key}' exceeds word limit: "
+                f"{at_least}{word_count} > {word_limit}",
+            )
+        )
+    return violations
 
 
 def process_sections(
-    grant_path, base_path, sections, grant_id, grant_name, foundation
+    grant_path,
+    base_path,
+    sections,
+    grant_id,
+    grant_name,
+    foundation,
+    manifest=None,
+    scope="responses",
+    export_cache=None,
+    scheduler=None,
+    index=None,
 ):
     """Process sections from a questions file."""
     responses = {}
     exports_dir = Path("docs/exports")
+    period = scope.split("/", 1)[1] if scope.startswith("reports/") else None
 
     for section_key, section_data in sections.items():
         response_file = base_path / section_data["file"].replace(
             "responses/", "responses/"
         )
 
-        if not response_file.exists():
+        if index is not None:
+            found = index.exists(response_file)
+        else:
+            found = response_file.exists()
+        if not found:
             print(f"Warning: {response_file} not found")
             continue
 
-        # Read response
-        response_markdown = response_file.read_text()
+        if manifest is not None:
+            cache_key = f"{grant_id}/{scope}/{section_key}"
+            fingerprint = manifest.section_fingerprint(
+                response_file,
+                section_key,
+                section_data,
+                grant_name,
+                foundation,
+                index=index,
+            )
+            cached = manifest.get_section(cache_key, fingerprint)
+            if cached is not None:
+                responses[section_key] = cached
+                continue
+
+        tags = dict(grant=grant_id, period=period, section=section_key)
+
+        # Support both char_limit and word_limit
+        char_limit = section_data.get("char_limit")
+        word_limit = section_data.get("word_limit")
+
+        if index is not None:
+            size = index.stat(response_file).size
+        else:
+            size = response_file.stat().st_size
+        streamed = size > STREAM_THRESHOLD
+        exact = True
+        if streamed:
+            with trace.span("stream_markdown", **tags):
+                stats = analyze_markdown_file(
+                    response_file, char_limit, word_limit
+                )
+            response_markdown = None
+            response_head = stats.head
+            plain_text, char_count, word_count = stats[:3]
+            needs_completion = stats.needs_completion
+            exact = not stats.exceeded
+        else:
+            # Read response
+            with trace.span("read", **tags):
+                response_markdown = response_file.read_text()
+            response_head = response_markdown
 
         # Validation: Check if response starts with question text
         question_text = section_data.get("question", "")
-        if question_text and response_markdown.strip().startswith(
-            f"# {question_text}"
-        ):
+        if starts_with_question(response_head, question_text):
             print(
                 f"   ⚠️  WARNING: {response_file.name} starts with question text - this will be included in the response!"
             )
             print(f"      Remove the H1 header: '# {question_text[:50]}...'")
 
-        plain_text = strip_markdown_formatting(response_markdown)
-
-        # Support both char_limit and word_limit
-        char_limit = section_data.get("char_limit")
-        word_limit = section_data.get("word_limit")
-
-        char_count = len(plain_text)
-        word_count = len(plain_text.split())
+        if not streamed:
+            with trace.span("strip_markdown", **tags):
+                plain_text, char_count, word_count = analyze_markdown(
+                    response_markdown
+                )
+            needs_completion = any(
+                marker in response_markdown for marker in COMPLETION_MARKERS
+            )
 
         # Calculate percentages
         char_percentage = (char_count / char_limit) * 100 if char_limit else 0
         word_percentage = (word_count / word_limit) * 100 if word_limit else 0
 
-        # Determine if over limit
-        over_limit = False
-        limit_errors = []
-
-        if char_limit and char_count > char_limit:
-            over_limit = True
-            limit_errors.append(
-                f"Response '{section_key}' exceeds character limit: {char_count} > {char_limit}"
-            )
-
-        if word_limit and word_count > word_limit:
-            over_limit = True
-            limit_errors.append(
-                f"Response '{section_key}' exceeds word limit: {word_count} > {word_limit}"
-            )
-
         # Throw error if over limit
-        if limit_errors:
+        with trace.span("limits", **tags):
+            violations = limit_violations(
+                section_key,
+                char_count,
+                word_count,
+                char_limit,
+                word_limit,
+                exact,
+            )
+        over_limit = bool(violations)
+        if violations:
             error_msg = f"\n❌ GRANT VALIDATION ERROR:\n"
-            for error in limit_errors:
-                error_msg += f"   - {error}\n"
+            for _, message in violations:
+                error_msg += f"   - {message}\n"
             raise ValueError(error_msg)
 
-        needs_completion = (
-            "[NEEDS TO BE COMPLETED]" in response_markdown
-            or "[TO BE COMPLETED]" in response_markdown
-        )
-
         # Export to DOCX and PDF if requested
         export_files = None
-        if section_data.get("needs_export", False):
+        export_formats = section_data.get(
+            "export_formats", DEFAULT_EXPORT_FORMATS
+        )
+        if section_data.get("needs_export", False) and streamed:
+            # Exporters need the whole document
+            response_markdown = response_file.read_text()
+        if section_data.get("needs_export", False) and scheduler:
+            export_files = scheduler.submit(
+                grant_id,
+                grant_name,
+                foundation,
+                section_key,
+                section_data,
+                response_markdown,
+                exports_dir,
+                formats=export_formats,
+            )
+        elif section_data.get("needs_export", False):
             export_files = export_response(
                 grant_id,
                 grant_name,
@@ -113,6 +212,8 @@ def process_sections(
                 section_data,
                 response_markdown,
                 exports_dir,
+                cache=export_cache,
+                formats=export_formats,
             )
 
         response_dict = {
@@ -139,134 +240,107 @@ def process_sections(
             response_dict["exports"] = export_files
 
         responses[section_key] = response_dict
+        if manifest is not None:
+            manifest.put_section(cache_key, fingerprint, response_dict)
 
     return responses
 
 
-def process_grant(grant_id, grant_config):
-    """Process a single grant application."""
-    grant_path = Path(grant_config["path"])
+def load_sections(questions_path, config_cache=None, index=None):
+    """Read a questions file and return its ``(sections, metadata)``."""
+    questions_data = load_yaml(questions_path, config_cache, index)
 
-    if not grant_path.exists():
-        print(f"Warning: {grant_path} not found")
-        return None
+    sections = questions_data.get("sections", {})
+    # Handle both dict format (Pritzker) and list format (PBIF)
+    if isinstance(sections, list):
+        # Convert list to dict for uniform processing
+        sections = {
+            item.get("id", f"section_{i}"): item
+            for i, item in enumerate(sections)
+            if "file" in item
+        }
+    elif not isinstance(sections, dict):
+        sections = {}
+    return sections, questions_data.get("metadata", {})
+
+
+@dataclass
+class SectionGroup:
+    """Sections read from one questions file, processed together."""
+
+    scope: str
+    base_path: Path
+    sections: dict
+    metadata: dict = field(default_factory=dict)
+
+
+@dataclass
+class GrantPlan:
+    """Everything needed to process a grant once its files are located."""
+
+    metadata: dict
+    has_new_structure: bool
+    groups: list = field(default_factory=list)
+    # Every file or directory listing the result depends on
+    inputs: list = field(default_factory=list)
+    index: RepoIndex = None
+
+
+def plan_grant(grant_id, grant_config, config_cache=None, index=None):
+    """Locate a grant's questions files and load their sections."""
+    grant_path = Path(grant_config["path"])
+    if index is None:
+        with trace.span("scan", grant=grant_id):
+            index = RepoIndex.scan(grant_path)
+    inputs = [grant_path]
 
     # Load grant metadata
     grant_yaml_path = grant_path / "grant.yaml"
-    if grant_yaml_path.exists():
-        with open(grant_yaml_path) as f:
-            grant_metadata = yaml.safe_load(f)
+    inputs.append(grant_yaml_path)
+    if index.exists(grant_yaml_path):
+        grant_metadata = load_yaml(grant_yaml_path, config_cache, index)
     else:
         grant_metadata = {}
 
     # Check for new structure (application/ and reports/ directories)
     application_path = grant_path / "application"
     reports_path = grant_path / "reports"
-    has_new_structure = application_path.exists() or reports_path.exists()
-
-    # Track application and report metadata
-    application_data = None
-    reports_data = []
+    has_new_structure = index.exists(application_path) or index.exists(
+        reports_path
+    )
+    plan = GrantPlan(
+        grant_metadata, has_new_structure, inputs=inputs, index=index
+    )
 
     if has_new_structure:
-        # Process new structure
-        all_responses = {}
-
-        # Process application
-        if application_path.exists():
-            app_questions_path = application_path / "questions.yaml"
-            if app_questions_path.exists():
-                with open(app_questions_path) as f:
-                    app_questions_data = yaml.safe_load(f)
-                app_sections = app_questions_data.get("sections", {})
-                app_metadata = app_questions_data.get("metadata", {})
-
-                # Handle both dict format and list format
-                if isinstance(app_sections, list):
-                    app_sections = {
-                        item.get("id", f"section_{i}"): item
-                        for i, item in enumerate(app_sections)
-                        if "file" in item
-                    }
-
-                app_responses = process_sections(
-                    grant_path,
-                    application_path,
-                    app_sections,
-                    grant_id,
-                    grant_config["name"],
-                    grant_config["foundation"],
+        question_files = []
+        if index.exists(application_path):
+            question_files.append(("application", application_path))
+        if index.exists(reports_path):
+            inputs.append(reports_path)
+            question_files += [
+                (f"reports/{name}", reports_path / name)
+                for name in index.listdir(reports_path)
+                if index.is_dir(reports_path / name)
+            ]
+
+        for scope, base_path in question_files:
+            questions_path = base_path / "questions.yaml"
+            inputs += [base_path, questions_path]
+            if index.exists(questions_path):
+                sections, metadata = load_sections(
+                    questions_path, config_cache, index
+                )
+                plan.groups.append(
+                    SectionGroup(scope, base_path, sections, metadata)
                 )
-
-                # Store application data separately
-                application_data = {
-                    "metadata": app_metadata,
-                    "responses": app_responses,
-                }
-
-                for key, value in app_responses.items():
-                    all_responses[f"app_{key}"] = {
-                        **value,
-                        "type": "application",
-                    }
-
-        # Process reports
-        if reports_path.exists():
-            for report_dir in sorted(reports_path.iterdir()):
-                if report_dir.is_dir():
-                    report_questions_path = report_dir / "questions.yaml"
-                    if report_questions_path.exists():
-                        with open(report_questions_path) as f:
-                            report_questions_data = yaml.safe_load(f)
-                        report_sections = report_questions_data.get(
-                            "sections", {}
-                        )
-                        report_metadata = report_questions_data.get(
-                            "metadata", {}
-                        )
-
-                        # Handle both dict format and list format
-                        if isinstance(report_sections, list):
-                            report_sections = {
-                                item.get("id", f"section_{i}"): item
-                                for i, item in enumerate(report_sections)
-                                if "file" in item
-                            }
-
-                        report_responses = process_sections(
-                            grant_path,
-                            report_dir,
-                            report_sections,
-                            grant_id,
-                            grant_config["name"],
-                            grant_config["foundation"],
-                        )
-                        report_name = report_dir.name
-
-                        # Store report data separately
-                        reports_data.append(
-                            {
-                                "period": report_name,
-                                "metadata": report_metadata,
-                                "responses": report_responses,
-                            }
-                        )
-
-                        for key, value in report_responses.items():
-                            all_responses[f"report_{report_name}_{key}"] = {
-                                **value,
-                                "type": "report",
-                                "report_period": report_name,
-                            }
-
-        responses = all_responses
     else:
         # Process old structure (backward compatibility)
         questions_path = grant_path / "questions.yaml"
-        if not questions_path.exists():
+        if not index.exists(questions_path):
             # Try NSF config
             nsf_config_path = grant_path / "nsf_config.yaml"
-            if nsf_config_path.exists():
+            if index.exists(nsf_config_path):
                 questions_path = nsf_config_path
             else:
                 # Try old location (pritzker_questions.yaml)
@@ -275,93 +349,442 @@ def process_grant(grant_id, grant_config):
                 )
                 questions_path = (
                     legacy_questions_path
-                    if legacy_questions_path.exists()
+                    if index.exists(legacy_questions_path)
                     else None
                 )
 
-        if questions_path is None:
-            responses = {}
+        if questions_path is not None:
+            inputs.append(questions_path)
+            sections, _ = load_sections(questions_path, config_cache, index)
+            plan.groups.append(SectionGroup("responses", grant_path, sections))
+
+    for group in plan.groups:
+        inputs += [
+            group.base_path / item["file"] for item in group.sections.values()
+        ]
+    return plan
+
+
+def process_group(
+    grant_id,
+    grant_config,
+    group,
+    manifest=None,
+    export_cache=None,
+    scheduler=None,
+    index=None,
+):
+    """Process the sections of one ``SectionGroup``."""
+    return process_sections(
+        Path(grant_config["path"]),
+        group.base_path,
+        group.sections,
+        grant_id,
+        grant_config["name"],
+        grant_config["foundation"],
+        manifest=manifest,
+        scope=group.scope,
+        export_cache=export_cache,
+        scheduler=scheduler,
+        index=index,
+    )
+
+
+def assemble_grant(grant_id, grant_config, plan, group_responses):
+    """Combine the processed responses of each group into a grant result."""
+    if not plan.has_new_structure:
+        responses = group_responses[0] if group_responses else {}
+        return {
+            "id": grant_id,
+            "config": grant_config,
+            "metadata": plan.metadata,
+            "responses": responses,
+        }
+
+    all_responses = {}
+    application_data = None
+    reports_data = []
+    for group, responses in zip(plan.groups, group_responses):
+        if group.scope == "application":
+            # Store application data separately
+            application_data = {
+                "metadata": group.metadata,
+                "responses": responses,
+            }
+            for key, value in responses.items():
+                all_responses[f"app_{key}"] = {
+                    **value,
+                    "type": "application",
+                }
         else:
-            with open(questions_path) as f:
-                questions_data = yaml.safe_load(f)
-
-            # Process responses
-            sections = questions_data.get("sections", {})
-
-            # Handle both dict format (Pritzker) and list format (PBIF)
-            if isinstance(sections, list):
-                # Convert list to dict for uniform processing
-                sections = {
-                    item.get("id", f"section_{i}"): item
-                    for i, item in enumerate(sections)
-                    if "file" in item
+            report_name = group.base_path.name
+            reports_data.append(
+                {
+                    "period": report_name,
+                    "metadata": group.metadata,
+                    "responses": responses,
                 }
-            elif not isinstance(sections, dict):
-                sections = {}
-
-            responses = process_sections(
-                grant_path,
-                grant_path,
-                sections,
-                grant_id,
-                grant_config["name"],
-                grant_config["foundation"],
             )
+            for key, value in responses.items():
+                all_responses[f"report_{report_name}_{key}"] = {
+                    **value,
+                    "type": "report",
+                    "report_period": report_name,
+                }
 
     result = {
         "id": grant_id,
         "config": grant_config,
-        "metadata": grant_metadata,
-        "responses": responses,
+        "metadata": plan.metadata,
+        "responses": all_responses,
     }
 
-    # Add application and reports as separate entities if using new structure
-    if has_new_structure:
-        if application_data:
-            result["application"] = application_data
-        if reports_data:
-            result["reports"] = reports_data
+    # Add application and reports as separate entities
+    if application_data:
+        result["application"] = application_data
+    if reports_data:
+        result["reports"] = reports_data
+    return result
+
+
+def process_grant(
+    grant_id,
+    grant_config,
+    manifest=None,
+    export_cache=None,
+    scheduler=None,
+    config_cache=None,
+):
+    """Process a single grant application."""
+    grant_path = Path(grant_config["path"])
+    with trace.span("scan", grant=grant_id):
+        index = RepoIndex.scan(grant_path)
+
+    if not index.exists(grant_path):
+        print(f"Warning: {grant_path} not found")
+        return None
+
+    if manifest is not None:
+        cached = manifest.get_grant(grant_id, grant_config, index)
+        if cached is not None:
+            return cached
+
+    with trace.span("plan", grant=grant_id):
+        plan = plan_grant(grant_id, grant_config, config_cache, index)
+    group_responses = [
+        process_group(
+            grant_id,
+            grant_config,
+            group,
+            manifest=manifest,
+            export_cache=export_cache,
+            scheduler=scheduler,
+            index=index,
+        )
+        for group in plan.groups
+    ]
+    result = assemble_grant(grant_id, grant_config, plan, group_responses)
+
+    if manifest is not None:
+        manifest.put_grant(grant_id, grant_config, plan.inputs, result, index)
 
     return result
 
 
-def build_all_grants(registry_path="grant_registry.yaml", output_dir="docs"):
-    """Build all grant viewers."""
-    # Load registry
-    with open("grant_registry.yaml") as f:
-        registry = yaml.safe_load(f)
+def _process_group_task(
+    grant_id, grant_config, group, manifest, trace_origin=None, index=None
+):
+    """Process a group in a worker, capturing its log and export jobs."""
+    scheduler = ExportScheduler()
+    log = io.StringIO()
+    if trace_origin is not None:
+        trace.start(trace_origin)
+    try:
+        with contextlib.redirect_stdout(log):
+            responses = process_group(
+                grant_id,
+                grant_config,
+                group,
+                manifest=manifest,
+                scheduler=scheduler,
+                index=index,
+            )
+    finally:
+        tracer = trace.stop()
+    events = tracer.events if tracer is not None else []
+    return responses, log.getvalue(), manifest, scheduler.jobs, events
 
-    grants_data = {}
 
-    print("Processing grants...")
-    for grant_id, grant_config in registry["grants"].items():
+def iter_grants(
+    grants, manifest=None, export_cache=None, scheduler=None, config_cache=None
+):
+    """Process grants one by one, yielding ``(grant_id, grant_data)``."""
+    for grant_id, grant_config in grants.items():
         print(f"\n📋 Processing {grant_id}...")
-        grant_data = process_grant(grant_id, grant_config)
+        with trace.span("grant", grant=grant_id):
+            grant_data = process_grant(
+                grant_id,
+                grant_config,
+                manifest=manifest,
+                export_cache=export_cache,
+                scheduler=scheduler,
+                config_cache=config_cache,
+            )
         if grant_data:
-            grants_data[grant_id] = grant_data
             response_count = len(grant_data["responses"])
             print(f"   ✅ {response_count} responses processed")
+            yield grant_id, grant_data
 
-    # Write to JavaScript
+
+def iter_grants_parallel(
+    grants, jobs, manifest=None, scheduler=None, config_cache=None
+):
+    """Process grants on a pool of ``jobs`` processes, in registry order."""
+    pending = collections.deque()
+    tracer = trace.active()
+    trace_origin = tracer.origin if tracer is not None else None
+    with ProcessPoolExecutor(jobs) as pool:
+        for grant_id, grant_config in grants.items():
+            log = io.StringIO()
+            with contextlib.redirect_stdout(log):
+                grant_path = Path(grant_config["path"])
+                with trace.span("scan", grant=grant_id):
+                    index = RepoIndex.scan(grant_path)
+                found = index.exists(grant_path)
+                plan = cached = None
+                if not found:
+                    print(f"Warning: {grant_path} not found")
+                elif manifest is not None:
+                    cached = manifest.get_grant(grant_id, grant_config, index)
+                if found and cached is None:
+                    with trace.span("plan", grant=grant_id):
+                        plan = plan_grant(
+                            grant_id, grant_config, config_cache, index
+                        )
+            futures = []
+            if plan is not None:
+                futures = [
+                    pool.submit(
+                        _process_group_task,
+                        grant_id,
+                        grant_config,
+                        group,
+                        (
+                            manifest.fork(f"{grant_id}/{group.scope}/")
+                            if manifest is not None
+                            else None
+                        ),
+                        trace_origin,
+                        index,
+                    )
+                    for group in plan.groups
+                ]
+            pending.append(
+                (grant_id, grant_config, log, plan, cached, futures)
+            )
+
+        while pending:
+            # Popped so a grant's results are freed once it is yielded
+            grant_id, grant_config, log, plan, cached, futures = (
+                pending.popleft()
+            )
+            print(f"\n📋 Processing {grant_id}...")
+            print(log.getvalue(), end="")
+            group_responses = []
+            for future in futures:
+                (
+                    responses,
+                    group_log,
+                    group_manifest,
+                    export_jobs,
+                    events,
+                ) = future.result()
+                print(group_log, end="")
+                if tracer is not None:
+                    tracer.events.extend(events)
+                group_responses.append(responses)
+                if manifest is not None:
+                    manifest.merge(group_manifest)
+                if scheduler is not None:
+                    scheduler.jobs.extend(export_jobs)
+
+            grant_data = cached
+            if plan is not None:
+                grant_data = assemble_grant(
+                    grant_id, grant_config, plan, group_responses
+                )
+                if manifest is not None:
+                    manifest.put_grant(
+                        grant_id,
+                        grant_config,
+                        plan.inputs,
+                        grant_data,
+                        plan.index,
+                    )
+            if grant_data:
+                response_count = len(grant_data["responses"])
+                print(f"   ✅ {response_count} responses processed")
+                yield grant_id, grant_data
+
+
+def select_shard(grants, index, count, config_cache=None):
+    """Return the grants in shard ``index`` of ``count``, in registry order."""
+    costs = {}
+    for grant_id, grant_config in grants.items():
+        with trace.span("plan", grant=grant_id):
+            plan = plan_grant(grant_id, grant_config, config_cache)
+        costs[grant_id] = grant_cost(plan)
+    assignment = assign_shards(costs, count)
+    selected = {
+        grant_id: grant_config
+        for grant_id, grant_config in grants.items()
+        if assignment[grant_id] == index
+    }
+    cost = sum(costs[grant_id] for grant_id in selected)
+    print(
+        f"🧩 Shard {index}/{count}: {len(selected)} of {len(grants)} grants, "
+        f"{cost / max(sum(costs.values()), 1):.0%} of the estimated work"
+    )
+    return selected
+
+
+def build_all_grants(
+    registry_path="grant_registry.yaml",
+    output_dir="docs",
+    incremental=False,
+    manifest_path=DEFAULT_MANIFEST_PATH,
+    export_cache=None,
+    export_workers=None,
+    jobs=1,
+    sharded=False,
+    production=False,
+    config_cache=None,
+    schema=DEFAULT_SCHEMA,
+    search_index=False,
+    pandoc_server=True,
+    backend=DEFAULT_EXPORT_BACKEND,
+    shard=None,
+    history=None,
+):
+    """Build all grant viewers."""
+    # Load registry
+    with trace.span("registry"):
+        registry = load_yaml(registry_path, config_cache)
+    grants = registry["grants"]
+    if shard is not None:
+        grants = select_shard(grants, *shard, config_cache)
+
+    manifest = BuildManifest.load(manifest_path) if incremental else None
+    backend = export_backend(
+        backend, server=PandocServer() if pandoc_server else None
+    )
+    scheduler = ExportScheduler(
+        max_workers=export_workers, cache=export_cache, backend=backend
+    )
+
+    # Each grant is written out as soon as it is processed; only what
+    # the summary below needs is kept in memory.
     docs_path = Path("docs")
     docs_path.mkdir(exist_ok=True)
+    writer = JsonWriter(production=production)
+    if shard is not None:
+        output = PartialStream(docs_path, *shard, grants)
+    elif sharded:
+        output = ShardedStream(docs_path, writer=writer)
+    else:
+        output = GrantsDataStream(docs_path, writer=writer, schema=schema)
+
+    print("Processing grants...")
+    if jobs and jobs > 1:
+        processed = iter_grants_parallel(
+            grants,
+            jobs,
+            manifest=manifest,
+            scheduler=scheduler,
+            config_cache=config_cache,
+        )
+    else:
+        processed = iter_grants(
+            grants,
+            manifest=manifest,
+            export_cache=export_cache,
+            scheduler=scheduler,
+            config_cache=config_cache,
+        )
 
-    js_content = json.dumps(grants_data, indent=2)
+    summaries = {}
+    search_builder = SearchIndexBuilder() if search_index else None
+    with output:
+        for grant_id, grant_data in processed:
+            output.add(grant_id, grant_data)
+            if search_builder is not None:
+                search_builder.add_grant(grant_id, grant_data)
+            if history is not None:
+                history.add_grant(grant_id, grant_data)
+            summaries[grant_id] = (
+                grant_data["config"],
+                len(grant_data["responses"]),
+            )
 
-    (docs_path / "grants_data.json").write_text(js_content)
-    print(f"\n✅ Generated docs/grants_data.json")
-    print(f"✅ Processed {len(grants_data)} grants")
+        with trace.span("exports"):
+            try:
+                scheduler.run()
+            finally:
+                backend.close()
+
+        # Only now is the previous output replaced
+        output.close()
+
+    if shard is not None:
+        print(f"\n✅ Generated {partial_path(docs_path, *shard)}/")
+    elif sharded:
+        print(
+            f"\n✅ Generated docs/grants_index.json and "
+            f"{len(summaries)} grant shards in docs/{SHARD_DIR}/"
+        )
+    else:
+        print(f"\n✅ Generated docs/grants_data.json")
+    if search_builder is not None:
+        search_builder.write(docs_path, writer=writer)
+        print(
+            f"🔎 Indexed {len(search_builder.documents)} responses "
+            f"({len(search_builder.postings)} terms) in docs/search/"
+        )
+    if production:
+        print(writer.summary())
+    print(f"✅ Processed {len(summaries)} grants")
+
+    if manifest is not None:
+        manifest.prune(registry["grants"])
+        manifest.save()
+        print(
+            f"♻️  Incremental: {manifest.hits} sections reused, "
+            f"{manifest.misses} rebuilt"
+        )
+    if config_cache is not None:
+        config_cache.save()
+    if history is not None:
+        build_id = history.commit()
+        print(
+            f"📈 History: build #{build_id}, "
+            f"{history.recorded} changed sections recorded"
+        )
+    if export_cache is not None and (export_cache.hits or export_cache.misses):
+        print(
+            f"📦 Export cache: {export_cache.hits} hits, "
+            f"{export_cache.misses} misses"
+        )
 
     # Print summary
     print("\n" + "=" * 60)
     print("GRANT SUMMARY")
     print("=" * 60)
-    for grant_id, data in grants_data.items():
-        print(f"\n{data['config']['name']}")
-        print(f"  Foundation: {data['config']['foundation']}")
-        print(f"  Amount: ${data['config']['amount_requested']:,}")
-        print(f"  Status: {data['config']['status']}")
-        print(f"  Responses: {len(data['responses'])}")
+    for config, response_count in summaries.values():
+        print(f"\n{config['name']}")
+        print(f"  Foundation: {config['foundation']}")
+        print(f"  Amount: ${config['amount_requested']:,}")
+        print(f"  Status: {config['status']}")
+        print(f"  Responses: {response_count}")
 
 
 if __name__ == "__main__":
@@ -1,25 +1,640 @@
 """Command-line interface for grants_builder."""
 
+import argparse
+import datetime
+import json
 import sys
 from pathlib import Path
 
+import yaml
+
+from . import trace
 from .builder import build_all_grants
+from .config_cache import DEFAULT_CONFIG_CACHE_PATH, ConfigCache, load_yaml
+from .duplicates import (
+    DEFAULT_THRESHOLD,
+    SignatureCache,
+    find_duplicates,
+    iter_responses,
+)
+from .export_cache import (
+    DEFAULT_EXPORT_CACHE_DIR,
+    DEFAULT_EXPORT_CACHE_MAX_BYTES,
+    ExportCache,
+)
+from .exporter import DEFAULT_EXPORT_BACKEND, EXPORT_BACKEND_NAMES
+from .history import DEFAULT_HISTORY_PATH, BuildHistory
+from .manifest import DEFAULT_MANIFEST_PATH
+from .output import DEFAULT_SCHEMA, SCHEMAS, JsonWriter
+from .serve import (
+    DEFAULT_CACHE_MAX_BYTES,
+    DEFAULT_CORS_ORIGIN,
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    GrantServer,
+    GrantService,
+)
+from .shards import merge_partials, parse_shard
+from .validate import validate_grants
+from .watch import (
+    DEFAULT_DEBOUNCE,
+    DEFAULT_EXPORT_DELAY,
+    DEFAULT_POLL_INTERVAL,
+    GrantWatcher,
+)
 
 
-def build():
+def build(argv=None):
     """Build all grant viewers."""
+    parser = argparse.ArgumentParser(
+        prog="grants-build", description=build.__doc__
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only reprocess grants and sections whose inputs changed",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=DEFAULT_MANIFEST_PATH,
+        help="Input-hash manifest used by --incremental",
+    )
+    parser.add_argument(
+        "--no-export-cache",
+        action="store_true",
+        help="Always rerun pandoc/soffice instead of reusing cached exports",
+    )
+    parser.add_argument(
+        "--export-backend",
+        choices=EXPORT_BACKEND_NAMES,
+        default=DEFAULT_EXPORT_BACKEND,
+        help="Render DOCX with pandoc or the built-in renderer (default: "
+        "pandoc if installed)",
+    )
+    parser.add_argument(
+        "--no-pandoc-server",
+        action="store_true",
+        help="Run pandoc once per export instead of through pandoc-server",
+    )
+    parser.add_argument(
+        "--no-config-cache",
+        action="store_true",
+        help="Always reparse YAML files instead of reusing parsed ones",
+    )
+    parser.add_argument(
+        "--history",
+        action="store_true",
+        help="Record section metrics in the build history",
+    )
+    parser.add_argument(
+        "--export-cache-dir",
+        type=Path,
+        default=DEFAULT_EXPORT_CACHE_DIR,
+        help="Directory holding cached DOCX/PDF exports",
+    )
+    parser.add_argument(
+        "--export-cache-size",
+        type=int,
+        default=DEFAULT_EXPORT_CACHE_MAX_BYTES // 2**20,
+        metavar="MB",
+        help="Size cap for the export cache before LRU eviction",
+    )
+    parser.add_argument(
+        "--export-workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Parallel pandoc conversions (default: up to 8 CPUs)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Process grants on N worker processes",
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="Write grants_index.json plus per-grant shards instead of "
+        "one grants_data.json",
+    )
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="Write minified JSON with precompressed .gz/.br sidecars",
+    )
+    parser.add_argument(
+        "--schema",
+        type=int,
+        choices=SCHEMAS,
+        default=DEFAULT_SCHEMA,
+        help="grants_data.json schema: 1 for the current viewer, 2 to "
+        "store each response once",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help="Also write a sharded full-text search index to docs/search/",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time each build stage and print the slowest ones",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="FILE",
+        help="Like --profile, and write the spans as Chrome trace JSON",
+    )
+    parser.add_argument(
+        "--shard",
+        type=_shard,
+        metavar="I/N",
+        help="Only build shard I of N into docs/partials/ for grants-merge",
+    )
+    args = parser.parse_args(argv)
+    if args.sharded and args.schema != DEFAULT_SCHEMA:
+        parser.error("--schema only applies to grants_data.json")
+    if args.shard and (
+        args.sharded
+        or args.production
+        or args.search_index
+        or args.schema != DEFAULT_SCHEMA
+    ):
+        parser.error(
+            "--sharded, --production, --schema and --search-index are "
+            "given to grants-merge when building with --shard"
+        )
+
+    if args.profile or args.trace:
+        tracer = trace.start()
+
+    export_cache = None
+    if not args.no_export_cache:
+        export_cache = ExportCache(
+            args.export_cache_dir, max_bytes=args.export_cache_size * 2**20
+        )
+
+    build_history = BuildHistory() if args.history else None
+    try:
+        build_all_grants(
+            incremental=args.incremental,
+            manifest_path=args.manifest,
+            export_cache=export_cache,
+            export_workers=args.export_workers,
+            jobs=args.jobs,
+            sharded=args.sharded,
+            production=args.production,
+            schema=args.schema,
+            search_index=args.search_index,
+            pandoc_server=not args.no_pandoc_server,
+            backend=args.export_backend,
+            shard=args.shard,
+            history=build_history,
+            config_cache=(
+                None
+                if args.no_config_cache
+                else ConfigCache.load(DEFAULT_CONFIG_CACHE_PATH)
+            ),
+        )
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        trace.stop()
+        if build_history is not None:
+            build_history.close()
+
+    if args.profile or args.trace:
+        print("\n" + tracer.summary())
+    if args.trace:
+        tracer.write(args.trace)
+        print(f"📝 Wrote {len(tracer.events)} spans to {args.trace}")
+
+
+def _shard(value):
     try:
-        build_all_grants()
+        return parse_shard(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"expected I/N with 1 <= I <= N, got {value!r}"
+        )
+
+
+def merge(argv=None):
+    """Combine the partial builds of every shard into the full output."""
+    parser = argparse.ArgumentParser(
+        prog="grants-merge",
+        description="Combine the docs/partials/ written by grants-build "
+        "--shard I/N into the output a single grants-build writes.",
+    )
+    parser.add_argument(
+        "--registry",
+        type=Path,
+        default=Path("grant_registry.yaml"),
+        help="Grant registry the shards were built from",
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="Write grants_index.json plus per-grant shards instead of "
+        "one grants_data.json",
+    )
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="Write minified JSON with precompressed .gz/.br sidecars",
+    )
+    parser.add_argument(
+        "--schema",
+        type=int,
+        choices=SCHEMAS,
+        default=DEFAULT_SCHEMA,
+        help="grants_data.json schema: 1 for the current viewer, 2 to "
+        "store each response once",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help="Also write a sharded full-text search index to docs/search/",
+    )
+    args = parser.parse_args(argv)
+    if args.sharded and args.schema != DEFAULT_SCHEMA:
+        parser.error("--schema only applies to grants_data.json")
+
+    try:
+        merge_partials(
+            args.registry,
+            sharded=args.sharded,
+            production=args.production,
+            schema=args.schema,
+            search_index=args.search_index,
+        )
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
 
-def validate():
+def history(argv=None):
+    """Show how section metrics changed across builds."""
+    parser = argparse.ArgumentParser(
+        prog="grants-history",
+        description="Query the section metrics recorded by past builds.",
+    )
+    parser.add_argument(
+        "grant", nargs="?", help="Only show this grant (default: all)"
+    )
+    parser.add_argument(
+        "section", nargs="?", help="Only show this section (default: all)"
+    )
+    parser.add_argument(
+        "--period",
+        help="Only show this report period ('' for application and "
+        "legacy sections)",
+    )
+    parser.add_argument(
+        "--since",
+        type=datetime.date.fromisoformat,
+        metavar="YYYY-MM-DD",
+        help="Only show builds from this date on",
+    )
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=DEFAULT_HISTORY_PATH,
+        help="Build history database to read",
+    )
+    parser.add_argument(
+        "--export",
+        type=Path,
+        metavar="FILE",
+        help="Write trend series as JSON to FILE instead of printing",
+    )
+    args = parser.parse_args(argv)
+    if not args.db.exists():
+        print(f"Error: no build history at {args.db}", file=sys.stderr)
+        sys.exit(2)
+
+    since = None
+    if args.since is not None:
+        since = datetime.datetime.combine(args.since, datetime.time())
+        since = int(since.timestamp())
+    filters = dict(
+        grant_id=args.grant,
+        section=args.section,
+        period=args.period,
+        since=since,
+    )
+    store = BuildHistory(args.db)
+    try:
+        if args.export:
+            trends = store.trends(**filters)
+            JsonWriter(compact=True).write(args.export, trends)
+            print(
+                f"📈 Wrote trends of {len(trends['grants'])} grants to "
+                f"{args.export}"
+            )
+            return
+        for sample in store.query(**filters):
+            built_at = datetime.datetime.fromtimestamp(sample["built_at"])
+            scope = "/".join(
+                part
+                for part in (
+                    sample["grant_id"],
+                    sample["period"],
+                    sample["section"],
+                )
+                if part
+            )
+            print(
+                f"{built_at:%Y-%m-%d %H:%M}  #{sample['build_id']:<5} "
+                f"{scope}  {sample['word_count']:,} words  "
+                f"{sample['char_count']:,} chars  {sample['status']}"
+            )
+    finally:
+        store.close()
+
+
+def watch(argv=None):
+    """Rebuild grants as their sources change."""
+    parser = argparse.ArgumentParser(
+        prog="grants-watch", description=watch.__doc__
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        metavar="SECONDS",
+        help="How often to poll for changes",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        metavar="SECONDS",
+        help="Wait for changes to settle this long before rebuilding",
+    )
+    parser.add_argument(
+        "--export-delay",
+        type=float,
+        default=DEFAULT_EXPORT_DELAY,
+        metavar="SECONDS",
+        help="Export a response once its file has been quiet this long",
+    )
+    parser.add_argument(
+        "--no-export-cache",
+        action="store_true",
+        help="Always rerun pandoc/soffice instead of reusing cached exports",
+    )
+    parser.add_argument(
+        "--export-backend",
+        choices=EXPORT_BACKEND_NAMES,
+        default=DEFAULT_EXPORT_BACKEND,
+        help="Render DOCX with pandoc or the built-in renderer (default: "
+        "pandoc if installed)",
+    )
+    parser.add_argument(
+        "--no-pandoc-server",
+        action="store_true",
+        help="Run pandoc once per export instead of through pandoc-server",
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="Write grants_index.json plus per-grant shards",
+    )
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="Write minified JSON with precompressed .gz/.br sidecars",
+    )
+    parser.add_argument(
+        "--schema",
+        type=int,
+        choices=SCHEMAS,
+        default=DEFAULT_SCHEMA,
+        help="grants_data.json schema: 1 for the current viewer, 2 to "
+        "store each response once",
+    )
+    args = parser.parse_args(argv)
+    if args.sharded and args.schema != DEFAULT_SCHEMA:
+        parser.error("--schema only applies to grants_data.json")
+
+    watcher = GrantWatcher(
+        interval=args.interval,
+        debounce=args.debounce,
+        export_delay=args.export_delay,
+        sharded=args.sharded,
+        production=args.production,
+        schema=args.schema,
+        export_cache=None if args.no_export_cache else ExportCache(),
+        pandoc_server=not args.no_pandoc_server,
+        backend=args.export_backend,
+    )
+    try:
+        watcher.run()
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def serve(argv=None):
+    """Serve grant data to the viewer, processing grants on demand."""
+    parser = argparse.ArgumentParser(
+        prog="grants-serve", description=serve.__doc__
+    )
+    parser.add_argument(
+        "--host",
+        default=DEFAULT_HOST,
+        help=f"Address to listen on (default: {DEFAULT_HOST})",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port to listen on (default: {DEFAULT_PORT})",
+    )
+    parser.add_argument(
+        "--cors-origin",
+        default=DEFAULT_CORS_ORIGIN,
+        help="Origin allowed to fetch from the server (default: "
+        f"{DEFAULT_CORS_ORIGIN}, the viewer's dev server)",
+    )
+    parser.add_argument(
+        "--registry",
+        type=Path,
+        default=Path("grant_registry.yaml"),
+        help="Grant registry to serve",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_MAX_BYTES // 2**20,
+        metavar="MB",
+        help="Size cap for processed grants kept in memory",
+    )
+    parser.add_argument(
+        "--no-export-cache",
+        action="store_true",
+        help="Always rerun pandoc/soffice instead of reusing cached exports",
+    )
+    parser.add_argument(
+        "--export-backend",
+        choices=EXPORT_BACKEND_NAMES,
+        default=DEFAULT_EXPORT_BACKEND,
+        help="Render DOCX with pandoc or the built-in renderer (default: "
+        "pandoc if installed)",
+    )
+    parser.add_argument(
+        "--no-pandoc-server",
+        action="store_true",
+        help="Run pandoc once per export instead of through pandoc-server",
+    )
+    args = parser.parse_args(argv)
+
+    service = GrantService(
+        registry_path=args.registry,
+        max_bytes=args.cache_size * 2**20,
+        export_cache=None if args.no_export_cache else ExportCache(),
+        pandoc_server=not args.no_pandoc_server,
+        backend=args.export_backend,
+    )
+    try:
+        server = GrantServer(
+            (args.host, args.port), service, cors_origin=args.cors_origin
+        )
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(
+        f"🌐 Serving grants on http://{args.host}:{server.server_port}/ "
+        f"(Ctrl+C to stop)"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def validate(argv=None):
     """Validate grant structure and responses."""
-    # TODO: Implement validation
-    print("Validation not yet implemented")
-    sys.exit(0)
+    parser = argparse.ArgumentParser(
+        prog="grants-validate",
+        description="Check every response against its limits without "
+        "exporting or writing anything.",
+    )
+    parser.add_argument(
+        "grants",
+        nargs="*",
+        metavar="GRANT",
+        help="Only validate these grants (default: all)",
+    )
+    parser.add_argument(
+        "--registry",
+        type=Path,
+        default=Path("grant_registry.yaml"),
+        help="Grant registry to validate",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Also fail on missing files and leading question headers",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Validate grants on N threads",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        grants = load_yaml(args.registry)["grants"]
+    except (OSError, KeyError, TypeError, yaml.YAMLError) as e:
+        print(f"Error: cannot read {args.registry}: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    unknown = sorted(set(args.grants) - set(grants))
+    if unknown:
+        parser.error(f"unknown grant(s): {', '.join(unknown)}")
+    if args.grants:
+        grants = {
+            grant_id: grants[grant_id]
+            for grant_id in grants
+            if grant_id in args.grants
+        }
+
+    report = validate_grants(grants, jobs=args.jobs)
+    print(json.dumps(report, indent=2))
+    failed = report["errors"] or (args.strict and report["warnings"])
+    sys.exit(1 if failed else 0)
+
+
+def duplicates(argv=None):
+    """Report near-duplicate paragraphs across grants."""
+    parser = argparse.ArgumentParser(
+        prog="grants-duplicates",
+        description="Find paragraphs copied between grants and report "
+        "periods, including copies that have since drifted apart.",
+    )
+    parser.add_argument(
+        "grants",
+        nargs="*",
+        metavar="GRANT",
+        help="Only compare these grants (default: all)",
+    )
+    parser.add_argument(
+        "--registry",
+        type=Path,
+        default=Path("grant_registry.yaml"),
+        help="Grant registry to read",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Minimum estimated Jaccard similarity of two paragraphs' "
+        f"5-word shingles (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompute every signature instead of reusing cached ones",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        grants = load_yaml(args.registry)["grants"]
+    except (OSError, KeyError, TypeError, yaml.YAMLError) as e:
+        print(f"Error: cannot read {args.registry}: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    unknown = sorted(set(args.grants) - set(grants))
+    if unknown:
+        parser.error(f"unknown grant(s): {', '.join(unknown)}")
+    if args.grants:
+        grants = {
+            grant_id: grants[grant_id]
+            for grant_id in grants
+            if grant_id in args.grants
+        }
+
+    cache = SignatureCache() if args.no_cache else SignatureCache.load()
+    report = find_duplicates(
+        iter_responses(grants), threshold=args.threshold, cache=cache
+    )
+    if not args.no_cache:
+        cache.save()
+    print(json.dumps(report, indent=2, ensure_ascii=False))
 
 
 if __name__ == "__main__":
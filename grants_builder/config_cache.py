@@ -0,0 +1,97 @@
+"""Load YAML config files with libyaml and cache the parsed result."""
+
+import os
+import pickle
+from pathlib import Path
+
+import yaml
+
+from . import trace
+
+# libyaml's loader parses the same documents roughly ten times faster;
+# fall back to the pure-Python one when PyYAML was built without it.
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Bump whenever what is stored per file changes.
+CONFIG_CACHE_VERSION = 1
+
+DEFAULT_CONFIG_CACHE_PATH = Path(".grants_cache/config.pickle")
+
+
+def load_yaml(path, cache=None, index=None):
+    """Parse a YAML file, going through ``cache`` if one is given."""
+    with trace.span("yaml", path=str(path)):
+        if cache is not None:
+            return cache.read(
+                path, index.stat(path) if index is not None else None
+            )
+        with open(path) as f:
+            return yaml.load(f, Loader=SafeLoader)
+
+
+class ConfigCache:
+    """Parsed YAML files keyed on path, mtime and size."""
+
+    def __init__(self, path=DEFAULT_CONFIG_CACHE_PATH):
+        self.path = Path(path)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path=DEFAULT_CONFIG_CACHE_PATH):
+        """Load a cache from disk, starting fresh if it is unusable."""
+        cache = cls(path)
+        try:
+            with open(cache.path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return cache
+        if (
+            isinstance(data, dict)
+            and data.get("version") == CONFIG_CACHE_VERSION
+            and data.get("loader") == SafeLoader.__name__
+        ):
+            cache.entries = data["entries"]
+        return cache
+
+    def save(self):
+        """Atomically write the cache to disk if anything changed."""
+        for key in list(self.entries):
+            if not os.path.exists(key):
+                del self.entries[key]
+                self.dirty = True
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": CONFIG_CACHE_VERSION,
+            "loader": SafeLoader.__name__,
+            "entries": self.entries,
+        }
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def read(self, path, stat=None):
+        """Return the parsed contents of ``path``."""
+        key = str(path)
+        if stat is None:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        else:
+            signature = (stat.mtime_ns, stat.size)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        with open(path) as f:
+            data = yaml.load(f, Loader=SafeLoader)
+        self.entries[key] = (signature, data)
+        self.dirty = True
+        return data
@@ -0,0 +1,91 @@
+"""Probe the PDF converters once per build and stop using broken ones."""
+
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .export_cache import tool_version
+
+# PDF converters in the order they are tried, with the executables each
+# one runs.
+PDF_CONVERTERS = {"soffice": ("soffice",), "xelatex": ("pandoc", "xelatex")}
+DEFAULT_FAILURE_THRESHOLD = 3
+
+
+class Converters:
+    """Which converters are installed, and which keep failing."""
+
+    def __init__(self, versions, threshold=DEFAULT_FAILURE_THRESHOLD):
+        self.versions = versions
+        self.threshold = threshold
+        self.failures = dict.fromkeys(PDF_CONVERTERS, 0)
+        self.tripped = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def probe(cls, threshold=DEFAULT_FAILURE_THRESHOLD):
+        """Find each converter's executables and their versions."""
+        tools = sorted(
+            {tool for needs in PDF_CONVERTERS.values() for tool in needs}
+        )
+
+        def version(tool):
+            # Bare names share tool_version's cache with ExportCache.key
+            return tool_version(tool) if shutil.which(tool) else None
+
+        with ThreadPoolExecutor(len(tools)) as pool:
+            versions = dict(zip(tools, pool.map(version, tools)))
+        return cls(versions, threshold=threshold)
+
+    def missing(self, converter):
+        """Return the executables ``converter`` needs but cannot find."""
+        return [
+            tool
+            for tool in PDF_CONVERTERS[converter]
+            if self.versions.get(tool) is None
+        ]
+
+    def available(self, converter):
+        """Whether ``converter`` is installed and has not been tripped."""
+        return not self.missing(converter) and converter not in self.tripped
+
+    def succeeded(self, converter):
+        with self._lock:
+            self.failures[converter] = 0
+
+    def failed(self, converter):
+        """Count a failure, tripping ``converter`` at the threshold."""
+        with self._lock:
+            self.failures[converter] += 1
+            if (
+                self.failures[converter] >= self.threshold
+                and converter not in self.tripped
+            ):
+                self.tripped.add(converter)
+                print(
+                    f"   ⚠️  {converter} failed {self.threshold} times in a "
+                    f"row; skipping it for the rest of the build"
+                )
+
+    @contextmanager
+    def attempt(self, converter):
+        """Record whether the conversion in the block succeeded."""
+        try:
+            yield
+        except BaseException:
+            self.failed(converter)
+            raise
+        self.succeeded(converter)
+
+    def describe(self):
+        """Return a line per converter that cannot be used."""
+        lines = []
+        for converter in PDF_CONVERTERS:
+            missing = self.missing(converter)
+            if missing:
+                lines.append(
+                    f"   {converter} unavailable ({', '.join(missing)} not "
+                    f"found)"
+                )
+        return lines
@@ -0,0 +1,250 @@
+"""Find near-duplicate paragraphs across grants with MinHash and LSH."""
+
+import functools
+import hashlib
+import os
+import pickle
+import random
+import re
+from collections import namedtuple
+from pathlib import Path
+
+from .builder import plan_grant
+from .manifest import hash_bytes
+from .search import tokenize
+from .utils import analyze_markdown
+
+# Bump whenever how signatures are computed changes.
+SIGNATURE_VERSION = 1
+
+DEFAULT_SIGNATURE_CACHE_PATH = Path(".grants_cache/minhash.pickle")
+DEFAULT_THRESHOLD = 0.5
+SHINGLE_SIZE = 5
+# Paragraphs shorter than this (headings, list labels) are ignored
+MIN_WORDS = 12
+# 32 bands of 2 rows make paragraphs candidates from a Jaccard
+# similarity of about (1/32) ** (1/2) = 0.18, so pairs at the default
+# threshold are almost never missed; candidates are then checked
+# against the threshold.
+BANDS = 32
+ROWS = 2
+# Signature length; a power of two, so a hash's top bits pick its bin
+NUM_BINS = BANDS * ROWS
+_RANK_BITS = 64 - (NUM_BINS.bit_length() - 1)
+
+_MASK = (1 << 64) - 1
+# Shingle hashes are a rolling polynomial over 64-bit token hashes
+_MULTIPLIER = 0x9E3779B97F4A7C15
+_LEADING = pow(_MULTIPLIER, SHINGLE_SIZE - 1, 1 << 64)
+
+# The order in which each empty bin looks for a bin to copy; fixed, so
+# two texts missing the same bin copy from the same place.
+_rng = random.Random(SIGNATURE_VERSION)
+_DONORS = [
+    [donor for donor in _rng.sample(range(NUM_BINS), NUM_BINS) if donor != i]
+    for i in range(NUM_BINS)
+]
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+# One paragraph of one response. ``section`` is ``(grant_id, scope,
+# section_key)`` and ``paragraph`` its index among the response's
+# paragraphs.
+Paragraph = namedtuple("Paragraph", ["section", "paragraph", "text"])
+
+
+def paragraphs(plain_text):
+    """Return the paragraphs of ``plain_text`` long enough to compare."""
+    return [
+        (index, paragraph.strip())
+        for index, paragraph in enumerate(_PARAGRAPH_BREAK.split(plain_text))
+        if len(paragraph.split()) >= MIN_WORDS
+    ]
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _token_hash(token):
+    return int.from_bytes(
+        hashlib.blake2b(token.encode(), digest_size=8).digest(), "little"
+    )
+
+
+def shingles(text):
+    """Return the 64-bit hashes of the word ``SHINGLE_SIZE``-grams."""
+    hashes = list(map(_token_hash, tokenize(text)))
+    value = 0
+    for token in hashes[:SHINGLE_SIZE]:
+        value = (value * _MULTIPLIER + token) & _MASK
+    result = {value}
+    for old, new in zip(hashes, hashes[SHINGLE_SIZE:]):
+        value = ((value - old * _LEADING) * _MULTIPLIER + new) & _MASK
+        result.add(value)
+    return result
+
+
+def minhash(hashes):
+    """Return the one-permutation MinHash signature of a set of hashes."""
+    bins = [None] * NUM_BINS
+    for value in hashes:
+        i = value >> _RANK_BITS
+        rank = value & ((1 << _RANK_BITS) - 1)
+        if bins[i] is None or rank < bins[i]:
+            bins[i] = rank
+    filled = list(bins)
+    for i, rank in enumerate(filled):
+        if rank is None:
+            donor = next(d for d in _DONORS[i] if filled[d] is not None)
+            bins[i] = filled[donor]
+    return tuple(bins)
+
+
+def similarity(signature, other):
+    """Estimate the Jaccard similarity of two signatures' shingles."""
+    return sum(x == y for x, y in zip(signature, other)) / NUM_BINS
+
+
+class SignatureCache:
+    """Paragraph signatures keyed on the hash of a response's text."""
+
+    def __init__(self, path=DEFAULT_SIGNATURE_CACHE_PATH):
+        self.path = Path(path)
+        self.entries = {}
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path=DEFAULT_SIGNATURE_CACHE_PATH):
+        """Load a cache from disk, starting fresh if it is unusable."""
+        cache = cls(path)
+        try:
+            with open(cache.path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return cache
+        if (
+            isinstance(data, dict)
+            and data.get("version") == SIGNATURE_VERSION
+            and data.get("params") == _params()
+        ):
+            cache.entries = data["entries"]
+        return cache
+
+    def signatures(self, plain_text):
+        """Return ``[(paragraph index, text, signature)]`` for a text."""
+        key = hash_bytes(plain_text.encode("utf-8"))
+        self.used.add(key)
+        found = paragraphs(plain_text)
+        signatures = self.entries.get(key)
+        if signatures is None:
+            self.misses += 1
+            signatures = [minhash(shingles(text)) for _, text in found]
+            self.entries[key] = signatures
+        else:
+            self.hits += 1
+        return [
+            (index, text, signature)
+            for (index, text), signature in zip(found, signatures)
+        ]
+
+    def save(self):
+        """Atomically write the entries used in this run to disk."""
+        if not self.misses and self.used == set(self.entries):
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": SIGNATURE_VERSION,
+            "params": _params(),
+            "entries": {
+                key: value
+                for key, value in self.entries.items()
+                if key in self.used
+            },
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+
+def _params():
+    return [SHINGLE_SIZE, MIN_WORDS, NUM_BINS, BANDS]
+
+
+def iter_responses(grants):
+    """Yield ``(grant_id, scope, section_key, plain_text)`` per response."""
+    for grant_id, grant_config in grants.items():
+        if not Path(grant_config["path"]).exists():
+            continue
+        plan = plan_grant(grant_id, grant_config)
+        for group in plan.groups:
+            for section_key, section_data in group.sections.items():
+                response_file = group.base_path / section_data["file"]
+                try:
+                    markdown = response_file.read_text()
+                except FileNotFoundError:
+                    continue
+                plain_text, _, _ = analyze_markdown(markdown)
+                yield grant_id, group.scope, section_key, plain_text
+
+
+def find_duplicates(responses, threshold=DEFAULT_THRESHOLD, cache=None):
+    """Return the near-duplicate paragraph pairs among ``responses``."""
+    if cache is None:
+        cache = SignatureCache()
+    found = []
+    buckets = {}
+    sections = 0
+    for grant_id, scope, section_key, plain_text in responses:
+        sections += 1
+        section = (grant_id, scope, section_key)
+        for index, text, signature in cache.signatures(plain_text):
+            number = len(found)
+            found.append((Paragraph(section, index, text), signature))
+            for start in range(0, NUM_BINS, ROWS):
+                key = (start, *signature[start : start + ROWS])
+                buckets.setdefault(key, []).append(number)
+
+    candidates = set()
+    for members in buckets.values():
+        if len(members) == 1:
+            continue
+        for i, first in enumerate(members):
+            for second in members[i + 1 :]:
+                if found[first][0].section != found[second][0].section:
+                    candidates.add((first, second))
+
+    pairs = []
+    for first, second in sorted(candidates):
+        (paragraph, signature), (other, other_signature) = (
+            found[first],
+            found[second],
+        )
+        score = similarity(signature, other_signature)
+        if score >= threshold:
+            pairs.append(
+                {
+                    "similarity": round(score, 3),
+                    "paragraphs": [_describe(paragraph), _describe(other)],
+                }
+            )
+    # Stable, so equal scores keep the order responses were read in
+    pairs.sort(key=lambda pair: -pair["similarity"])
+    return {
+        "sections": sections,
+        "paragraphs": len(found),
+        "pairs": pairs,
+    }
+
+
+def _describe(paragraph):
+    grant_id, scope, section_key = paragraph.section
+    excerpt = paragraph.text[:120]
+    if len(paragraph.text) > 120:
+        excerpt = excerpt.rsplit(" ", 1)[0] + "…"
+    return {
+        "grant": grant_id,
+        "scope": scope,
+        "section": section_key,
+        "paragraph": paragraph.paragraph,
+        "excerpt": excerpt,
+    }
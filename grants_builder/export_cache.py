@@ -0,0 +1,126 @@
+"""Content-addressed disk cache for DOCX/PDF exports."""
+
+import functools
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+
+from .manifest import hash_object
+
+DEFAULT_EXPORT_CACHE_DIR = Path(".grants_cache/exports")
+DEFAULT_EXPORT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=None)
+def tool_version(tool):
+    """Return the first line of ``tool --version``, or "missing"."""
+    try:
+        result = subprocess.run(
+            [tool, "--version"],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return "missing"
+    lines = result.stdout.strip().splitlines()
+    return lines[0] if lines else "unknown"
+
+
+def place_file(source, destination):
+    """Hardlink ``source`` to ``destination``, copying if linking fails."""
+    destination = Path(destination)
+    destination.unlink(missing_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def detach_file(path):
+    """Unlink ``path`` if it shares its inode with a cache blob."""
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class ExportCache:
+    """Rendered export artifacts keyed on everything that shapes them."""
+
+    def __init__(
+        self,
+        cache_dir=DEFAULT_EXPORT_CACHE_DIR,
+        max_bytes=DEFAULT_EXPORT_CACHE_MAX_BYTES,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Total size of the blobs, known once ``evict`` has scanned them
+        # and kept up to date by ``store`` from then on
+        self.size = None
+        self._lock = threading.Lock()
+
+    def key(self, document, args, tools):
+        """Return the cache key for a document rendered with ``args``."""
+        versions = {tool: tool_version(tool) for tool in tools}
+        return hash_object([document, list(args), versions])
+
+    def _blob_path(self, key):
+        return self.cache_dir / key[:2] / key
+
+    def fetch(self, key, output_path):
+        """Place a cached artifact at ``output_path``; return True on hit."""
+        blob = self._blob_path(key)
+        if not blob.exists():
+            self.misses += 1
+            return False
+        os.utime(blob)
+        place_file(blob, output_path)
+        self.hits += 1
+        return True
+
+    def store(self, key, source_path):
+        """Add a freshly rendered artifact to the cache."""
+        blob = self._blob_path(key)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        with (
+            tempfile.NamedTemporaryFile(
+                dir=blob.parent, suffix=".tmp", delete=False
+            ) as tmp,
+            open(source_path, "rb") as source,
+        ):
+            shutil.copyfileobj(source, tmp)
+        with self._lock:
+            if self.size is not None:
+                self.size += os.stat(tmp.name).st_size
+                if blob.exists():
+                    self.size -= blob.stat().st_size
+            os.replace(tmp.name, blob)
+
+    def evict(self):
+        """Drop least recently used blobs until under the size cap."""
+        with self._lock:
+            if self.size is not None and self.size <= self.max_bytes:
+                return
+            blobs = []
+            total = 0
+            for blob in self.cache_dir.glob("*/*"):
+                # Skip artifacts still being copied in by ``store``
+                if blob.suffix == ".tmp":
+                    continue
+                stat = blob.stat()
+                blobs.append((stat.st_mtime_ns, stat.st_size, blob))
+                total += stat.st_size
+
+            for _, size, blob in sorted(blobs):
+                if total <= self.max_bytes:
+                    break
+                blob.unlink(missing_ok=True)
+                total -= size
+            self.size = total
@@ -1,9 +1,55 @@
 """Export grant responses to DOCX and PDF formats using pandoc."""
 
+import shutil
 import subprocess
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 import tempfile
 
+from . import trace
+from .converters import PDF_CONVERTERS
+from .export_cache import detach_file
+from .native_docx import RENDERER_VERSION, rendered_natively, write_docx
+
+# Converter arguments, kept separate from file paths so they can also
+# be folded into export cache keys.
+PANDOC_DOCX_ARGS = [
+    "--from=markdown",
+    "--to=docx",
+    "-V",
+    "mainfont=Inter",
+    "-V",
+    "fontsize=9pt",
+    "-V",
+    "geometry:margin=0.75in",
+]
+SOFFICE_PDF_ARGS = ["--headless", "--convert-to", "pdf"]
+PANDOC_PDF_ARGS = [
+    "--from=markdown",
+    "--pdf-engine=xelatex",
+    "-V",
+    "geometry:margin=1in",
+]
+
+# Formats pandoc renders straight from the assembled markdown. PDF is
+# derived from the DOCX instead, so it is not listed here.
+PANDOC_FORMAT_ARGS = {
+    "docx": PANDOC_DOCX_ARGS,
+    "odt": ["--from=markdown", "--to=odt"],
+    "html": [
+        "--from=markdown",
+        "--to=html5",
+        "--standalone",
+        "-V",
+        "mainfont=Inter",
+    ],
+}
+EXPORT_FORMATS = (*PANDOC_FORMAT_ARGS, "pdf")
+DEFAULT_EXPORT_FORMATS = ("docx", "pdf")
+EXPORT_BACKEND_NAMES = ("auto", "pandoc", "native")
+DEFAULT_EXPORT_BACKEND = "auto"
+SOFFICE_TIMEOUT = 30
+
 
 def create_markdown_document(
     response_markdown, title, question, grant_name, foundation
@@ -25,16 +71,9 @@ def create_markdown_document(
     return doc
 
 
-def export_to_docx(
-    response_markdown, output_path, title, question, grant_name, foundation
-):
-    """Export response to DOCX using pandoc with Inter font."""
-    # Create full markdown document
-    full_markdown = create_markdown_document(
-        response_markdown, title, question, grant_name, foundation
-    )
-
-    # Write to temp file
+@contextmanager
+def markdown_source(full_markdown):
+    """Write an assembled document to a temporary .md file for pandoc."""
     with tempfile.NamedTemporaryFile(
         mode="w", suffix=".md", delete=False
     ) as tmp:
@@ -42,103 +81,350 @@ def export_to_docx(
         tmp_path = tmp.name
 
     try:
-        # Use pandoc to convert to DOCX with Inter font and smaller size for tables
-        result = subprocess.run(
-            [
-                "pandoc",
-                tmp_path,
-                "-o",
-                str(output_path),
-                "--from=markdown",
-                "--to=docx",
-                "-V",
-                "mainfont=Inter",
-                "-V",
-                "fontsize=9pt",
-                "-V",
-                "geometry:margin=0.75in",
-            ],
+        yield tmp_path
+    finally:
+        Path(tmp_path).unlink()
+
+
+def render_cache_key(cache, full_markdown, fmt, backend):
+    """Return the export cache key for a ``backend`` rendering."""
+    return cache.key(full_markdown, backend.args(fmt), backend.tools(fmt))
+
+
+def pdf_cache_key(cache, full_markdown, backend=None, converter="soffice"):
+    """Return the export cache key for the PDF of a markdown document."""
+    if converter == "xelatex":
+        return cache.key(full_markdown, PANDOC_PDF_ARGS, ["pandoc", "xelatex"])
+    if backend is None:
+        backend = PandocBackend()
+    return cache.key(
+        full_markdown,
+        [*backend.args("docx"), *SOFFICE_PDF_ARGS],
+        [*backend.tools("docx"), "soffice"],
+    )
+
+
+def pdf_converter(converters=None):
+    """Return the converter a PDF would be rendered with first."""
+    if converters is None or converters.available("soffice"):
+        return "soffice"
+    return "xelatex"
+
+
+def run_pandoc(source_path, output_path, args, label, timeout=None):
+    """Run pandoc once over an assembled markdown file."""
+    detach_file(output_path)
+    try:
+        subprocess.run(
+            ["pandoc", str(source_path), "-o", str(output_path), *args],
             check=True,
             capture_output=True,
             text=True,
+            timeout=timeout,
         )
     except subprocess.CalledProcessError as e:
-        raise Exception(f"Pandoc DOCX conversion failed: {e.stderr}")
-    finally:
-        Path(tmp_path).unlink()
+        raise Exception(f"{label} conversion failed: {e.stderr}")
+    except subprocess.TimeoutExpired:
+        raise Exception(f"{label} conversion timed out after {timeout}s")
 
 
-def export_to_pdf(
-    response_markdown, output_path, title, question, grant_name, foundation
+class PandocBackend:
+    """Render documents with pandoc."""
+
+    name = "pandoc"
+    formats = tuple(PANDOC_FORMAT_ARGS)
+
+    def __init__(self, server=None):
+        self.server = server
+
+    @property
+    def needs_source(self):
+        """Whether rendering reads the document from a markdown file."""
+        return self.server is None
+
+    def args(self, fmt):
+        return PANDOC_FORMAT_ARGS[fmt]
+
+    def tools(self, fmt):
+        return ["pandoc"]
+
+    def keeps(self, paths):
+        """Whether existing exports at ``paths`` are left as they are."""
+        return False
+
+    def render(
+        self, full_markdown, output_path, fmt, timeout=None, source_path=None
+    ):
+        """Render to ``fmt``, reading ``source_path`` if one is given."""
+        label = f"Pandoc {fmt.upper()}"
+        args = PANDOC_FORMAT_ARGS[fmt]
+        if self.server is not None and self.server.convert(
+            full_markdown, output_path, args, label, timeout
+        ):
+            return
+        if source_path is None:
+            with markdown_source(full_markdown) as source_path:
+                run_pandoc(source_path, output_path, args, label, timeout)
+        else:
+            run_pandoc(source_path, output_path, args, label, timeout)
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+
+class NativeBackend:
+    """Render DOCX in-process with ``native_docx``, without pandoc."""
+
+    name = "native"
+    formats = ("docx",)
+    needs_source = False
+
+    def __init__(self, server=None, keep_existing=False):
+        self.fallback = PandocBackend(server)
+        self.keep_existing = keep_existing
+
+    def args(self, fmt):
+        if fmt in self.formats:
+            return ["native", f"v{RENDERER_VERSION}"]
+        return self.fallback.args(fmt)
+
+    def tools(self, fmt):
+        return [] if fmt in self.formats else self.fallback.tools(fmt)
+
+    def keeps(self, paths):
+        return (
+            self.keep_existing
+            and "docx" in paths
+            and Path(paths["docx"]).exists()
+            and not rendered_natively(paths["docx"])
+        )
+
+    def render(
+        self, full_markdown, output_path, fmt, timeout=None, source_path=None
+    ):
+        if fmt not in self.formats:
+            self.fallback.render(
+                full_markdown, output_path, fmt, timeout, source_path
+            )
+            return
+        write_docx(full_markdown, output_path)
+
+    def close(self):
+        self.fallback.close()
+
+
+EXPORT_BACKENDS = {"pandoc": PandocBackend, "native": NativeBackend}
+
+
+def export_backend(name=DEFAULT_EXPORT_BACKEND, server=None):
+    """Return the export backend called ``name`` for one build."""
+    if name != "auto":
+        return EXPORT_BACKENDS[name](server=server)
+    if shutil.which("pandoc"):
+        print("📄 Export backend: pandoc")
+        return PandocBackend(server=server)
+    print(
+        "📄 Export backend: native (pandoc not found); DOCX exports from "
+        "other renderers are kept, --export-backend native replaces them"
+    )
+    return NativeBackend(server=server, keep_existing=True)
+
+
+def render_markdown(
+    full_markdown,
+    output_path,
+    fmt,
+    cache=None,
+    timeout=None,
+    source_path=None,
+    backend=None,
 ):
-    """Export response to PDF via DOCX conversion (better rendering than LaTeX)."""
-    # First create DOCX
-    docx_temp = output_path.with_suffix(".temp.docx")
-    export_to_docx(
-        response_markdown, docx_temp, title, question, grant_name, foundation
+    """Render an assembled document to one of ``PANDOC_FORMAT_ARGS``."""
+    if backend is None:
+        backend = PandocBackend()
+    if cache is not None:
+        key = render_cache_key(cache, full_markdown, fmt, backend)
+        if cache.fetch(key, output_path):
+            return
+
+    backend.render(full_markdown, output_path, fmt, timeout, source_path)
+
+    if cache is not None:
+        cache.store(key, output_path)
+
+
+def export_to_docx(
+    response_markdown,
+    output_path,
+    title,
+    question,
+    grant_name,
+    foundation,
+    cache=None,
+    timeout=None,
+    backend=None,
+):
+    """Export response to DOCX using pandoc with Inter font."""
+    full_markdown = create_markdown_document(
+        response_markdown, title, question, grant_name, foundation
+    )
+    render_markdown(
+        full_markdown,
+        output_path,
+        "docx",
+        cache=cache,
+        timeout=timeout,
+        backend=backend,
     )
 
-    try:
-        # Convert DOCX to PDF using soffice (LibreOffice)
-        result = subprocess.run(
+
+def export_markdown_to_pdf(
+    full_markdown, output_path, timeout=None, source_path=None
+):
+    """Render a markdown document straight to PDF with pandoc/xelatex."""
+    detach_file(output_path)
+    if source_path is None:
+        with markdown_source(full_markdown) as source_path:
+            run_pandoc(
+                source_path, output_path, PANDOC_PDF_ARGS, "PDF", timeout
+            )
+    else:
+        run_pandoc(source_path, output_path, PANDOC_PDF_ARGS, "PDF", timeout)
+
+
+def convert_docx_to_pdf(docx_path, output_path, timeout=SOFFICE_TIMEOUT):
+    """Convert an existing DOCX file to PDF with soffice (LibreOffice)."""
+    with tempfile.TemporaryDirectory() as outdir:
+        subprocess.run(
             [
                 "soffice",
-                "--headless",
-                "--convert-to",
-                "pdf",
+                *SOFFICE_PDF_ARGS,
                 "--outdir",
-                str(output_path.parent),
-                str(docx_temp),
+                outdir,
+                str(docx_path),
             ],
             check=True,
             capture_output=True,
             text=True,
-            timeout=30,
-        )
-        # soffice outputs with the temp filename, rename it
-        soffice_output = output_path.parent / f"{docx_temp.stem}.pdf"
-        if soffice_output.exists():
-            soffice_output.rename(output_path)
-    except (
-        subprocess.CalledProcessError,
-        FileNotFoundError,
-        subprocess.TimeoutExpired,
-    ) as e:
-        # Fallback to pandoc with better PDF settings
-        full_markdown = create_markdown_document(
-            response_markdown, title, question, grant_name, foundation
+            timeout=timeout,
         )
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".md", delete=False
-        ) as tmp:
-            tmp.write(full_markdown)
-            tmp_path = tmp.name
-
-        try:
-            subprocess.run(
-                [
-                    "pandoc",
-                    tmp_path,
-                    "-o",
-                    str(output_path),
-                    "--from=markdown",
-                    "--pdf-engine=xelatex",
-                    "-V",
-                    "geometry:margin=1in",
-                ],
-                check=True,
-                capture_output=True,
-                text=True,
+        converted = Path(outdir) / f"{Path(docx_path).stem}.pdf"
+        if not converted.exists():
+            raise subprocess.SubprocessError("soffice produced no PDF")
+        detach_file(output_path)
+        shutil.move(converted, output_path)
+
+
+def _attempt(converters, converter):
+    if converters is None:
+        return nullcontext()
+    return converters.attempt(converter)
+
+
+def render_pdf(
+    full_markdown,
+    output_path,
+    cache=None,
+    docx_path=None,
+    source_path=None,
+    backend=None,
+    converters=None,
+):
+    """Render an assembled document to PDF via DOCX, falling back to LaTeX."""
+    output_path = Path(output_path)
+    converter = pdf_converter(converters)
+    if cache is not None:
+        key = pdf_cache_key(cache, full_markdown, backend, converter)
+        if cache.fetch(key, output_path):
+            return
+
+    use_soffice = converter == "soffice"
+    docx_temp = None
+    try:
+        if docx_path is None and use_soffice:
+            docx_temp = output_path.with_suffix(".temp.docx")
+            render_markdown(
+                full_markdown,
+                docx_temp,
+                "docx",
+                source_path=source_path,
+                backend=backend,
             )
-        except subprocess.CalledProcessError as e:
-            raise Exception(f"PDF conversion failed: {e.stderr}")
-        finally:
-            Path(tmp_path).unlink()
+            docx_path = docx_temp
+
+        converted = False
+        if use_soffice:
+            try:
+                with (
+                    trace.span("soffice"),
+                    _attempt(converters, "soffice"),
+                ):
+                    convert_docx_to_pdf(docx_path, output_path)
+                converted = True
+            except (subprocess.SubprocessError, FileNotFoundError):
+                pass
+        if not converted:
+            # Fallback to pandoc with better PDF settings
+            if converters is not None and not converters.available("xelatex"):
+                raise Exception("no working PDF converter")
+            with trace.span("xelatex"), _attempt(converters, "xelatex"):
+                export_markdown_to_pdf(
+                    full_markdown, output_path, source_path=source_path
+                )
+            converter = "xelatex"
     finally:
         # Clean up temp DOCX
-        if docx_temp.exists():
+        if docx_temp is not None and docx_temp.exists():
             docx_temp.unlink()
 
+    if cache is not None:
+        cache.store(
+            pdf_cache_key(cache, full_markdown, backend, converter),
+            output_path,
+        )
+
+
+def export_to_pdf(
+    response_markdown,
+    output_path,
+    title,
+    question,
+    grant_name,
+    foundation,
+    cache=None,
+    docx_path=None,
+    backend=None,
+    converters=None,
+):
+    """Export response to PDF via DOCX conversion (better rendering than LaTeX)."""
+    full_markdown = create_markdown_document(
+        response_markdown, title, question, grant_name, foundation
+    )
+    render_pdf(
+        full_markdown,
+        output_path,
+        cache=cache,
+        docx_path=docx_path,
+        backend=backend,
+        converters=converters,
+    )
+
+
+def export_paths(
+    grant_id, response_key, output_dir, formats=DEFAULT_EXPORT_FORMATS
+):
+    """Return the export path for each format, creating their directory."""
+    unknown = sorted(set(formats) - set(EXPORT_FORMATS))
+    if unknown:
+        raise ValueError(f"Unknown export format(s): {', '.join(unknown)}")
+
+    grant_dir = Path(output_dir) / grant_id
+    grant_dir.mkdir(exist_ok=True, parents=True)
+
+    safe_key = response_key.replace("/", "_").replace(" ", "_")
+    return {fmt: grant_dir / f"{safe_key}.{fmt}" for fmt in formats}
+
 
 def export_response(
     grant_id,
@@ -148,47 +434,76 @@ def export_response(
     response_data,
     response_markdown,
     output_dir,
+    cache=None,
+    formats=DEFAULT_EXPORT_FORMATS,
+    backend=None,
+    converters=None,
 ):
-    """Export a single response to DOCX and PDF."""
+    """Export a single response to DOCX and PDF (or other ``formats``)."""
+    if backend is None:
+        backend = PandocBackend()
     output_dir = Path(output_dir)
-    output_dir.mkdir(exist_ok=True, parents=True)
-
-    # Create grant-specific subdirectory
-    grant_dir = output_dir / grant_id
-    grant_dir.mkdir(exist_ok=True)
-
-    # Generate filenames
-    safe_key = response_key.replace("/", "_").replace(" ", "_")
-    docx_path = grant_dir / f"{safe_key}.docx"
-    pdf_path = grant_dir / f"{safe_key}.pdf"
+    paths = export_paths(grant_id, response_key, output_dir, formats)
+    if backend.keeps(paths):
+        print(f"   ♻️  Kept {response_key} exports from another renderer")
+        formats = ()
+    full_markdown = create_markdown_document(
+        response_markdown,
+        response_data["title"],
+        response_data["question"],
+        grant_name,
+        foundation,
+    )
 
-    # Export to DOCX
-    try:
-        export_to_docx(
-            response_markdown,
-            docx_path,
-            response_data["title"],
-            response_data["question"],
-            grant_name,
-            foundation,
-        )
-    except Exception as e:
-        print(f"   ⚠️  Failed to export DOCX for {response_key}: {e}")
+    rendered = set()
+    if backend.needs_source:
+        source = markdown_source(full_markdown)
+    else:
+        source = nullcontext()
+    with source as source_path:
+        for fmt in formats:
+            if fmt == "pdf":
+                continue
+            try:
+                with trace.span(
+                    backend.name,
+                    grant=grant_id,
+                    section=response_key,
+                    format=fmt,
+                ):
+                    render_markdown(
+                        full_markdown,
+                        paths[fmt],
+                        fmt,
+                        cache=cache,
+                        source_path=source_path,
+                        backend=backend,
+                    )
+                rendered.add(fmt)
+            except Exception as e:
+                print(
+                    f"   ⚠️  Failed to export {fmt.upper()} for "
+                    f"{response_key}: {e}"
+                )
 
-    # Export to PDF
-    try:
-        export_to_pdf(
-            response_markdown,
-            pdf_path,
-            response_data["title"],
-            response_data["question"],
-            grant_name,
-            foundation,
-        )
-    except Exception as e:
-        print(f"   ⚠️  Failed to export PDF for {response_key}: {e}")
+        if "pdf" in formats:
+            try:
+                with trace.span("pdf", grant=grant_id, section=response_key):
+                    render_pdf(
+                        full_markdown,
+                        paths["pdf"],
+                        cache=cache,
+                        docx_path=(
+                            paths["docx"] if "docx" in rendered else None
+                        ),
+                        source_path=source_path,
+                        backend=backend,
+                        converters=converters,
+                    )
+            except Exception as e:
+                print(f"   ⚠️  Failed to export PDF for {response_key}: {e}")
 
     return {
-        "docx": str(docx_path.relative_to(output_dir.parent)),
-        "pdf": str(pdf_path.relative_to(output_dir.parent)),
+        fmt: str(path.relative_to(output_dir.parent))
+        for fmt, path in paths.items()
     }
@@ -0,0 +1,167 @@
+"""Keep each section's metrics across builds in a SQLite database."""
+
+import sqlite3
+import time
+from pathlib import Path
+
+from .manifest import hash_bytes
+
+DEFAULT_HISTORY_PATH = Path(".grants_cache/history.sqlite")
+TRENDS_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    built_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS builds_built_at ON builds (built_at);
+CREATE TABLE IF NOT EXISTS samples (
+    build_id INTEGER NOT NULL REFERENCES builds (id),
+    grant_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    section TEXT NOT NULL,
+    response_key TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    char_count INTEGER NOT NULL,
+    word_count INTEGER NOT NULL,
+    char_limit INTEGER,
+    word_limit INTEGER,
+    char_percentage REAL NOT NULL,
+    word_percentage REAL NOT NULL,
+    over_limit INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (grant_id, period, section, build_id)
+);
+CREATE INDEX IF NOT EXISTS samples_section ON samples (section);
+CREATE INDEX IF NOT EXISTS samples_period ON samples (period);
+CREATE INDEX IF NOT EXISTS samples_build ON samples (build_id);
+"""
+
+# What a section's sample must differ in to be recorded again
+_CHANGE_COLUMNS = ("content_hash", "char_limit", "word_limit")
+
+
+def _sections(grant_data):
+    """Yield ``(period, section, response_key, response)`` of a grant."""
+    for response_key, response in grant_data["responses"].items():
+        period = response.get("report_period", "")
+        if response.get("type") == "report":
+            section = response_key[len(f"report_{period}_") :]
+        elif response.get("type") == "application":
+            section = response_key[len("app_") :]
+        else:
+            section = response_key
+        yield period, section, response_key, response
+
+
+class BuildHistory:
+    """Per-section metrics of every build, in SQLite."""
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(_SCHEMA)
+        self.pending = []
+        self.recorded = 0
+
+    def add_grant(self, grant_id, grant_data):
+        """Queue the metrics of a processed grant for ``commit``."""
+        for period, section, response_key, response in _sections(grant_data):
+            self.pending.append(
+                {
+                    "grant_id": grant_id,
+                    "period": period,
+                    "section": section,
+                    "response_key": response_key,
+                    "content_hash": hash_bytes(
+                        response["plainText"].encode("utf-8")
+                    ),
+                    "char_count": response["charCount"],
+                    "word_count": response["wordCount"],
+                    "char_limit": response["charLimit"],
+                    "word_limit": response["wordLimit"],
+                    "char_percentage": response["charPercentage"],
+                    "word_percentage": response["wordPercentage"],
+                    "over_limit": response["overLimit"],
+                    "status": response["status"],
+                }
+            )
+
+    def commit(self, built_at=None):
+        """Record a build of the queued grants and return its id."""
+        if built_at is None:
+            built_at = int(time.time())
+        latest = {
+            row[:3]: row[3:6]
+            for row in self.connection.execute(
+                "SELECT grant_id, period, section, content_hash, "
+                "char_limit, word_limit, MAX(build_id) FROM samples "
+                "GROUP BY grant_id, period, section"
+            )
+        }
+        changed = [
+            sample
+            for sample in self.pending
+            if latest.get(
+                (sample["grant_id"], sample["period"], sample["section"])
+            )
+            != tuple(sample[column] for column in _CHANGE_COLUMNS)
+        ]
+        with self.connection:
+            build_id = self.connection.execute(
+                "INSERT INTO builds (built_at) VALUES (?)", (built_at,)
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO samples VALUES (:build_id, :grant_id, "
+                ":period, :section, :response_key, :content_hash, "
+                ":char_count, :word_count, :char_limit, :word_limit, "
+                ":char_percentage, :word_percentage, :over_limit, :status)",
+                [{**sample, "build_id": build_id} for sample in changed],
+            )
+        self.pending = []
+        self.recorded = len(changed)
+        return build_id
+
+    def query(self, grant_id=None, section=None, period=None, since=None):
+        """Return the matching samples, oldest first, as dicts."""
+        conditions = []
+        params = []
+        for column, value in (
+            ("grant_id", grant_id),
+            ("section", section),
+            ("period", period),
+        ):
+            if value is not None:
+                conditions.append(f"samples.{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("builds.built_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self.connection.execute(
+            "SELECT builds.built_at, samples.* FROM samples "
+            f"JOIN builds ON builds.id = samples.build_id {where} "
+            "ORDER BY samples.build_id, samples.grant_id, samples.period, "
+            "samples.section",
+            params,
+        )
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def trends(self, **filters):
+        """Return the matching samples as compact trend series."""
+        grants = {}
+        for sample in self.query(**filters):
+            series = grants.setdefault(sample["grant_id"], {}).setdefault(
+                sample["response_key"],
+                {"t": [], "w": [], "c": [], "s": []},
+            )
+            series["t"].append(sample["built_at"])
+            series["w"].append(sample["word_count"])
+            series["c"].append(sample["char_count"])
+            series["s"].append(sample["status"])
+        return {"version": TRENDS_VERSION, "grants": grants}
+
+    def close(self):
+        self.connection.close()
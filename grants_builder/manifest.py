@@ -0,0 +1,189 @@
+"""Persistent manifest of build inputs for incremental builds."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .repo_index import stat_path
+
+# Bump whenever the shape of processed results changes so that stale
+# cached results are never spliced into a new build.
+MANIFEST_VERSION = 1
+
+DEFAULT_MANIFEST_PATH = Path(".grants_cache/manifest.json")
+
+
+def hash_bytes(data):
+    """Return the SHA-256 hex digest of some bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_object(obj):
+    """Return a stable digest of a JSON-serializable object."""
+    encoded = json.dumps(obj, sort_keys=True, default=str).encode("utf-8")
+    return hash_bytes(encoded)
+
+
+def _exports_exist(response):
+    """Check that the export files a cached response points to survive."""
+    return all(
+        Path("docs", export_path).exists()
+        for export_path in response.get("exports", {}).values()
+    )
+
+
+class BuildManifest:
+    """Input hashes and cached results for grants and their sections."""
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = Path(path)
+        self.files = {}
+        self.grants = {}
+        self.sections = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path=DEFAULT_MANIFEST_PATH):
+        """Load a manifest from disk, starting fresh if it is unusable."""
+        manifest = cls(path)
+        try:
+            data = json.loads(manifest.path.read_text())
+        except (OSError, ValueError):
+            return manifest
+        if data.get("version") != MANIFEST_VERSION:
+            return manifest
+        manifest.files = data.get("files", {})
+        manifest.grants = data.get("grants", {})
+        manifest.sections = data.get("sections", {})
+        return manifest
+
+    def save(self):
+        """Atomically write the manifest to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "files": self.files,
+            "grants": self.grants,
+            "sections": self.sections,
+        }
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+
+    def file_digest(self, path, index=None):
+        """Return the content digest of a file, or None if it is missing."""
+        path = Path(path)
+        stat = stat_path(path) if index is None else index.stat(path)
+        if stat is None:
+            self.files.pop(str(path), None)
+            return None
+
+        if stat.is_dir:
+            if index is None:
+                names = sorted(
+                    f"{entry.name}/" if entry.is_dir() else entry.name
+                    for entry in os.scandir(path)
+                )
+            else:
+                names = sorted(
+                    f"{name}/" if index.is_dir(path / name) else name
+                    for name in index.listdir(path)
+                )
+            return hash_object(names)
+
+        key = str(path)
+        cached = self.files.get(key)
+        if (
+            cached
+            and cached["mtime_ns"] == stat.mtime_ns
+            and cached["size"] == stat.size
+        ):
+            return cached["sha256"]
+
+        digest = hash_bytes(path.read_bytes())
+        self.files[key] = {
+            "mtime_ns": stat.mtime_ns,
+            "size": stat.size,
+            "sha256": digest,
+        }
+        return digest
+
+    def section_fingerprint(self, response_file, *parts, index=None):
+        """Fingerprint a section from its response file and settings."""
+        return hash_object([self.file_digest(response_file, index), *parts])
+
+    def get_section(self, key, fingerprint):
+        """Return the cached result for a section if it is still valid."""
+        entry = self.sections.get(key)
+        if not entry or entry["fingerprint"] != fingerprint:
+            self.misses += 1
+            return None
+
+        result = entry["result"]
+        if not _exports_exist(result):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put_section(self, key, fingerprint, result):
+        """Record the result of processing a section."""
+        self.sections[key] = {"fingerprint": fingerprint, "result": result}
+
+    def get_grant(self, grant_id, grant_config, index=None):
+        """Return the cached result for a grant if no input changed."""
+        entry = self.grants.get(grant_id)
+        if not entry or entry["config"] != hash_object(grant_config):
+            return None
+        for path, digest in entry["inputs"].items():
+            if self.file_digest(path, index) != digest:
+                return None
+        result = entry["result"]
+        if not all(map(_exports_exist, result["responses"].values())):
+            return None
+        self.hits += len(result["responses"])
+        return result
+
+    def put_grant(self, grant_id, grant_config, inputs, result, index=None):
+        """Record a processed grant along with the inputs it was read from."""
+        self.grants[grant_id] = {
+            "config": hash_object(grant_config),
+            "inputs": {
+                str(path): self.file_digest(path, index) for path in inputs
+            },
+            "result": result,
+        }
+
+    def fork(self, prefix):
+        """Return a copy holding only the sections under ``prefix``."""
+        fork = BuildManifest(self.path)
+        fork.files = dict(self.files)
+        fork.sections = {
+            key: entry
+            for key, entry in self.sections.items()
+            if key.startswith(prefix)
+        }
+        return fork
+
+    def merge(self, fork):
+        """Fold the files, sections and counters of a fork back in."""
+        self.files.update(fork.files)
+        self.sections.update(fork.sections)
+        self.hits += fork.hits
+        self.misses += fork.misses
+
+    def prune(self, grant_ids):
+        """Forget grants (and their sections) no longer in the registry."""
+        grant_ids = set(grant_ids)
+        self.grants = {
+            grant_id: entry
+            for grant_id, entry in self.grants.items()
+            if grant_id in grant_ids
+        }
+        self.sections = {
+            key: entry
+            for key, entry in self.sections.items()
+            if key.split("/", 1)[0] in grant_ids
+        }
@@ -0,0 +1,534 @@
+"""Render markdown documents to DOCX in-process, without pandoc."""
+
+import io
+import re
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+from .export_cache import detach_file
+
+# Bump when the rendered output changes, so cached exports are redone
+RENDERER_VERSION = 2
+# Named in every rendered file's docProps/app.xml, which is how files
+# this renderer wrote are told apart from pandoc's
+APPLICATION = "grants_builder native_docx"
+
+FONT = "Inter"
+CODE_FONT = "Courier New"
+FONT_SIZE = 18  # half-points, i.e. 9pt
+MARGIN = 1080  # twips, i.e. 0.75in
+PAGE_WIDTH = 12240  # US letter
+PAGE_HEIGHT = 15840
+INDENT = 360
+
+# Fixed timestamps keep the archive byte-identical for the same input
+_ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+_HEADER = re.compile(r"(#{1,6})\s+(.*?)\s*#*\s*$")
+_RULE = re.compile(r"\s{0,3}([-*_])(?:\s*\1){2,}\s*$")
+_FENCE = re.compile(r"\s*(```|~~~)")
+_LIST_ITEM = re.compile(r"( *)([-*+]|\d+[.)])\s+(.*)")
+_QUOTE = re.compile(r"\s{0,3}>\s?(.*)")
+_TABLE_RULE = re.compile(r"\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+_INLINE = re.compile(
+    r"(?P<code>`+)(?P<code_text>.+?)(?P=code)"
+    r"|\[(?P<link_text>[^\]]+)\]\((?P<url>[^)\s]+)[^)]*\)"
+    r"|\*\*(?P<bold>.+?)\*\*(?!\*)"
+    r"|__(?P<strong>.+?)__(?!_)"
+    r"|\*(?P<em>[^*\s](?:.*?[^*\s])?)\*"
+    r"|(?<!\w)_(?P<under>[^_\s](?:.*?[^_\s])?)_(?!\w)"
+    r"|\\(?P<escaped>[\\`*_{}\[\]()#+\-.!|>])"
+)
+# Characters XML 1.0 does not allow at all
+_INVALID_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+# Block parsing
+
+
+def parse_blocks(markdown):
+    """Split markdown into ``(kind, ...)`` block tuples."""
+    lines = markdown.expandtabs(4).splitlines()
+    blocks = []
+    paragraph = []
+    i = 0
+
+    def flush():
+        if paragraph:
+            blocks.append(("paragraph", " ".join(paragraph)))
+            paragraph.clear()
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        fence = _FENCE.match(line)
+        if fence:
+            flush()
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(
+                fence.group(1)
+            ):
+                code.append(lines[i])
+                i += 1
+            blocks.append(("code", code))
+            i += 1
+            continue
+
+        if not stripped:
+            flush()
+            i += 1
+            continue
+
+        header = _HEADER.match(stripped) if line.startswith("#") else None
+        if header:
+            flush()
+            blocks.append(("heading", len(header.group(1)), header.group(2)))
+            i += 1
+            continue
+
+        if _RULE.match(line):
+            flush()
+            blocks.append(("rule",))
+            i += 1
+            continue
+
+        if (
+            "|" in line
+            and i + 1 < len(lines)
+            and "-" in lines[i + 1]
+            and _TABLE_RULE.match(lines[i + 1])
+        ):
+            flush()
+            rows = [_table_cells(line)]
+            i += 2
+            while i < len(lines) and "|" in lines[i] and lines[i].strip():
+                rows.append(_table_cells(lines[i]))
+                i += 1
+            blocks.append(("table", rows))
+            continue
+
+        if _LIST_ITEM.match(line):
+            flush()
+            items = []
+            while i < len(lines):
+                item = _LIST_ITEM.match(lines[i])
+                if item:
+                    indent, marker, text = item.groups()
+                    items.append([len(indent) // 2, marker[0].isdigit(), text])
+                elif lines[i].startswith(" ") and lines[i].strip():
+                    # A continuation of the previous item
+                    items[-1][2] += " " + lines[i].strip()
+                else:
+                    break
+                i += 1
+            blocks.append(("list", [tuple(item) for item in items]))
+            continue
+
+        quote = _QUOTE.match(line)
+        if quote:
+            flush()
+            quoted = []
+            while i < len(lines):
+                quote = _QUOTE.match(lines[i])
+                if not quote:
+                    break
+                quoted.append(quote.group(1).strip())
+                i += 1
+            blocks.append(("quote", " ".join(filter(None, quoted))))
+            continue
+
+        paragraph.append(stripped)
+        i += 1
+
+    flush()
+    return blocks
+
+
+def _table_cells(line):
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip() for cell in re.split(r"(?<!\\)\|", line)]
+
+
+# Inline parsing
+
+
+def parse_inline(text, bold=False, italic=False):
+    """Split inline markdown into ``(text, style)`` runs."""
+    runs = []
+    style = {"bold": bold, "italic": italic}
+    position = 0
+    for match in _INLINE.finditer(text):
+        if match.start() > position:
+            runs.append((text[position : match.start()], style))
+        groups = match.groupdict()
+        if groups["code"]:
+            runs.append((groups["code_text"].strip(), {**style, "code": True}))
+        elif groups["url"]:
+            for run_text, run_style in parse_inline(
+                groups["link_text"], bold, italic
+            ):
+                runs.append((run_text, {**run_style, "link": groups["url"]}))
+        elif groups["bold"] or groups["strong"]:
+            runs += parse_inline(
+                groups["bold"] or groups["strong"], True, italic
+            )
+        elif groups["em"] or groups["under"]:
+            runs += parse_inline(groups["em"] or groups["under"], bold, True)
+        else:
+            runs.append((groups["escaped"], style))
+        position = match.end()
+    if position < len(text):
+        runs.append((text[position:], style))
+    return runs
+
+
+# WordprocessingML
+
+
+class _Document:
+    """Accumulate ``word/document.xml`` body parts and their relations."""
+
+    def __init__(self):
+        self.body = []
+        self.links = {}
+        # One numbering instance per list, so numbered lists restart
+        self.lists = []
+
+    def link_id(self, url):
+        if url not in self.links:
+            self.links[url] = f"rLink{len(self.links) + 1}"
+        return self.links[url]
+
+    def runs(self, text, bold=False):
+        parts = []
+        for run_text, style in parse_inline(text, bold=bold):
+            # Word expects run properties in schema order
+            properties = ""
+            if style.get("code"):
+                properties += '<w:rStyle w:val="VerbatimChar"/>'
+            elif style.get("link"):
+                properties += '<w:rStyle w:val="Hyperlink"/>'
+            if style.get("bold"):
+                properties += "<w:b/>"
+            if style.get("italic"):
+                properties += "<w:i/>"
+            run = (
+                f"<w:r><w:rPr>{properties}</w:rPr>"
+                f'<w:t xml:space="preserve">{_xml_text(run_text)}</w:t></w:r>'
+            )
+            if style.get("link"):
+                run = (
+                    f'<w:hyperlink r:id="{self.link_id(style["link"])}">'
+                    f"{run}</w:hyperlink>"
+                )
+            parts.append(run)
+        return "".join(parts)
+
+    def paragraph(self, content, style=None, properties=""):
+        if style:
+            properties = f'<w:pStyle w:val="{style}"/>' + properties
+        self.body.append(f"<w:p><w:pPr>{properties}</w:pPr>{content}</w:p>")
+
+    def add(self, block):
+        kind = block[0]
+        if kind == "heading":
+            self.paragraph(self.runs(block[2]), f"Heading{block[1]}")
+        elif kind == "paragraph":
+            self.paragraph(self.runs(block[1]))
+        elif kind == "quote":
+            self.paragraph(self.runs(block[1]), "BlockText")
+        elif kind == "code":
+            for line in block[1] or [""]:
+                self.paragraph(
+                    '<w:r><w:t xml:space="preserve">'
+                    f"{_xml_text(line)}</w:t></w:r>",
+                    "SourceCode",
+                )
+        elif kind == "rule":
+            self.paragraph(
+                "",
+                properties=(
+                    '<w:pBdr><w:bottom w:val="single" w:sz="6" '
+                    'w:space="1" w:color="auto"/></w:pBdr>'
+                ),
+            )
+        elif kind == "table":
+            self.table(block[1])
+        elif kind == "list":
+            self.list(block[1])
+
+    def list(self, items):
+        bullet = len(self.lists) * 2 + 1
+        self.lists.append(bullet)
+        for depth, ordered, text in items:
+            num_id = bullet + 1 if ordered else bullet
+            self.paragraph(
+                self.runs(text),
+                "ListParagraph",
+                f'<w:numPr><w:ilvl w:val="{min(depth, 8)}"/>'
+                f'<w:numId w:val="{num_id}"/></w:numPr>',
+            )
+
+    def table(self, rows):
+        columns = max(len(row) for row in rows)
+        width = (PAGE_WIDTH - 2 * MARGIN) // columns
+        grid = "".join(f'<w:gridCol w:w="{width}"/>' for _ in range(columns))
+        xml_rows = []
+        for index, row in enumerate(rows):
+            cells = []
+            for cell in row + [""] * (columns - len(row)):
+                cells.append(
+                    f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/>'
+                    f'</w:tcPr><w:p><w:pPr><w:pStyle w:val="Compact"/>'
+                    f"</w:pPr>{self.runs(cell, bold=index == 0)}</w:p></w:tc>"
+                )
+            header = "<w:trPr><w:tblHeader/></w:trPr>" if index == 0 else ""
+            xml_rows.append(f"<w:tr>{header}{''.join(cells)}</w:tr>")
+        self.body.append(
+            '<w:tbl><w:tblPr><w:tblStyle w:val="Table"/>'
+            '<w:tblW w:w="0" w:type="auto"/></w:tblPr>'
+            f"<w:tblGrid>{grid}</w:tblGrid>{''.join(xml_rows)}</w:tbl>"
+        )
+        # Word needs a paragraph between adjacent tables
+        self.paragraph("")
+
+    def xml(self):
+        section = (
+            f'<w:sectPr><w:pgSz w:w="{PAGE_WIDTH}" w:h="{PAGE_HEIGHT}"/>'
+            f'<w:pgMar w:top="{MARGIN}" w:right="{MARGIN}" '
+            f'w:bottom="{MARGIN}" w:left="{MARGIN}" w:header="720" '
+            f'w:footer="720" w:gutter="0"/></w:sectPr>'
+        )
+        return (
+            _XML_DECLARATION + f"<w:document {_NAMESPACES}><w:body>"
+            f"{''.join(self.body)}{section}</w:body></w:document>"
+        )
+
+    def relationships(self):
+        links = "".join(
+            f"<Relationship Id={quoteattr(rel_id)} "
+            f'Type="{_REL}/hyperlink" Target={quoteattr(url)} '
+            'TargetMode="External"/>'
+            for url, rel_id in self.links.items()
+        )
+        return (
+            _XML_DECLARATION + f'<Relationships xmlns="{_PACKAGE_REL}">'
+            f'<Relationship Id="rStyles" Type="{_REL}/styles" '
+            'Target="styles.xml"/>'
+            f'<Relationship Id="rNumbering" Type="{_REL}/numbering" '
+            'Target="numbering.xml"/>'
+            f"{links}</Relationships>"
+        )
+
+    def numbering(self):
+        abstract = _abstract_numbering(0, ordered=False) + (
+            _abstract_numbering(1, ordered=True)
+        )
+        instances = []
+        for bullet in self.lists:
+            instances.append(
+                f'<w:num w:numId="{bullet}"><w:abstractNumId w:val="0"/>'
+                "</w:num>"
+            )
+            instances.append(
+                f'<w:num w:numId="{bullet + 1}"><w:abstractNumId w:val="1"/>'
+                + "".join(
+                    f'<w:lvlOverride w:ilvl="{level}">'
+                    '<w:startOverride w:val="1"/></w:lvlOverride>'
+                    for level in range(9)
+                )
+                + "</w:num>"
+            )
+        return (
+            _XML_DECLARATION + f"<w:numbering {_NAMESPACES}>"
+            f"{abstract}{''.join(instances)}</w:numbering>"
+        )
+
+
+def _xml_text(text):
+    return escape(_INVALID_XML.sub("", text))
+
+
+def _abstract_numbering(abstract_id, ordered):
+    levels = []
+    for level in range(9):
+        if ordered:
+            fmt, text = ("decimal", f"%{level + 1}.")
+        else:
+            fmt, text = ("bullet", "•◦▪"[level % 3])
+        levels.append(
+            f'<w:lvl w:ilvl="{level}"><w:start w:val="1"/>'
+            f'<w:numFmt w:val="{fmt}"/><w:lvlText w:val="{text}"/>'
+            '<w:lvlJc w:val="left"/><w:pPr>'
+            f'<w:ind w:left="{INDENT * (level + 1) + INDENT}" '
+            f'w:hanging="{INDENT}"/></w:pPr></w:lvl>'
+        )
+    return (
+        f'<w:abstractNum w:abstractNumId="{abstract_id}">'
+        f'<w:multiLevelType w:val="multilevel"/>{"".join(levels)}'
+        "</w:abstractNum>"
+    )
+
+
+def _style(style_id, name, kind="paragraph", properties="", run=""):
+    return (
+        f'<w:style w:type="{kind}" w:styleId="{style_id}">'
+        f'<w:name w:val="{name}"/><w:basedOn w:val="Normal"/>'
+        f"<w:qFormat/><w:pPr>{properties}</w:pPr><w:rPr>{run}</w:rPr>"
+        "</w:style>"
+    )
+
+
+def _styles():
+    fonts = (
+        f'<w:rFonts w:ascii="{FONT}" w:hAnsi="{FONT}" w:eastAsia="{FONT}" '
+        f'w:cs="{FONT}"/>'
+    )
+    code_fonts = f'<w:rFonts w:ascii="{CODE_FONT}" w:hAnsi="{CODE_FONT}"/>'
+    headings = "".join(
+        _style(
+            f"Heading{level}",
+            f"heading {level}",
+            properties=(
+                '<w:keepNext/><w:spacing w:before="240" w:after="80"/>'
+                f'<w:outlineLvl w:val="{level - 1}"/>'
+            ),
+            run=f'<w:b/><w:sz w:val="{size}"/><w:szCs w:val="{size}"/>',
+        )
+        for level, size in zip(range(1, 7), (32, 26, 22, 20, 18, 18))
+    )
+    return (
+        _XML_DECLARATION + f"<w:styles {_NAMESPACES}>"
+        f"<w:docDefaults><w:rPrDefault><w:rPr>{fonts}"
+        f'<w:sz w:val="{FONT_SIZE}"/><w:szCs w:val="{FONT_SIZE}"/>'
+        '<w:lang w:val="en-US"/></w:rPr></w:rPrDefault><w:pPrDefault>'
+        '<w:pPr><w:spacing w:after="120" w:line="264" w:lineRule="auto"/>'
+        "</w:pPr></w:pPrDefault></w:docDefaults>"
+        '<w:style w:type="paragraph" w:default="1" w:styleId="Normal">'
+        '<w:name w:val="Normal"/><w:qFormat/></w:style>'
+        f"{headings}"
+        + _style("Compact", "Compact", properties='<w:spacing w:after="0"/>')
+        + _style(
+            "ListParagraph",
+            "List Paragraph",
+            properties='<w:spacing w:after="40"/>',
+        )
+        + _style(
+            "BlockText",
+            "Block Text",
+            properties=f'<w:ind w:left="{INDENT * 2}" w:right="{INDENT}"/>',
+            run="<w:i/>",
+        )
+        + _style(
+            "SourceCode",
+            "Source Code",
+            properties='<w:spacing w:after="0" w:line="240"/>',
+            run=code_fonts,
+        )
+        + '<w:style w:type="character" w:styleId="VerbatimChar">'
+        f'<w:name w:val="Verbatim Char"/><w:rPr>{code_fonts}</w:rPr>'
+        "</w:style>"
+        '<w:style w:type="character" w:styleId="Hyperlink">'
+        '<w:name w:val="Hyperlink"/><w:rPr><w:color w:val="2B5797"/>'
+        '<w:u w:val="single"/></w:rPr></w:style>'
+        '<w:style w:type="table" w:styleId="Table"><w:name w:val="Table"/>'
+        "<w:tblPr><w:tblBorders>"
+        + "".join(
+            f'<w:{side} w:val="single" w:sz="4" w:space="0" w:color="999999"/>'
+            for side in (
+                "top",
+                "left",
+                "bottom",
+                "right",
+                "insideH",
+                "insideV",
+            )
+        )
+        + '</w:tblBorders><w:tblCellMar><w:left w:w="80" w:type="dxa"/>'
+        '<w:right w:w="80" w:type="dxa"/></w:tblCellMar></w:tblPr>'
+        "</w:style></w:styles>"
+    )
+
+
+_XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PACKAGE_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+_NAMESPACES = f'xmlns:w="{_MAIN}" xmlns:r="{_REL}"'
+_CONTENT_TYPES = (
+    _XML_DECLARATION
+    + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'content-types">'
+    '<Default Extension="rels" ContentType="application/'
+    'vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '<Override PartName="/word/numbering.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.wordprocessingml.numbering+xml"/>'
+    '<Override PartName="/docProps/app.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.extended-properties+xml"/>'
+    "</Types>"
+)
+_PACKAGE_RELATIONSHIPS = (
+    _XML_DECLARATION + f'<Relationships xmlns="{_PACKAGE_REL}">'
+    f'<Relationship Id="rDocument" Type="{_REL}/officeDocument" '
+    'Target="word/document.xml"/>'
+    f'<Relationship Id="rApp" Type="{_REL}/extended-properties" '
+    'Target="docProps/app.xml"/></Relationships>'
+)
+_APP_PROPERTIES = (
+    _XML_DECLARATION + '<Properties xmlns="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/extended-properties">'
+    f"<Application>{APPLICATION}</Application></Properties>"
+)
+
+
+def render_docx(markdown):
+    """Return the bytes of a DOCX rendering of ``markdown``."""
+    document = _Document()
+    for block in parse_blocks(markdown):
+        document.add(block)
+
+    parts = {
+        "[Content_Types].xml": _CONTENT_TYPES,
+        "_rels/.rels": _PACKAGE_RELATIONSHIPS,
+        "word/document.xml": document.xml(),
+        "word/styles.xml": _styles(),
+        "word/numbering.xml": document.numbering(),
+        "word/_rels/document.xml.rels": document.relationships(),
+        "docProps/app.xml": _APP_PROPERTIES,
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in parts.items():
+            info = zipfile.ZipInfo(name, _ZIP_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, xml.encode())
+    return buffer.getvalue()
+
+
+def write_docx(markdown, output_path):
+    """Render ``markdown`` to a DOCX file at ``output_path``."""
+    data = render_docx(markdown)
+    detach_file(output_path)
+    Path(output_path).write_bytes(data)
+
+
+def rendered_natively(path):
+    """Whether the DOCX file at ``path`` was written by ``render_docx``."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            properties = archive.read("docProps/app.xml").decode()
+    except (OSError, KeyError, UnicodeDecodeError, zipfile.BadZipFile):
+        return False
+    return f"<Application>{APPLICATION}</Application>" in properties
@@ -0,0 +1,440 @@
+"""Write processed grant data for the viewer."""
+
+import json
+import os
+import zlib
+from pathlib import Path
+
+from . import trace
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+INDEX_VERSION = 1
+# grants_data.json schemas: 1 is what the viewer reads today, 2 stores
+# every response once (see ``normalize_grant``).
+SCHEMAS = (1, 2)
+DEFAULT_SCHEMA = 1
+SHARD_DIR = "grants"
+SIDECAR_SUFFIXES = (".gz", ".br")
+
+# Response fields only needed once a grant is opened; sharded output
+# keeps them out of the index.
+SHARD_FIELDS = ("plainText",)
+
+
+class JsonWriter:
+    """Serialize JSON artifacts and keep track of their sizes."""
+
+    def __init__(self, production=False, compact=False):
+        self.production = production
+        self.compact = production or compact
+        self.sizes = {"indented": 0, "minified": 0, "gz": 0, "br": 0}
+
+    def dumps(self, obj):
+        """Return the serialized bytes for ``obj``."""
+        if not self.compact:
+            return json.dumps(obj, indent=2).encode("utf-8")
+        if orjson is not None:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            obj, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+
+    def write(self, path, obj):
+        """Write ``obj`` to ``path`` and return every file written."""
+        output = AtomicOutput(self, path)
+        if self.production:
+            self.sizes["indented"] += len(JsonWriter().dumps(obj))
+        try:
+            with trace.span("json", path=str(path)):
+                output.write(self.dumps(obj))
+        except BaseException:
+            output.discard()
+            raise
+        return output.commit()
+
+    def stream(self, path, header=None, nest=None):
+        """Return a ``JsonObjectStream`` writing to ``path``."""
+        return JsonObjectStream(self, path, header=header, nest=nest)
+
+    def key(self, key, first, depth=1):
+        """Return what precedes a member's value in an object."""
+        opener = "{" if first else ","
+        if not self.compact:
+            indent = "  " * depth
+            return f"{opener}\n{indent}{json.dumps(key)}: ".encode("utf-8")
+        return opener.encode() + self.dumps(key) + b":"
+
+    def member(self, key, value, first, depth=1):
+        """Return ``key: value`` as it appears in an object."""
+        if not self.compact:
+            # JSON strings never contain a raw newline, so indenting every
+            # line of the value nests it correctly.
+            indented = json.dumps(value, indent=2).replace(
+                "\n", "\n" + "  " * depth
+            )
+            return self.key(key, first, depth) + indented.encode("utf-8")
+        return self.key(key, first, depth) + self.dumps(value)
+
+    def end(self, empty, depth=1):
+        """Return the bytes closing an object written with ``member``."""
+        if empty:
+            return b"{}"
+        if not self.compact:
+            return ("\n" + "  " * (depth - 1) + "}").encode()
+        return b"}"
+
+    def summary(self):
+        """Describe the size savings of a production build."""
+        sizes = self.sizes
+        line = (
+            f"📦 Output size: {_kilobytes(sizes['indented'])} indented → "
+            f"{_kilobytes(sizes['minified'])} minified, "
+            f"{_kilobytes(sizes['gz'])} gzip"
+        )
+        if brotli is None:
+            return line + " (install brotli for .br sidecars)"
+        return line + f", {_kilobytes(sizes['br'])} brotli"
+
+
+def _kilobytes(size):
+    return f"{size / 1024:.1f} KB"
+
+
+class AtomicOutput:
+    """A file (plus its production sidecars) written in pieces."""
+
+    def __init__(self, writer, path):
+        self.writer = writer
+        self.path = Path(path)
+        self.compressors = {}
+        if writer.production:
+            # The gzip header zlib writes has mtime 0, which keeps the
+            # sidecar byte-identical between builds.
+            self.compressors["gz"] = zlib.compressobj(9, zlib.DEFLATED, 31)
+            if brotli is not None:
+                self.compressors["br"] = brotli.Compressor()
+        self.targets = {None: self.path}
+        for suffix in self.compressors:
+            self.targets[suffix] = self.path.with_name(
+                f"{self.path.name}.{suffix}"
+            )
+        self.files = {
+            suffix: open(self._temp(target), "wb")
+            for suffix, target in self.targets.items()
+        }
+
+    @staticmethod
+    def _temp(path):
+        return path.with_name(path.name + ".tmp")
+
+    def write(self, data):
+        """Append ``data`` to the file and feed it to the compressors."""
+        self.files[None].write(data)
+        if self.writer.production:
+            self.writer.sizes["minified"] += len(data)
+        for suffix, compressor in self.compressors.items():
+            if suffix == "gz":
+                compressed = compressor.compress(data)
+            else:
+                compressed = compressor.process(data)
+            self.files[suffix].write(compressed)
+            self.writer.sizes[suffix] += len(compressed)
+
+    def commit(self):
+        """Move every file into place and return their paths."""
+        with trace.span("compress", path=str(self.path)):
+            for suffix, compressor in self.compressors.items():
+                if suffix == "gz":
+                    tail = compressor.flush()
+                else:
+                    tail = compressor.finish()
+                self.files[suffix].write(tail)
+                self.writer.sizes[suffix] += len(tail)
+        for file in self.files.values():
+            file.close()
+        for target in self.targets.values():
+            os.replace(self._temp(target), target)
+        if not self.writer.production:
+            # Sidecars from an earlier production build would be stale
+            for suffix in SIDECAR_SUFFIXES:
+                self.path.with_name(self.path.name + suffix).unlink(
+                    missing_ok=True
+                )
+        return list(self.targets.values())
+
+    def discard(self):
+        """Remove the temporary files, leaving the targets untouched."""
+        for suffix, file in self.files.items():
+            file.close()
+            self._temp(self.targets[suffix]).unlink(missing_ok=True)
+
+
+class JsonObjectStream:
+    """Write a JSON object to a file one member at a time."""
+
+    def __init__(self, writer, path, header=None, nest=None):
+        self.writer = writer
+        self.output = AtomicOutput(writer, path)
+        # The default writer, for the summary's indented size
+        self.indented = JsonWriter() if writer.production else None
+        self.count = 0
+        self.closed = False
+        self.depth = 1
+        if nest is not None:
+            header = header or {}
+            for index, (key, value) in enumerate(header.items()):
+                self._write("member", key, value, first=not index)
+            self._write("key", nest, first=not header)
+            self.depth = 2
+
+    def _write(self, method, *args, **kwargs):
+        """Append what ``writer.<method>`` returns for these arguments."""
+        self.output.write(getattr(self.writer, method)(*args, **kwargs))
+        if self.indented is not None:
+            indented = getattr(self.indented, method)(*args, **kwargs)
+            self.writer.sizes["indented"] += len(indented)
+
+    def add(self, key, value):
+        """Serialize one member and append it to the file."""
+        with trace.span("json", key=key):
+            self._write(
+                "member", key, value, first=not self.count, depth=self.depth
+            )
+        self.count += 1
+
+    def encode(self, key, value):
+        """Serialize one member for ``add_encoded``."""
+        with trace.span("json", key=key):
+            return self.writer.member(
+                key, value, first=True, depth=self.depth
+            )[1:]
+
+    def add_encoded(self, encoded):
+        """Append a member serialized by ``encode``."""
+        self.output.write((b"," if self.count else b"{") + encoded)
+        self.count += 1
+
+    def close(self):
+        """Finish the object, move it into place and return its files."""
+        self._write("end", empty=not self.count, depth=self.depth)
+        if self.depth == 2:
+            self._write("end", empty=False)
+        self.closed = True
+        return self.output.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and not self.closed:
+            self.output.discard()
+        return False
+
+
+def normalize_grant(grant_data):
+    """Return a grant in the v2 schema, storing each response once."""
+    if "application" not in grant_data and "reports" not in grant_data:
+        return grant_data
+    references = {}
+    if "application" in grant_data:
+        for key in grant_data["application"]["responses"]:
+            references[f"app_{key}"] = {"type": "application", "key": key}
+    for report in grant_data.get("reports", []):
+        period = report["period"]
+        for key in report["responses"]:
+            references[f"report_{period}_{key}"] = {
+                "type": "report",
+                "report_period": period,
+                "key": key,
+            }
+    return {**grant_data, "responses": references}
+
+
+class GrantsDataStream:
+    """Write ``grants_data.json`` one grant at a time in either schema."""
+
+    def __init__(self, docs_path, writer=None, schema=DEFAULT_SCHEMA):
+        if schema not in SCHEMAS:
+            raise ValueError(f"Unknown grants_data schema: {schema}")
+        writer = writer or JsonWriter()
+        path = Path(docs_path) / "grants_data.json"
+        self.schema = schema
+        if schema == 1:
+            self.stream = writer.stream(path)
+        else:
+            self.stream = writer.stream(
+                path, header={"version": schema}, nest="grants"
+            )
+
+    def add(self, grant_id, grant_data):
+        if self.schema == 2:
+            grant_data = normalize_grant(grant_data)
+        self.stream.add(grant_id, grant_data)
+
+    def encode(self, grant_id, grant_data):
+        """Serialize a grant for ``add_encoded`` (see ``JsonObjectStream``)."""
+        if self.schema == 2:
+            grant_data = normalize_grant(grant_data)
+        return self.stream.encode(grant_id, grant_data)
+
+    def add_encoded(self, encoded):
+        self.stream.add_encoded(encoded)
+
+    def close(self):
+        return self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self.stream.__exit__(exc_type, exc, tb)
+
+
+def write_grants_data(
+    grants_data, docs_path, writer=None, schema=DEFAULT_SCHEMA
+):
+    """Write every grant to a single ``grants_data.json``."""
+    with GrantsDataStream(docs_path, writer, schema) as stream:
+        for grant_id, grant_data in grants_data.items():
+            stream.add(grant_id, grant_data)
+        return stream.close()
+
+
+def _split_responses(responses):
+    """Split responses into index summaries and the shard-only fields."""
+    summaries = {}
+    heavy = {}
+    for key, response in responses.items():
+        summaries[key] = {
+            field: value
+            for field, value in response.items()
+            if field not in SHARD_FIELDS
+        }
+        heavy[key] = {
+            field: response[field]
+            for field in SHARD_FIELDS
+            if field in response
+        }
+    return summaries, heavy
+
+
+def shard_grant(grant_id, grant_data):
+    """Split one grant into its index entry and shards."""
+    grant_shard = f"{SHARD_DIR}/{grant_id}.json"
+    shards = {}
+
+    entry = {
+        key: value
+        for key, value in grant_data.items()
+        if key not in ("responses", "application", "reports")
+    }
+    entry["shard"] = grant_shard
+
+    summaries, heavy = _split_responses(grant_data["responses"])
+    entry["responses"] = summaries
+    shards[grant_shard] = {
+        "id": grant_id,
+        "responses": {
+            key: fields
+            for key, fields in heavy.items()
+            if summaries[key].get("type") != "report"
+        },
+    }
+
+    if "application" in grant_data:
+        application = grant_data["application"]
+        entry["application"] = {
+            "metadata": application["metadata"],
+            "responseKeys": list(application["responses"]),
+        }
+
+    if "reports" in grant_data:
+        entry["reports"] = []
+        for report in grant_data["reports"]:
+            period = report["period"]
+            report_shard = f"{SHARD_DIR}/{grant_id}/reports/{period}.json"
+            _, report_heavy = _split_responses(report["responses"])
+            entry["reports"].append(
+                {
+                    "period": period,
+                    "metadata": report["metadata"],
+                    "shard": report_shard,
+                    "responseKeys": list(report["responses"]),
+                }
+            )
+            shards[report_shard] = {
+                "id": grant_id,
+                "period": period,
+                "responses": report_heavy,
+            }
+
+    return entry, shards
+
+
+class ShardedStream:
+    """Write sharded output one grant at a time."""
+
+    def __init__(self, docs_path, writer=None, grant_ids=None):
+        self.docs_path = Path(docs_path)
+        self.writer = writer or JsonWriter()
+        self.grant_ids = grant_ids
+        self.index = {"version": INDEX_VERSION, "grants": {}}
+        self.written = []
+
+    def add(self, grant_id, grant_data):
+        """Index a grant and, unless it is filtered out, write its shards."""
+        entry, shards = shard_grant(grant_id, grant_data)
+        self.index["grants"][grant_id] = entry
+        if self.grant_ids is not None and grant_id not in self.grant_ids:
+            return
+        for relative_path, content in shards.items():
+            shard_path = self.docs_path / relative_path
+            shard_path.parent.mkdir(parents=True, exist_ok=True)
+            self.written += self.writer.write(shard_path, content)
+
+    def close(self):
+        """Write the index, clean up stale shards and return every file."""
+        docs_path = self.docs_path
+        grant_ids = self.grant_ids
+        written = self.written + self.writer.write(
+            docs_path / "grants_index.json", self.index
+        )
+
+        shard_root = docs_path / SHARD_DIR
+        current = set(written)
+        for stale in shard_root.rglob("*.json*"):
+            owner = stale.relative_to(shard_root).parts[0].split(".json")[0]
+            if stale not in current and (
+                grant_ids is None or owner in grant_ids
+            ):
+                stale.unlink()
+        # Deepest first, so emptied report directories go before their grant
+        for directory in sorted(
+            shard_root.rglob("*/"), key=lambda path: -len(path.parts)
+        ):
+            if directory.is_dir() and not any(directory.iterdir()):
+                directory.rmdir()
+        return written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+def write_sharded(grants_data, docs_path, writer=None, grant_ids=None):
+    """Write a small ``grants_index.json`` plus one shard per grant/period."""
+    stream = ShardedStream(docs_path, writer, grant_ids)
+    for grant_id, grant_data in grants_data.items():
+        stream.add(grant_id, grant_data)
+    return stream.close()
@@ -0,0 +1,200 @@
+"""Convert documents through one resident ``pandoc-server`` process."""
+
+import http.client
+import json
+import queue
+import re
+import shutil
+import socket
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from .export_cache import detach_file
+
+SERVER_START_TIMEOUT = 5
+
+# pandoc splits a variable at its first ":" or "="; a bare name is true
+_VARIABLE = re.compile(r"([^:=]*)(?:[:=](.*))?", re.DOTALL)
+
+
+def server_options(args):
+    """Translate pandoc command-line ``args`` to pandoc-server options."""
+    options = {}
+    variables = {}
+    args = iter(args)
+    for arg in args:
+        if arg == "-V":
+            name, value = _VARIABLE.fullmatch(next(args)).groups()
+            variables[name] = True if value is None else value
+        elif arg.startswith("--from="):
+            options["from"] = arg.removeprefix("--from=")
+        elif arg.startswith("--to="):
+            options["to"] = arg.removeprefix("--to=")
+        elif arg == "--standalone":
+            options["standalone"] = True
+        else:
+            raise ValueError(f"pandoc-server does not take {arg}")
+    if variables:
+        options["variables"] = variables
+    return options
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class PandocServer:
+    """A ``pandoc-server`` shared by every conversion of a build."""
+
+    def __init__(self, start_timeout=SERVER_START_TIMEOUT):
+        self.start_timeout = start_timeout
+        self.process = None
+        self.port = None
+        self.connections = queue.LifoQueue()
+        self._available = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def command():
+        """Return the command that starts a server, or None."""
+        executable = shutil.which("pandoc-server")
+        if executable:
+            return [executable]
+        executable = shutil.which("pandoc")
+        if executable:
+            return [executable, "server"]
+        return None
+
+    def available(self):
+        """Start the server if needed and return whether it is up."""
+        with self._lock:
+            if self._available is None:
+                self._available = self._start()
+            return self._available
+
+    def _start(self):
+        command = self.command()
+        if command is None:
+            return False
+        self.port = _free_port()
+        try:
+            self.process = subprocess.Popen(
+                [*command, "--port", str(self.port)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return False
+
+        deadline = time.monotonic() + self.start_timeout
+        while self.process.poll() is None and time.monotonic() < deadline:
+            try:
+                connection = http.client.HTTPConnection(
+                    "127.0.0.1", self.port, timeout=self.start_timeout
+                )
+                connection.request("GET", "/version")
+                response = connection.getresponse()
+                response.read()
+            except OSError:
+                connection.close()
+                time.sleep(0.02)
+                continue
+            if response.status == 200:
+                self.connections.put(connection)
+                return True
+            connection.close()
+            break
+        self._stop()
+        return False
+
+    def convert(self, full_markdown, output_path, args, label, timeout=None):
+        """Render a document with pandoc ``args`` to ``output_path``."""
+        if not self.available():
+            return False
+        body = json.dumps({"text": full_markdown, **server_options(args)})
+        try:
+            connection = self.connections.get_nowait()
+        except queue.Empty:
+            connection = None
+
+        # A pooled connection may have been closed by the server while
+        # idle, so one failure is retried on a fresh connection.
+        while True:
+            fresh = connection is None
+            if fresh:
+                connection = http.client.HTTPConnection("127.0.0.1", self.port)
+            try:
+                output, status = self._post(connection, body, timeout)
+                break
+            except socket.timeout:
+                connection.close()
+                raise Exception(
+                    f"{label} conversion timed out after {timeout}s"
+                )
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = None
+                if fresh:
+                    self._lost()
+                    return False
+
+        self.connections.put(connection)
+        if status != 200:
+            message = output.decode(errors="replace")
+            raise Exception(f"{label} conversion failed: {message}")
+        detach_file(output_path)
+        Path(output_path).write_bytes(output)
+        return True
+
+    @staticmethod
+    def _post(connection, body, timeout):
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        connection.request(
+            "POST",
+            "/",
+            body.encode(),
+            {
+                "Content-Type": "application/json",
+                "Accept": "application/octet-stream",
+            },
+        )
+        response = connection.getresponse()
+        return response.read(), response.status
+
+    def _lost(self):
+        with self._lock:
+            if self._available:
+                print("   ⚠️  pandoc-server stopped, falling back to pandoc")
+                self._available = False
+                self._stop()
+
+    def _stop(self):
+        while not self.connections.empty():
+            self.connections.get_nowait().close()
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+    def close(self):
+        """Stop the server; later conversions fall back to pandoc."""
+        with self._lock:
+            self._available = False
+            self._stop()
@@ -0,0 +1,109 @@
+"""Index a grant directory with one ``os.scandir`` walk."""
+
+import os
+import stat as stat_module
+from collections import namedtuple
+
+FileStat = namedtuple("FileStat", ["is_dir", "size", "mtime_ns"])
+
+
+def stat_path(path):
+    """Return the ``FileStat`` of ``path``, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return FileStat(
+        stat_module.S_ISDIR(stat.st_mode), stat.st_size, stat.st_mtime_ns
+    )
+
+
+class RepoIndex:
+    """Every path under ``root`` with its size and mtime."""
+
+    def __init__(self, root):
+        self.root = os.path.normpath(root)
+        self.entries = {}
+        self.children = {}
+
+    @classmethod
+    def scan(cls, root):
+        """Walk ``root``; a missing root gives an empty index."""
+        index = cls(root)
+        root_stat = stat_path(index.root)
+        if root_stat is None:
+            return index
+        index.entries[index.root] = root_stat
+        if root_stat.is_dir:
+            index._walk(index.root, set())
+        return index
+
+    def _walk(self, directory, visited):
+        names = []
+        subdirectories = []
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            self.children[directory] = names
+            return
+        with entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    # A broken symlink
+                    continue
+                path = (
+                    entry.name
+                    if directory == os.curdir
+                    else os.path.join(directory, entry.name)
+                )
+                is_dir = stat_module.S_ISDIR(stat.st_mode)
+                self.entries[path] = FileStat(
+                    is_dir, stat.st_size, stat.st_mtime_ns
+                )
+                names.append(entry.name)
+                # Symlinked directories are followed, but only once
+                if is_dir and (stat.st_dev, stat.st_ino) not in visited:
+                    visited.add((stat.st_dev, stat.st_ino))
+                    subdirectories.append(path)
+        self.children[directory] = sorted(names)
+        for path in subdirectories:
+            self._walk(path, visited)
+
+    def _key(self, path):
+        """Return the normalized key of ``path`` if it is inside root."""
+        key = os.path.normpath(path)
+        if self.root == os.curdir:
+            inside = not (
+                os.path.isabs(key)
+                or key == os.pardir
+                or key.startswith(os.pardir + os.sep)
+            )
+        else:
+            inside = key == self.root or key.startswith(self.root + os.sep)
+        return key if inside else None
+
+    def stat(self, path):
+        """Return the ``FileStat`` of ``path``, or None if it is missing."""
+        key = self._key(path)
+        if key is None:
+            return stat_path(path)
+        return self.entries.get(key)
+
+    def exists(self, path):
+        return self.stat(path) is not None
+
+    def is_dir(self, path):
+        stat = self.stat(path)
+        return stat is not None and stat.is_dir
+
+    def listdir(self, path):
+        """Return the sorted names in directory ``path``."""
+        key = self._key(path)
+        if key is None:
+            try:
+                return sorted(os.listdir(path))
+            except OSError:
+                return []
+        return self.children.get(key, [])
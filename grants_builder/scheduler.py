@@ -0,0 +1,314 @@
+"""Parallel export scheduler with batched LibreOffice conversion."""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from . import trace
+from .converters import Converters
+from .export_cache import detach_file
+from .exporter import (
+    DEFAULT_EXPORT_FORMATS,
+    SOFFICE_PDF_ARGS,
+    SOFFICE_TIMEOUT,
+    PandocBackend,
+    create_markdown_document,
+    export_markdown_to_pdf,
+    export_paths,
+    markdown_source,
+    pdf_cache_key,
+    pdf_converter,
+    render_markdown,
+)
+
+SOFFICE_BATCH_SIZE = 25
+
+
+@dataclass
+class ExportJob:
+    """A single response waiting to be exported."""
+
+    grant_id: str
+    response_key: str
+    document: str
+    paths: dict
+    done: set = field(default_factory=set)
+    errors: list = field(default_factory=list)
+    kept: bool = False
+
+    @property
+    def docx_path(self):
+        """The DOCX PDFs are converted from, even if not requested."""
+        if "docx" in self.paths:
+            return self.paths["docx"]
+        return self.paths["pdf"].with_suffix(".temp.docx")
+
+    @property
+    def complete(self):
+        return self.done >= set(self.paths)
+
+
+class ExportScheduler:
+    """Collect export jobs from every grant and run them together."""
+
+    def __init__(
+        self,
+        max_workers=None,
+        cache=None,
+        timeout=SOFFICE_TIMEOUT,
+        batch_size=SOFFICE_BATCH_SIZE,
+        backend=None,
+        converters=None,
+    ):
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.cache = cache
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.backend = backend or PandocBackend()
+        self.converters = converters
+        self.jobs = []
+
+    def submit(
+        self,
+        grant_id,
+        grant_name,
+        foundation,
+        response_key,
+        response_data,
+        response_markdown,
+        output_dir,
+        formats=DEFAULT_EXPORT_FORMATS,
+    ):
+        """Queue a response for export and return its export paths."""
+        output_dir = Path(output_dir)
+        paths = export_paths(grant_id, response_key, output_dir, formats)
+        self.jobs.append(
+            ExportJob(
+                grant_id=grant_id,
+                response_key=response_key,
+                document=create_markdown_document(
+                    response_markdown,
+                    response_data["title"],
+                    response_data["question"],
+                    grant_name,
+                    foundation,
+                ),
+                paths=paths,
+            )
+        )
+        return {
+            fmt: str(path.relative_to(output_dir.parent))
+            for fmt, path in paths.items()
+        }
+
+    def run(self):
+        """Run every queued job and report failures grouped by grant."""
+        jobs, self.jobs = self.jobs, []
+        if not jobs:
+            return jobs
+
+        print(f"\n📄 Exporting {len(jobs)} responses...")
+        if self.converters is None and any("pdf" in job.paths for job in jobs):
+            self.converters = Converters.probe()
+            for line in self.converters.describe():
+                print(line)
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            list(pool.map(self._render_pandoc, jobs))
+
+        pending = [
+            job for job in jobs if "pdf" in job.paths and "pdf" not in job.done
+        ]
+        for batch in self._batches(
+            [job for job in pending if "docx" in job.done]
+        ):
+            # A hung LibreOffice costs one job's timeout, not the whole
+            # batch's; whatever it converted by then is kept.
+            self._convert_batch(batch, timeout=self.timeout)
+
+        # LibreOffice cannot run concurrently against one profile, so the
+        # per-job retries stay serial.
+        for job in pending:
+            if "pdf" not in job.done:
+                self._fallback_pdf(job)
+            if "docx" not in job.paths:
+                job.docx_path.unlink(missing_ok=True)
+
+        if self.cache is not None:
+            self.cache.evict()
+        self._report(jobs)
+        return jobs
+
+    def _render_pandoc(self, job):
+        if self.backend.keeps(job.paths):
+            self._keep(job)
+            return
+        formats = [fmt for fmt in job.paths if fmt != "pdf"]
+        if "pdf" in job.paths:
+            if self.cache is not None and self.cache.fetch(
+                pdf_cache_key(
+                    self.cache,
+                    job.document,
+                    self.backend,
+                    pdf_converter(self.converters),
+                ),
+                job.paths["pdf"],
+            ):
+                job.done.add("pdf")
+            elif "docx" not in formats and self.converters.available(
+                "soffice"
+            ):
+                formats.append("docx")
+
+        if self.backend.needs_source:
+            source = markdown_source(job.document)
+        else:
+            source = nullcontext()
+        with source as source_path:
+            for fmt in formats:
+                output_path = job.paths.get(fmt, job.docx_path)
+                try:
+                    with trace.span(
+                        self.backend.name,
+                        grant=job.grant_id,
+                        section=job.response_key,
+                        format=fmt,
+                    ):
+                        render_markdown(
+                            job.document,
+                            output_path,
+                            fmt,
+                            cache=self.cache,
+                            timeout=self.timeout,
+                            source_path=source_path,
+                            backend=self.backend,
+                        )
+                    job.done.add(fmt)
+                except Exception as e:
+                    job.errors.append(f"Failed to export {fmt.upper()}: {e}")
+
+    def _keep(self, job):
+        """Leave the exports another renderer wrote for ``job`` in place."""
+        job.kept = True
+        for fmt, path in job.paths.items():
+            if path.exists():
+                job.done.add(fmt)
+            else:
+                job.errors.append(
+                    f"{fmt.upper()} not exported next to a DOCX from "
+                    f"another renderer; --export-backend native replaces it"
+                )
+
+    def _batches(self, jobs):
+        """Split jobs into batches whose output file names are unique."""
+        batch, stems = [], set()
+        for job in jobs:
+            stem = job.docx_path.stem
+            if len(batch) >= self.batch_size or stem in stems:
+                yield batch
+                batch, stems = [], set()
+            batch.append(job)
+            stems.add(stem)
+        if batch:
+            yield batch
+
+    def _convert_batch(self, batch, timeout):
+        """Convert a batch of DOCX files to PDF with a single soffice run."""
+        if not self.converters.available("soffice"):
+            return
+        with (
+            tempfile.TemporaryDirectory() as outdir,
+            trace.span("soffice", files=len(batch)),
+        ):
+            failed = False
+            try:
+                subprocess.run(
+                    [
+                        "soffice",
+                        *SOFFICE_PDF_ARGS,
+                        "--outdir",
+                        outdir,
+                        *(str(job.docx_path) for job in batch),
+                    ],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                    timeout=timeout,
+                )
+            except (
+                FileNotFoundError,
+                subprocess.CalledProcessError,
+                subprocess.TimeoutExpired,
+            ):
+                # Keep whatever was converted; the rest is retried per job.
+                failed = True
+
+            for job in batch:
+                converted = Path(outdir) / f"{job.docx_path.stem}.pdf"
+                if not converted.exists():
+                    failed = True
+                    continue
+                detach_file(job.paths["pdf"])
+                shutil.move(converted, job.paths["pdf"])
+                self._pdf_done(job, "soffice")
+
+        if failed:
+            self.converters.failed("soffice")
+        else:
+            self.converters.succeeded("soffice")
+
+    def _fallback_pdf(self, job):
+        if "docx" in job.done:
+            self._convert_batch([job], timeout=self.timeout)
+            if "pdf" in job.done:
+                return
+        if not self.converters.available("xelatex"):
+            job.errors.append("Failed to export PDF: no working converter")
+            return
+        try:
+            with (
+                trace.span(
+                    "xelatex", grant=job.grant_id, section=job.response_key
+                ),
+                self.converters.attempt("xelatex"),
+            ):
+                export_markdown_to_pdf(
+                    job.document, job.paths["pdf"], timeout=self.timeout
+                )
+        except Exception as e:
+            job.errors.append(f"Failed to export PDF: {e}")
+            return
+        self._pdf_done(job, "xelatex")
+
+    def _pdf_done(self, job, converter):
+        job.done.add("pdf")
+        if self.cache is not None:
+            self.cache.store(
+                pdf_cache_key(
+                    self.cache, job.document, self.backend, converter
+                ),
+                job.paths["pdf"],
+            )
+
+    def _report(self, jobs):
+        current_grant = None
+        for job in jobs:
+            if not job.errors:
+                continue
+            if job.grant_id != current_grant:
+                current_grant = job.grant_id
+                print(f"   {current_grant}:")
+            for error in job.errors:
+                print(f"   ⚠️  {job.response_key}: {error}")
+        done = sum(job.complete for job in jobs)
+        print(f"   ✅ {done}/{len(jobs)} responses exported")
+        kept = sum(job.kept for job in jobs)
+        if kept:
+            print(
+                f"   ♻️  Kept the exports of {kept} responses another "
+                f"renderer wrote; --export-backend native replaces them"
+            )
@@ -0,0 +1,181 @@
+"""Precomputed full-text search over every response's plain text."""
+
+import json
+import math
+import re
+from pathlib import Path
+
+from . import trace
+from .output import JsonWriter
+
+SEARCH_INDEX_VERSION = 1
+SEARCH_DIR = "search"
+# Terms are sharded on their first characters, so a query only loads
+# the shards of its own terms.
+PREFIX_LENGTH = 2
+
+_TOKEN = re.compile(r"\w+")
+_SHARD_UNSAFE = re.compile(r"[^a-z0-9]")
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text):
+    """Return the lowercased word tokens of ``text`` in order."""
+    return _TOKEN.findall(text.casefold())
+
+
+def shard_name(token):
+    """Return the shard a token's postings live in."""
+    return _SHARD_UNSAFE.sub("_", token[:PREFIX_LENGTH])
+
+
+class SearchIndexBuilder:
+    """Collect postings for every response and write a sharded index."""
+
+    def __init__(self):
+        self.documents = []
+        self.postings = {}
+
+    def add_grant(self, grant_id, grant_data):
+        """Index the plain text of each of a grant's responses."""
+        for key, response in grant_data["responses"].items():
+            text = response.get("plainText")
+            if not text:
+                continue
+            document = len(self.documents)
+            self.documents.append([grant_id, key, response.get("title", "")])
+            positions = {}
+            for position, token in enumerate(tokenize(text)):
+                positions.setdefault(token, []).append(position)
+            for token, token_positions in positions.items():
+                self.postings.setdefault(token, []).append(
+                    [document, *token_positions]
+                )
+
+    def write(self, docs_path, writer=None):
+        """Write the index under ``docs_path`` and return every file."""
+        if writer is None or not writer.production:
+            writer = JsonWriter(compact=True)
+        search_path = Path(docs_path) / SEARCH_DIR
+        terms_path = search_path / "terms"
+        terms_path.mkdir(parents=True, exist_ok=True)
+
+        shards = {}
+        for token in sorted(self.postings):
+            shard = shards.setdefault(shard_name(token), {})
+            shard[token] = self.postings[token]
+
+        written = []
+        with trace.span("search_index", terms=len(self.postings)):
+            for name, terms in shards.items():
+                written += writer.write(terms_path / f"{name}.json", terms)
+            written += writer.write(
+                search_path / "index.json",
+                {
+                    "version": SEARCH_INDEX_VERSION,
+                    "prefixLength": PREFIX_LENGTH,
+                    "documents": self.documents,
+                    "shards": sorted(shards),
+                },
+            )
+
+        # Shards whose prefix no longer occurs, and their sidecars
+        current = set(written)
+        for stale in terms_path.iterdir():
+            if stale not in current:
+                stale.unlink()
+        return written
+
+
+class SearchIndex:
+    """Query a search index written by ``SearchIndexBuilder``."""
+
+    def __init__(self, docs_path="docs"):
+        self.path = Path(docs_path) / SEARCH_DIR
+        index = json.loads((self.path / "index.json").read_text())
+        if index.get("version") != SEARCH_INDEX_VERSION:
+            raise ValueError(
+                f"Unsupported search index version: {index.get('version')}"
+            )
+        self.documents = index["documents"]
+        self.shard_names = set(index["shards"])
+        self.shards = {}
+
+    def postings(self, token):
+        """Return ``{document: positions}`` for one token."""
+        name = shard_name(token)
+        if name not in self.shard_names:
+            return {}
+        if name not in self.shards:
+            self.shards[name] = json.loads(
+                (self.path / "terms" / f"{name}.json").read_text()
+            )
+        return {
+            posting[0]: posting[1:]
+            for posting in self.shards[name].get(token, [])
+        }
+
+    def search(self, query, limit=20):
+        """Return the responses matching every word and "quoted phrase"."""
+        phrases = []
+        for quoted, word in _QUERY.findall(query):
+            tokens = tokenize(quoted if quoted else word)
+            if tokens:
+                phrases.append(tokens)
+        if not phrases:
+            return []
+
+        postings = {
+            token: self.postings(token)
+            for tokens in phrases
+            for token in tokens
+        }
+        # Start from the rarest term so the intersection stays small
+        ordered = sorted(postings.values(), key=len)
+        candidates = set(ordered[0])
+        for token_postings in ordered[1:]:
+            candidates.intersection_update(token_postings)
+
+        hits = []
+        total = len(self.documents)
+        for document in sorted(candidates):
+            if not all(
+                _has_phrase(postings, tokens, document)
+                for tokens in phrases
+                if len(tokens) > 1
+            ):
+                continue
+            score = sum(
+                len(token_postings[document])
+                * math.log(1 + total / len(token_postings))
+                for token_postings in postings.values()
+            )
+            grant_id, key, title = self.documents[document]
+            hits.append(
+                {
+                    "grant": grant_id,
+                    "key": key,
+                    "title": title,
+                    "score": round(score, 3),
+                }
+            )
+        # Stable, so equal scores keep build order
+        hits.sort(key=lambda hit: -hit["score"])
+        return hits[:limit]
+
+
+def _has_phrase(postings, tokens, document):
+    """Whether ``tokens`` occur consecutively in ``document``."""
+    following = [set(postings[token][document]) for token in tokens[1:]]
+    return any(
+        all(
+            start + offset in positions
+            for offset, positions in enumerate(following, 1)
+        )
+        for start in postings[tokens[0]][document]
+    )
+
+
+def search(query, docs_path="docs", limit=20):
+    """Search the index under ``docs_path``; see ``SearchIndex.search``."""
+    return SearchIndex(docs_path).search(query, limit=limit)
@@ -0,0 +1,304 @@
+"""Serve grant data over localhost, processing each grant on demand."""
+
+import hashlib
+import http.server
+import mimetypes
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from .builder import process_grant
+from .config_cache import ConfigCache, load_yaml
+from .exporter import DEFAULT_EXPORT_BACKEND, export_backend
+from .output import SHARD_DIR, JsonWriter
+from .pandoc_server import PandocServer
+from .repo_index import RepoIndex
+from .scheduler import ExportScheduler
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_MAX_BYTES = 64 * 2**20
+# The viewer's Vite dev server, the one other origin that fetches from us
+DEFAULT_CORS_ORIGIN = "http://localhost:5173"
+# Export URLs in grant data are relative to the docs directory
+DOCS_PATH = Path("docs")
+
+# A processed grant: the directory snapshot and config it was built
+# from, its serialized JSON and ETag, and its export jobs by URL path.
+CachedGrant = namedtuple(
+    "CachedGrant", ["snapshot", "config", "body", "etag", "jobs"]
+)
+
+
+def etag(body):
+    """Return a strong ETag for ``body``."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class GrantCache:
+    """Processed grants, evicting the least recently used past a size."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def get(self, grant_id):
+        entry = self.entries.get(grant_id)
+        if entry is not None:
+            self.entries.move_to_end(grant_id)
+        return entry
+
+    def put(self, grant_id, entry):
+        self.discard(grant_id)
+        self.entries[grant_id] = entry
+        self.size += len(entry.body)
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted.body)
+
+    def discard(self, grant_id):
+        entry = self.entries.pop(grant_id, None)
+        if entry is not None:
+            self.size -= len(entry.body)
+
+
+class GrantService:
+    """Process grants when they are asked for and keep the results."""
+
+    def __init__(
+        self,
+        registry_path="grant_registry.yaml",
+        max_bytes=DEFAULT_CACHE_MAX_BYTES,
+        export_cache=None,
+        pandoc_server=True,
+        backend=DEFAULT_EXPORT_BACKEND,
+    ):
+        self.registry_path = Path(registry_path)
+        self.cache = GrantCache(max_bytes)
+        self.config_cache = ConfigCache()
+        self.writer = JsonWriter(compact=True)
+        self.backend = export_backend(
+            backend, server=PandocServer() if pandoc_server else None
+        )
+        self.scheduler = ExportScheduler(
+            cache=export_cache, backend=self.backend
+        )
+        self.hits = 0
+        self.misses = 0
+        self._registry = {}
+        self._registry_stat = None
+        # Guards the registry and the cache; each grant is processed
+        # under its own lock, so different grants never wait on it.
+        self._lock = threading.Lock()
+        self._grant_locks = {}
+        self._export_lock = threading.Lock()
+
+    def registry(self):
+        """Return the registry's grants, rereading it when it changes."""
+        stat = _stat(self.registry_path)
+        if stat != self._registry_stat:
+            self._registry = load_yaml(self.registry_path)["grants"]
+            self._registry_stat = stat
+        return self._registry
+
+    def grant(self, grant_id):
+        """Return the ``CachedGrant`` for ``grant_id``, or None."""
+        with self._lock:
+            grant_config = self.registry().get(grant_id)
+            if grant_config is None:
+                self.cache.discard(grant_id)
+                return None
+            grant_lock = self._grant_locks.setdefault(
+                grant_id, threading.Lock()
+            )
+        with grant_lock:
+            snapshot = RepoIndex.scan(grant_config["path"]).entries
+            with self._lock:
+                cached = self.cache.get(grant_id)
+                if (
+                    cached is not None
+                    and cached.config == grant_config
+                    and cached.snapshot == snapshot
+                ):
+                    self.hits += 1
+                    return cached
+                self.misses += 1
+
+            scheduler = ExportScheduler()
+            grant_data = process_grant(
+                grant_id,
+                grant_config,
+                scheduler=scheduler,
+                config_cache=self.config_cache,
+            )
+            if grant_data is None:
+                with self._lock:
+                    self.cache.discard(grant_id)
+                return None
+            body = self.writer.dumps(grant_data)
+            jobs = {
+                path.relative_to(DOCS_PATH).as_posix(): job
+                for job in scheduler.jobs
+                for path in job.paths.values()
+            }
+            entry = CachedGrant(snapshot, grant_config, body, etag(body), jobs)
+            with self._lock:
+                self.cache.put(grant_id, entry)
+            return entry
+
+    def grants_data(self):
+        """Return every grant as ``grants_data.json`` and its ETag."""
+        members = []
+        for grant_id in list(self.registry()):
+            entry = self.grant(grant_id)
+            if entry is not None:
+                members.append(self.writer.dumps(grant_id) + b":" + entry.body)
+        body = b"{" + b",".join(members) + b"}"
+        return body, etag(body)
+
+    def index(self):
+        """Return the registry, which costs no grant processing."""
+        body = self.writer.dumps(
+            {
+                grant_id: {
+                    key: value
+                    for key, value in grant_config.items()
+                    if key != "path"
+                }
+                | {"shard": f"{SHARD_DIR}/{grant_id}.json"}
+                for grant_id, grant_config in self.registry().items()
+            }
+        )
+        return body, etag(body)
+
+    def export(self, grant_id, relative_path):
+        """Render an export if it is still queued and return its path."""
+        entry = self.grant(grant_id)
+        if entry is None or relative_path not in entry.jobs:
+            return None
+        job = entry.jobs[relative_path]
+        with self._export_lock:
+            if not job.complete and not job.errors:
+                self.scheduler.jobs.append(job)
+                self.scheduler.run()
+        path = DOCS_PATH / relative_path
+        return path if path.is_file() else None
+
+    def close(self):
+        self.backend.close()
+
+
+class GrantRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Answer viewer requests from the server's ``GrantService``."""
+
+    server_version = "grants-serve"
+    head_only = False
+
+    def do_HEAD(self):
+        self.head_only = True
+        self.do_GET()
+
+    def do_GET(self):
+        service = self.server.service
+        path = unquote(urlsplit(self.path).path).lstrip("/")
+        try:
+            if path in ("", "grants_index.json"):
+                self.send_json(*service.index())
+            elif path == "grants_data.json":
+                self.send_json(*service.grants_data())
+            elif path.startswith(f"{SHARD_DIR}/") and path.endswith(".json"):
+                grant_id = path[len(SHARD_DIR) + 1 : -len(".json")]
+                entry = service.grant(grant_id)
+                if entry is None:
+                    self.send_text(404, f"Unknown grant: {grant_id}")
+                else:
+                    self.send_json(entry.body, entry.etag)
+            elif path.startswith("exports/") and path.count("/") == 2:
+                grant_id = path.split("/")[1]
+                export_path = service.export(grant_id, path)
+                if export_path is None:
+                    self.send_text(404, f"No such export: {path}")
+                else:
+                    self.send_file(export_path)
+            else:
+                self.send_text(404, f"Not found: {path}")
+        except ValueError as e:
+            # A response over its limit, as a build would report it
+            self.send_text(422, str(e).strip())
+        except Exception as e:
+            self.send_text(500, f"{type(e).__name__}: {e}")
+
+    def send_text(self, code, message):
+        """Send an error with ``message`` as a plain-text body."""
+        body = (message + "\n").encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self._common_headers()
+        self.end_headers()
+        if not self.head_only:
+            self.wfile.write(body)
+
+    def send_json(self, body, tag):
+        self.send_body(body, tag, "application/json")
+
+    def send_file(self, path):
+        stat = os.stat(path)
+        tag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        content_type = mimetypes.guess_type(path.name)[0]
+        self.send_body(
+            None, tag, content_type or "application/octet-stream", path
+        )
+
+    def send_body(self, body, tag, content_type, path=None):
+        """Send ``body`` (or the file at ``path``), or a 304 if unchanged."""
+        if tag in self._if_none_match():
+            self.send_response(304)
+            self.send_header("ETag", tag)
+            self._common_headers()
+            self.end_headers()
+            return
+        if path is not None:
+            body = path.read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", tag)
+        self._common_headers()
+        self.end_headers()
+        if not self.head_only:
+            self.wfile.write(body)
+
+    def _if_none_match(self):
+        header = self.headers.get("If-None-Match", "")
+        return {tag.strip() for tag in header.split(",")}
+
+    def _common_headers(self):
+        # Always revalidate, so an edited grant is picked up at once
+        self.send_header("Cache-Control", "no-cache")
+        # The viewer's dev server runs on another port
+        self.send_header(
+            "Access-Control-Allow-Origin", self.server.cors_origin
+        )
+
+
+class GrantServer(http.server.ThreadingHTTPServer):
+    """An HTTP server answering from a ``GrantService``."""
+
+    daemon_threads = True
+
+    def __init__(self, address, service, cors_origin=DEFAULT_CORS_ORIGIN):
+        super().__init__(address, GrantRequestHandler)
+        self.service = service
+        self.cors_origin = cors_origin
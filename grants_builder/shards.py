@@ -0,0 +1,221 @@
+"""Split a build across runners and merge the partial outputs."""
+
+import heapq
+import json
+import shutil
+from pathlib import Path
+
+from . import trace
+from .config_cache import load_yaml
+from .exporter import DEFAULT_EXPORT_FORMATS
+from .output import (
+    DEFAULT_SCHEMA,
+    SHARD_DIR,
+    GrantsDataStream,
+    JsonWriter,
+    ShardedStream,
+)
+from .search import SearchIndexBuilder
+
+PARTIAL_VERSION = 1
+PARTIALS_DIR = "partials"
+PARTIAL_FILE = "partial.json"
+# Costs are in bytes of response markdown. One export format costs
+# about as much as stripping a megabyte of markdown, and every section
+# a little whatever its size.
+EXPORT_COST = 1 << 20
+SECTION_COST = 4096
+
+
+def parse_shard(value):
+    """Parse ``"i/N"`` into ``(i, N)``, numbering shards from 1."""
+    index, _, count = value.partition("/")
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(
+            f"shard {value} is not between 1/{count} and {count}/{count}"
+        )
+    return index, count
+
+
+def partial_path(docs_path, index, count):
+    """Return the directory holding shard ``index`` of ``count``."""
+    return Path(docs_path) / PARTIALS_DIR / f"{index}-of-{count}"
+
+
+def grant_cost(plan):
+    """Estimate the work of building a planned grant."""
+    cost = 0
+    for group in plan.groups:
+        for section_data in group.sections.values():
+            cost += SECTION_COST
+            stat = plan.index.stat(group.base_path / section_data["file"])
+            if stat is not None:
+                cost += stat.size
+            if section_data.get("needs_export", False):
+                formats = section_data.get(
+                    "export_formats", DEFAULT_EXPORT_FORMATS
+                )
+                cost += EXPORT_COST * len(formats)
+    return cost
+
+
+def assign_shards(costs, count):
+    """Split grants between ``count`` shards, balancing their cost."""
+    loads = [(0, shard) for shard in range(1, count + 1)]
+    assignment = {}
+    for grant_id in sorted(costs, key=lambda key: (-costs[key], key)):
+        load, shard = heapq.heappop(loads)
+        assignment[grant_id] = shard
+        heapq.heappush(loads, (load + costs[grant_id], shard))
+    return assignment
+
+
+def _export_paths(grant_data):
+    """Return each export file of a grant, relative to the docs directory."""
+    return [
+        path
+        for response in grant_data["responses"].values()
+        for path in response.get("exports", {}).values()
+    ]
+
+
+class PartialStream:
+    """Write one shard's grants and exports for ``merge_partials``."""
+
+    def __init__(self, docs_path, index, count, grant_ids):
+        self.docs_path = Path(docs_path)
+        self.path = partial_path(docs_path, index, count)
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.path.mkdir(parents=True)
+        # Indented like the default output, so grants are read back as
+        # they were built whichever JSON library wrote them.
+        self.stream = JsonWriter().stream(
+            self.path / PARTIAL_FILE,
+            header={
+                "version": PARTIAL_VERSION,
+                "shard": index,
+                "shards": count,
+                "assigned": list(grant_ids),
+            },
+            nest="grants",
+        )
+        self.exports = []
+
+    def add(self, grant_id, grant_data):
+        self.stream.add(grant_id, grant_data)
+        self.exports += _export_paths(grant_data)
+
+    def close(self):
+        for relative_path in self.exports:
+            source = self.docs_path / relative_path
+            if source.is_file():
+                target = self.path / relative_path
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(source, target)
+        return self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self.stream.__exit__(exc_type, exc, tb)
+
+
+def load_partials(docs_path, grant_ids):
+    """Read every shard's partial output and check that none is missing."""
+    root = Path(docs_path) / PARTIALS_DIR
+    paths = sorted(root.glob(f"*/{PARTIAL_FILE}"))
+    if not paths:
+        raise ValueError(f"No partial builds found in {root}")
+
+    shards = {}
+    assigned = []
+    grants = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            partial = json.load(f)
+        if partial.get("version") != PARTIAL_VERSION:
+            raise ValueError(
+                f"{path} is not a version {PARTIAL_VERSION} partial"
+            )
+        shards.setdefault(partial["shards"], []).append(partial["shard"])
+        assigned += partial["assigned"]
+        grants.update(partial["grants"])
+
+    if len(shards) > 1:
+        raise ValueError(
+            f"Partials were split {' and '.join(map(str, sorted(shards)))} "
+            f"ways; remove stale ones from {root}"
+        )
+    [(count, found)] = shards.items()
+    missing = sorted(set(range(1, count + 1)) - set(found))
+    if missing:
+        raise ValueError(
+            f"Missing shard(s) {', '.join(f'{i}/{count}' for i in missing)}"
+        )
+    if len(found) != count or sorted(assigned) != sorted(grant_ids):
+        raise ValueError(
+            "Partials were not built from the current grant registry"
+        )
+    return [path.parent for path in paths], grants
+
+
+def merge_partials(
+    registry_path="grant_registry.yaml",
+    sharded=False,
+    production=False,
+    schema=DEFAULT_SCHEMA,
+    search_index=False,
+):
+    """Combine ``build_all_grants(shard=...)`` outputs into a full build."""
+    with trace.span("registry"):
+        registry = load_yaml(registry_path)
+    docs_path = Path("docs")
+    partials, grants = load_partials(docs_path, list(registry["grants"]))
+
+    writer = JsonWriter(production=production)
+    if sharded:
+        output = ShardedStream(docs_path, writer=writer)
+    else:
+        output = GrantsDataStream(docs_path, writer=writer, schema=schema)
+    search_builder = SearchIndexBuilder() if search_index else None
+    with output:
+        for grant_id in registry["grants"]:
+            if grant_id not in grants:
+                continue
+            output.add(grant_id, grants[grant_id])
+            if search_builder is not None:
+                search_builder.add_grant(grant_id, grants[grant_id])
+
+        with trace.span("exports"):
+            for partial in partials:
+                for source in sorted((partial / "exports").rglob("*")):
+                    if source.is_file():
+                        target = docs_path / source.relative_to(partial)
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        shutil.move(source, target)
+
+        output.close()
+
+    if sharded:
+        print(
+            f"✅ Merged {len(partials)} partial builds into "
+            f"docs/grants_index.json and docs/{SHARD_DIR}/"
+        )
+    else:
+        print(
+            f"✅ Merged {len(partials)} partial builds into "
+            f"docs/grants_data.json"
+        )
+    if search_builder is not None:
+        search_builder.write(docs_path, writer=writer)
+        print(
+            f"🔎 Indexed {len(search_builder.documents)} responses "
+            f"({len(search_builder.postings)} terms) in docs/search/"
+        )
+    if production:
+        print(writer.summary())
+    print(f"✅ Merged {len(grants)} grants")
+
+    shutil.rmtree(docs_path / PARTIALS_DIR)
@@ -0,0 +1,117 @@
+"""Timed spans for build stages, written as Chrome trace events."""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_TOP_N = 10
+
+_tracer = None
+
+
+class _NullSpan:
+    """Stands in for a span while tracing is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.tracer.record(self.name, self.start, end, self.args)
+        return False
+
+
+class Tracer:
+    """Collect complete ("X") trace events for one build."""
+
+    def __init__(self, origin=None):
+        self.origin = time.perf_counter_ns() if origin is None else origin
+        self.events = []
+
+    def record(self, name, start, end, args):
+        self.events.append(
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.origin) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {k: v for k, v in args.items() if v is not None},
+            }
+        )
+
+    def write(self, path):
+        """Write the events as a Chrome trace-event JSON file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps({"traceEvents": self.events, "displayTimeUnit": "ms"})
+        )
+
+    def summary(self, top=DEFAULT_TOP_N):
+        """Describe the stages and individual spans that took longest."""
+        stages = {}
+        for event in self.events:
+            total, count = stages.get(event["name"], (0, 0))
+            stages[event["name"]] = (total + event["dur"], count + 1)
+
+        lines = [f"⏱️  Top {top} stages by total time:"]
+        ranked = sorted(stages.items(), key=lambda item: -item[1][0])
+        for name, (total, count) in ranked[:top]:
+            lines.append(f"  {total / 1000:10.1f} ms  {count:5}×  {name}")
+
+        lines.append(f"⏱️  Top {top} slowest spans:")
+        slowest = sorted(self.events, key=lambda event: -event["dur"])
+        for event in slowest[:top]:
+            tags = " ".join(
+                f"{key}={value}" for key, value in event["args"].items()
+            )
+            line = f"  {event['dur'] / 1000:10.1f} ms  {event['name']}  {tags}"
+            lines.append(line.rstrip())
+        return "\n".join(lines)
+
+
+def start(origin=None):
+    """Turn tracing on in this process and return the tracer."""
+    global _tracer
+    _tracer = Tracer(origin)
+    return _tracer
+
+
+def stop():
+    """Turn tracing off and return the tracer that was active."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def active():
+    """Return the active tracer, or None while tracing is off."""
+    return _tracer
+
+
+def span(name, **args):
+    """Time a ``with`` block as a span tagged with ``args``."""
+    if _tracer is None:
+        return _NULL_SPAN
+    return _Span(_tracer, name, args)
@@ -1,27 +1,181 @@
 """Utility functions for grant processing."""
 
 import re
+from collections import namedtuple
+
+# The passes of strip_markdown_formatting, in order: a pattern, its
+# replacement, and where a match could still run past the end of the
+# text read so far (used when streaming).
+_PASSES = [
+    (re.compile(pattern, flags), replacement, re.compile(tail, flags))
+    for pattern, replacement, tail, flags in [
+        # Remove headers
+        (r"^#+\s+", "", r"^#+\s*\Z", re.MULTILINE),
+        # Remove bold/italic
+        (r"\*\*([^*]+)\*\*", r"\1", r"\*(?:\*(?:[^*]+\*?)?)?\Z", 0),
+        (r"\*([^*]+)\*", r"\1", r"\*[^*]*\Z", 0),
+        (r"__([^_]+)__", r"\1", r"_(?:_(?:[^_]+_?)?)?\Z", 0),
+        (r"_([^_]+)_", r"\1", r"_[^_]*\Z", 0),
+        # Remove links but keep text
+        (
+            r"\[([^\]]+)\]\([^\)]+\)",
+            r"\1",
+            r"\[(?:[^\]]+(?:\](?:\([^\)]*)?)?)?\Z",
+            0,
+        ),
+        # Remove list markers
+        (r"^\s*[-*+]\s+", "", r"^\s*(?:[-*+]\s*)?\Z", re.MULTILINE),
+        (r"^\s*\d+\.\s+", "", r"^\s*(?:\d+(?:\.\s*)?)?\Z", re.MULTILINE),
+        # Remove code blocks
+        (r"```[^`]*```", "", r"`{1,3}\Z|```[^`]*`{0,2}\Z", re.DOTALL),
+        (r"`([^`]+)`", r"\1", r"`[^`]*\Z", 0),
+        # Remove blockquotes
+        (r"^>\s+", "", r"^>\s*\Z", re.MULTILINE),
+        # Clean up extra whitespace
+        (r"\n\n+", "\n\n", r"\n+\Z", 0),
+    ]
+]
+
+COMPLETION_MARKERS = ("[NEEDS TO BE COMPLETED]", "[TO BE COMPLETED]")
+# Streamed files are read in blocks of about this many characters, and
+# a pass holds back at most this many waiting for a match to close.
+STREAM_BLOCK_SIZE = 1 << 16
+STREAM_BLOCK_LIMIT = 1 << 22
+
+MarkdownStats = namedtuple(
+    "MarkdownStats",
+    [
+        "plain_text",
+        "char_count",
+        "word_count",
+        "needs_completion",
+        "head",
+        "exceeded",
+    ],
+)
 
 
 def strip_markdown_formatting(text):
     """Remove markdown formatting to get plain text."""
-    # Remove headers
-    text = re.sub(r"^#+\s+", "", text, flags=re.MULTILINE)
-    # Remove bold/italic
-    text = re.sub(r"\*\*([^*]+)\*\*", r"\1", text)
-    text = re.sub(r"\*([^*]+)\*", r"\1", text)
-    text = re.sub(r"__([^_]+)__", r"\1", text)
-    text = re.sub(r"_([^_]+)_", r"\1", text)
-    # Remove links but keep text
-    text = re.sub(r"\[([^\]]+)\]\([^\)]+\)", r"\1", text)
-    # Remove list markers
-    text = re.sub(r"^\s*[-*+]\s+", "", text, flags=re.MULTILINE)
-    text = re.sub(r"^\s*\d+\.\s+", "", text, flags=re.MULTILINE)
-    # Remove code blocks
-    text = re.sub(r"```[^`]*```", "", text, flags=re.DOTALL)
-    text = re.sub(r"`([^`]+)`", r"\1", text)
-    # Remove blockquotes
-    text = re.sub(r"^>\s+", "", text, flags=re.MULTILINE)
-    # Clean up extra whitespace
-    text = re.sub(r"\n\n+", "\n\n", text)
+    for pattern, replacement, _ in _PASSES:
+        text = pattern.sub(replacement, text)
     return text.strip()
+
+
+def analyze_markdown(text):
+    """Return ``(plain_text, char_count, word_count)`` for markdown."""
+    plain_text = strip_markdown_formatting(text)
+    return plain_text, len(plain_text), len(plain_text.split())
+
+
+def _substitute(pattern, replacement, text, tail):
+    """Run one pass over ``text[1:]`` up to where ``tail`` first matches."""
+    hold = _hold(tail, text, 1)
+    pieces = []
+    pos = 1
+    for match in pattern.finditer(text, 1):
+        if match.start() >= hold:
+            break
+        # Grouped passes keep group 1; the others insert ``replacement``.
+        kept = match[1] if pattern.groups else replacement
+        pieces += [text[pos : match.start()], kept]
+        pos = match.end()
+        if pos > hold:
+            hold = _hold(tail, text, pos)
+    pieces.append(text[pos:hold])
+    return "".join(pieces), hold
+
+
+def _hold(tail, text, pos):
+    match = tail.search(text, pos) if tail is not None else None
+    return match.start() if match else len(text)
+
+
+def _stream_pass(pieces, pattern, replacement, tail, limit):
+    """Apply one pass to text arriving in ``pieces``, yielding the result."""
+    held = "\n"
+    for piece in pieces:
+        held += piece
+        output, hold = _substitute(
+            pattern, replacement, held, tail if len(held) <= limit else None
+        )
+        held = held[hold - 1 :]
+        if output:
+            yield output
+    output, _ = _substitute(pattern, replacement, held, None)
+    if output:
+        yield output
+
+
+def analyze_markdown_file(
+    path,
+    char_limit=None,
+    word_limit=None,
+    block_size=STREAM_BLOCK_SIZE,
+    block_limit=STREAM_BLOCK_LIMIT,
+):
+    """Analyze a response file like ``analyze_markdown``, in blocks."""
+    needs_completion = False
+    head = None
+
+    def blocks():
+        nonlocal needs_completion, head
+        block = []
+        size = 0
+        with open(path) as lines:
+            for line in lines:
+                if size >= block_size and not line[:1].isspace():
+                    text = "".join(block)
+                    if head is None and not text.isspace():
+                        head = text
+                    yield text
+                    block.clear()
+                    size = 0
+                block.append(line)
+                size += len(line)
+                needs_completion = needs_completion or any(
+                    marker in line for marker in COMPLETION_MARKERS
+                )
+        text = "".join(block)
+        if head is None and text and not text.isspace():
+            head = text
+        yield text
+
+    stream = blocks()
+    for pattern, replacement, tail in _PASSES:
+        stream = _stream_pass(stream, pattern, replacement, tail, block_limit)
+
+    # The plain text is stripped as it arrives: ``first`` and ``last``
+    # bound its non-whitespace characters.
+    pieces = []
+    length = word_count = 0
+    first = last = None
+    in_word = exceeded = False
+    for piece in stream:
+        pieces.append(piece)
+        stripped = piece.strip()
+        if stripped:
+            if first is None:
+                first = length + len(piece) - len(piece.lstrip())
+            last = length + len(piece.rstrip())
+            words = len(stripped.split())
+            word_count += words - (in_word and not piece[0].isspace())
+        in_word = not piece[-1].isspace()
+        length += len(piece)
+        char_count = 0 if first is None else last - first
+        exceeded = bool(
+            (char_limit and char_count > char_limit)
+            or (word_limit and word_count > word_limit)
+        )
+        if exceeded:
+            stream.close()
+            break
+    plain_text = "".join(pieces).strip()
+    return MarkdownStats(
+        plain_text,
+        len(plain_text),
+        word_count,
+        needs_completion,
+        head or "",
+        exceeded,
+    )
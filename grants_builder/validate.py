@@ -0,0 +1,151 @@
+"""Check grant responses against their limits without building."""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yaml
+
+from .builder import (
+    STREAM_THRESHOLD,
+    limit_violations,
+    plan_grant,
+    starts_with_question,
+)
+from .repo_index import RepoIndex
+from .utils import analyze_markdown, analyze_markdown_file
+
+# Issues that fail validation; anything else is a warning unless the
+# caller asks for strict checking.
+ERROR_KINDS = (
+    "char_limit",
+    "word_limit",
+    "invalid_yaml",
+    "invalid_questions",
+    "unreadable_file",
+)
+
+
+def _issue(kind, message, grant_id, scope=None, section=None, path=None):
+    return {
+        "severity": "error" if kind in ERROR_KINDS else "warning",
+        "kind": kind,
+        "grant": grant_id,
+        "scope": scope,
+        "section": section,
+        "file": str(path) if path is not None else None,
+        "message": message,
+    }
+
+
+def validate_grant(grant_id, grant_config):
+    """Return every issue found in one grant and how many sections it has."""
+    grant_path = Path(grant_config["path"])
+    index = RepoIndex.scan(grant_path)
+    if not index.exists(grant_path):
+        return [
+            _issue(
+                "missing_grant",
+                f"{grant_path} not found",
+                grant_id,
+                path=grant_path,
+            )
+        ], 0
+
+    try:
+        plan = plan_grant(grant_id, grant_config, index=index)
+    except yaml.YAMLError as e:
+        return [_issue("invalid_yaml", str(e), grant_id)], 0
+    except KeyError as e:
+        return [
+            _issue("invalid_questions", f"A section has no {e} key", grant_id)
+        ], 0
+    except (OSError, UnicodeDecodeError) as e:
+        return [_issue("unreadable_file", str(e), grant_id)], 0
+
+    issues = []
+    checked = 0
+    for group in plan.groups:
+        for section_key, section_data in group.sections.items():
+            checked += 1
+            response_file = group.base_path / section_data["file"]
+            located = dict(
+                grant_id=grant_id,
+                scope=group.scope,
+                section=section_key,
+                path=response_file,
+            )
+            char_limit = section_data.get("char_limit")
+            word_limit = section_data.get("word_limit")
+            stat = index.stat(response_file)
+            if stat is None:
+                issues.append(
+                    _issue(
+                        "missing_file", f"{response_file} not found", **located
+                    )
+                )
+                continue
+            try:
+                if stat.size > STREAM_THRESHOLD:
+                    stats = analyze_markdown_file(
+                        response_file, char_limit, word_limit
+                    )
+                    response_head = stats.head
+                else:
+                    stats = None
+                    response_markdown = response_file.read_text()
+                    response_head = response_markdown
+            except (OSError, UnicodeDecodeError) as e:
+                issues.append(
+                    _issue(
+                        "unreadable_file",
+                        f"Cannot read {response_file}: {e}",
+                        **located,
+                    )
+                )
+                continue
+
+            question_text = section_data.get("question", "")
+            if starts_with_question(response_head, question_text):
+                issues.append(
+                    _issue(
+                        "leading_h1",
+                        f"{response_file.name} starts with question text; "
+                        f"remove the H1 header '# {question_text[:50]}'",
+                        **located,
+                    )
+                )
+
+            if not (char_limit or word_limit):
+                continue
+            if stats is None:
+                _, char_count, word_count = analyze_markdown(response_markdown)
+                exact = True
+            else:
+                _, char_count, word_count = stats[:3]
+                exact = not stats.exceeded
+            for kind, message in limit_violations(
+                section_key,
+                char_count,
+                word_count,
+                char_limit,
+                word_limit,
+                exact,
+            ):
+                issues.append(_issue(kind, message, **located))
+    return issues, checked
+
+
+def validate_grants(grants, jobs=None):
+    """Validate every grant in ``grants`` on a thread pool."""
+    with ThreadPoolExecutor(jobs) as pool:
+        results = list(pool.map(validate_grant, grants, grants.values()))
+
+    issues = [issue for grant_issues, _ in results for issue in grant_issues]
+    errors = sum(issue["severity"] == "error" for issue in issues)
+    return {
+        "grants": len(grants),
+        "sections": sum(checked for _, checked in results),
+        "errors": errors,
+        "warnings": len(issues) - errors,
+        "issues": issues,
+    }
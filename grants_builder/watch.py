@@ -0,0 +1,310 @@
+"""Watch grant sources and rebuild only what changed."""
+
+import os
+import time
+from pathlib import Path
+
+from .builder import assemble_grant, plan_grant, process_sections
+from .config_cache import load_yaml
+from .exporter import DEFAULT_EXPORT_BACKEND, export_backend
+from .output import (
+    DEFAULT_SCHEMA,
+    GrantsDataStream,
+    JsonWriter,
+    write_sharded,
+)
+from .pandoc_server import PandocServer
+from .repo_index import RepoIndex
+from .scheduler import ExportScheduler
+
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_DEBOUNCE = 0.3
+DEFAULT_EXPORT_DELAY = 5.0
+
+
+def _stat(path):
+    """Return what a poll compares for ``path``, or None if it is gone."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class GrantWatcher:
+    """Poll grant sources and rebuild the smallest affected part."""
+
+    def __init__(
+        self,
+        registry_path="grant_registry.yaml",
+        docs_path="docs",
+        interval=DEFAULT_POLL_INTERVAL,
+        debounce=DEFAULT_DEBOUNCE,
+        export_delay=DEFAULT_EXPORT_DELAY,
+        sharded=False,
+        production=False,
+        export_cache=None,
+        schema=DEFAULT_SCHEMA,
+        pandoc_server=True,
+        backend=DEFAULT_EXPORT_BACKEND,
+    ):
+        self.registry_path = Path(registry_path)
+        self.docs_path = Path(docs_path)
+        self.interval = interval
+        self.debounce = debounce
+        self.export_delay = export_delay
+        self.sharded = sharded
+        self.schema = schema
+        self.writer = JsonWriter(production=production)
+        # One server for the whole session, so every export after the
+        # first is posted to an already running pandoc
+        self.backend = export_backend(
+            backend, server=PandocServer() if pandoc_server else None
+        )
+        self.scheduler = ExportScheduler(
+            cache=export_cache, backend=self.backend
+        )
+
+        self.registry = {}
+        self.plans = {}
+        self.group_responses = {}
+        self.grants_data = {}
+        # Grants whose last build failed
+        self.failed = set()
+        # Grant id -> its serialized grants_data.json member
+        self.encoded = {}
+        # Watched path -> [(grant_id, group_index, section_key)]; a
+        # group index of None re-plans the whole grant.
+        self.targets = {}
+        self.snapshot = {}
+        self.changed = set()
+        self.last_change = 0.0
+        # (grant_id, response_key) -> (deadline, ExportJob)
+        self.pending_exports = {}
+        self.now = time.monotonic
+
+    def build_all(self):
+        """Load the registry and build every grant from scratch."""
+        self.registry = load_yaml(self.registry_path)["grants"]
+        self.plans = {}
+        self.group_responses = {}
+        self.grants_data = {}
+        self.failed = set()
+        self.encoded = {}
+        for grant_id in self.registry:
+            self._build_grant(grant_id)
+        self._index()
+        self._write()
+        print(f"✅ Built {len(self.grants_data)} grants")
+        if self.failed:
+            print(f"❌ {len(self.failed)} grants failed to build")
+
+    def _build_grant(self, grant_id):
+        """Plan and process a grant, reporting rather than raising errors."""
+        grant_config = self.registry[grant_id]
+        self.encoded.pop(grant_id, None)
+        self.failed.discard(grant_id)
+        if not Path(grant_config["path"]).exists():
+            print(f"Warning: {grant_config['path']} not found")
+            self.plans.pop(grant_id, None)
+            self.grants_data.pop(grant_id, None)
+            return
+
+        try:
+            plan = plan_grant(grant_id, grant_config)
+            group_responses = [
+                self._process(grant_id, group, group.sections)
+                for group in plan.groups
+            ]
+        except Exception as e:
+            print(f"❌ {grant_id}: {str(e).strip()}")
+            self.failed.add(grant_id)
+            self.plans.pop(grant_id, None)
+            self.group_responses.pop(grant_id, None)
+            return
+        self.plans[grant_id] = plan
+        self.group_responses[grant_id] = group_responses
+        self.grants_data[grant_id] = assemble_grant(
+            grant_id, grant_config, plan, group_responses
+        )
+
+    def _process(self, grant_id, group, sections):
+        """Process some sections of a group, deferring their exports."""
+        grant_config = self.registry[grant_id]
+        scheduler = ExportScheduler()
+        responses = process_sections(
+            Path(grant_config["path"]),
+            group.base_path,
+            sections,
+            grant_id,
+            grant_config["name"],
+            grant_config["foundation"],
+            scope=group.scope,
+            scheduler=scheduler,
+        )
+        deadline = self.now() + self.export_delay
+        for job in scheduler.jobs:
+            self.pending_exports[(grant_id, job.response_key)] = (
+                deadline,
+                job,
+            )
+        return responses
+
+    def _index(self):
+        """Map every input to what has to be rebuilt when it changes."""
+        targets = {self.registry_path: [None]}
+        for grant_id, grant_config in self.registry.items():
+            targets.setdefault(Path(grant_config["path"]), []).append(
+                (grant_id, None, None)
+            )
+        for grant_id, plan in self.plans.items():
+            response_files = {}
+            for index, group in enumerate(plan.groups):
+                for key, item in group.sections.items():
+                    path = group.base_path / item["file"]
+                    response_files.setdefault(path, []).append(
+                        (grant_id, index, key)
+                    )
+            for path in plan.inputs:
+                path = Path(path)
+                if path in response_files:
+                    targets[path] = response_files[path]
+                else:
+                    targets.setdefault(path, []).append((grant_id, None, None))
+        for grant_id in self.failed:
+            # Without a plan, any file may be the one that fixes it
+            grant_path = self.registry[grant_id]["path"]
+            for path in RepoIndex.scan(grant_path).entries:
+                targets.setdefault(Path(path), []).append(
+                    (grant_id, None, None)
+                )
+
+        self.targets = targets
+        self.snapshot = {path: _stat(path) for path in targets}
+
+    def poll(self):
+        """Check every watched path once and act on settled changes."""
+        now = self.now()
+        for path in self.targets:
+            stat = _stat(path)
+            if stat != self.snapshot.get(path):
+                self.snapshot[path] = stat
+                self.changed.add(path)
+                self.last_change = now
+
+        if self.changed and now - self.last_change >= self.debounce:
+            changed, self.changed = self.changed, set()
+            try:
+                self._apply(changed)
+            except Exception as e:
+                print(f"❌ {e}")
+        self.run_exports(now)
+
+    def _apply(self, changed):
+        if self.registry_path in changed:
+            print("🔄 Registry changed, rebuilding everything")
+            self.build_all()
+            return
+
+        replan = set()
+        sections = {}
+        for path in changed:
+            for grant_id, index, key in self.targets[path]:
+                if index is None:
+                    replan.add(grant_id)
+                else:
+                    sections.setdefault((grant_id, index), set()).add(key)
+
+        for grant_id in sorted(replan):
+            print(f"🔄 {grant_id}: rebuilding grant")
+            self._build_grant(grant_id)
+
+        for (grant_id, index), keys in sorted(sections.items()):
+            if grant_id in replan:
+                continue
+            print(f"🔄 {grant_id}: rebuilding {', '.join(sorted(keys))}")
+            try:
+                self._rebuild_sections(grant_id, index, keys)
+            except Exception as e:
+                # The sections keep their last good output
+                print(f"❌ {grant_id}: {str(e).strip()}")
+
+        if replan:
+            self._index()
+        self._write({grant_id for grant_id, _ in sections} | replan)
+
+    def _rebuild_sections(self, grant_id, index, keys):
+        plan = self.plans[grant_id]
+        group = plan.groups[index]
+        fresh = self._process(
+            grant_id, group, {key: group.sections[key] for key in keys}
+        )
+        self.encoded.pop(grant_id, None)
+        previous = self.group_responses[grant_id][index]
+        # Keep the questions file's order, as a full build would
+        self.group_responses[grant_id][index] = {
+            key: fresh[key] if key in keys else previous[key]
+            for key in group.sections
+            if key in fresh or (key not in keys and key in previous)
+        }
+        self.grants_data[grant_id] = assemble_grant(
+            grant_id,
+            self.registry[grant_id],
+            plan,
+            self.group_responses[grant_id],
+        )
+
+    def _write(self, grant_ids=None):
+        """Rewrite the output, limited to ``grant_ids`` where possible."""
+        grants_data = {
+            grant_id: self.grants_data[grant_id]
+            for grant_id in self.registry
+            if grant_id in self.grants_data
+        }
+        self.docs_path.mkdir(exist_ok=True)
+        if self.sharded:
+            write_sharded(
+                grants_data,
+                self.docs_path,
+                writer=self.writer,
+                grant_ids=grant_ids,
+            )
+            return
+        with GrantsDataStream(
+            self.docs_path, writer=self.writer, schema=self.schema
+        ) as stream:
+            for grant_id, grant_data in grants_data.items():
+                if grant_id not in self.encoded:
+                    self.encoded[grant_id] = stream.encode(
+                        grant_id, grant_data
+                    )
+                stream.add_encoded(self.encoded[grant_id])
+            stream.close()
+
+    def run_exports(self, now=None, force=False):
+        """Run the exports whose sections have been quiet long enough."""
+        now = self.now() if now is None else now
+        due = [
+            key
+            for key, (deadline, _) in self.pending_exports.items()
+            if force or deadline <= now
+        ]
+        if not due:
+            return
+        for key in due:
+            _, job = self.pending_exports.pop(key)
+            self.scheduler.jobs.append(job)
+        self.scheduler.run()
+
+    def run(self):
+        """Build once, then poll until interrupted."""
+        self.build_all()
+        print(f"👀 Watching {len(self.targets)} paths (Ctrl+C to stop)")
+        try:
+            while True:
+                self.poll()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            self.run_exports(force=True)
+        finally:
+            self.backend.close()
@@ -7,11 +7,19 @@ setup(
     version="0.1.0",
     packages=find_packages(),
     install_requires=["pyyaml>=6.0"],
-    extras_require={"dev": ["pytest>=7.0", "black>=23.0"]},
+    extras_require={
+        "dev": ["pytest>=7.0", "black>=23.0"],
+        "production": ["orjson>=3.0", "brotli>=1.0"],
+    },
     entry_points={
         "console_scripts": [
             "grants-build=grants_builder.cli:build",
+            "grants-duplicates=grants_builder.cli:duplicates",
+            "grants-history=grants_builder.cli:history",
+            "grants-merge=grants_builder.cli:merge",
+            "grants-serve=grants_builder.cli:serve",
             "grants-validate=grants_builder.cli:validate",
+            "grants-watch=grants_builder.cli:watch",
         ]
     },
 )
@@ -0,0 +1,148 @@
+"""Shared fixtures for grants_builder tests."""
+
+import os
+import stat
+import sys
+
+import pytest
+import yaml
+
+from grants_builder.export_cache import tool_version
+
+FAKE_PANDOC = """#!/bin/sh
+# Copy the input markdown to the -o target
+[ "$1" = --version ] && echo "pandoc 3.1" && exit
+while [ "$#" -gt 0 ]; do
+  case "$1" in
+    -o) out="$2"; shift ;;
+    *.md) src="$1" ;;
+  esac
+  shift
+done
+echo call >> "$TOOL_LOG_DIR/pandoc.log"
+cp "$src" "$out"
+"""
+
+FAKE_SOFFICE = """#!/bin/sh
+# Record the call and "convert" every .docx into --outdir
+if [ "$1" = --version ]; then
+  echo version >> "$TOOL_LOG_DIR/soffice-version.log"
+  echo "LibreOffice 7.6"
+  exit
+fi
+echo call >> "$TOOL_LOG_DIR/soffice.log"
+while [ "$#" -gt 0 ]; do
+  case "$1" in
+    --outdir) outdir="$2"; shift ;;
+    *.docx) cp "$1" "$outdir/$(basename "$1" .docx).pdf" ;;
+  esac
+  shift
+done
+"""
+
+FAKE_PANDOC_SERVER = """#!{python}
+# Answer pandoc-server requests by echoing the posted markdown
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.reply(200, b"3.1")
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        options = json.loads(self.rfile.read(length))
+        log_path = os.path.join(os.environ["TOOL_LOG_DIR"], "server.log")
+        with open(log_path, "a") as log:
+            log.write(json.dumps(options) + "\\n")
+        if "FAIL" in options["text"]:
+            self.reply(500, b"bad input")
+        else:
+            self.reply(200, options["text"].encode())
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+port = int(sys.argv[sys.argv.index("--port") + 1])
+ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+"""
+
+
+def _install_tool(bin_dir, name, script):
+    path = bin_dir / name
+    path.write_text(script)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+
+@pytest.fixture
+def fake_tools(tmp_path, monkeypatch):
+    """Put fake pandoc/soffice on PATH; returns the dir holding call logs."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    _install_tool(bin_dir, "pandoc", FAKE_PANDOC)
+    _install_tool(bin_dir, "soffice", FAKE_SOFFICE)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("TOOL_LOG_DIR", str(tmp_path))
+    # Versions are cached per tool name, which now finds the fakes
+    tool_version.cache_clear()
+    yield tmp_path
+    tool_version.cache_clear()
+
+
+@pytest.fixture
+def fake_pandoc_server(fake_tools):
+    """Also put a fake pandoc-server on PATH; its requests go to server.log."""
+    _install_tool(
+        fake_tools / "bin",
+        "pandoc-server",
+        FAKE_PANDOC_SERVER.format(python=sys.executable),
+    )
+    return fake_tools
+
+
+@pytest.fixture
+def write_registry(tmp_path):
+    """Return ``write(grants)``, which creates a registry under tmp_path.
+
+    ``grants`` maps each grant id to its registry fields, which default
+    to a draft grant at ``<id>/``, plus ``files``: paths under the grant
+    directory and their contents, dumped as YAML unless a string.
+    Returns the root directory.
+    """
+
+    def write(grants, root=tmp_path):
+        registry = {}
+        for grant_id, fields in grants.items():
+            fields = dict(fields)
+            for relative, content in fields.pop("files", {}).items():
+                path = root / grant_id / relative
+                path.parent.mkdir(parents=True, exist_ok=True)
+                if not isinstance(content, str):
+                    content = yaml.safe_dump(content, sort_keys=False)
+                path.write_text(content)
+            registry[grant_id] = {
+                "name": grant_id.title(),
+                "foundation": f"{grant_id.title()} Foundation",
+                "status": "draft",
+                "amount_requested": 1000,
+                "path": f"{grant_id}/",
+                **fields,
+            }
+        (root / "grant_registry.yaml").write_text(
+            yaml.safe_dump({"grants": registry}, sort_keys=False)
+        )
+        return root
+
+    return write
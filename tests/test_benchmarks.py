@@ -0,0 +1,61 @@
+"""Tests for the benchmark corpus and regression check."""
+
+import json
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.run import compare, run_benchmarks
+from grants_builder import builder
+from grants_builder.builder import plan_grant
+from grants_builder.converters import Converters
+
+
+def test_corpus_covers_every_layout(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generate_corpus(tmp_path, grants=5, sections=3)
+    assert (tmp_path / "grant-0000" / "questions.yaml").exists()
+    assert (tmp_path / "grant-0002" / "nsf_config.yaml").exists()
+    assert (tmp_path / "grant-0003" / "grant-0003_questions.yaml").exists()
+    assert (tmp_path / "grant-0004" / "reports").is_dir()
+
+    plan = plan_grant("grant-0004", {"path": "grant-0004/"})
+    assert plan.has_new_structure
+    assert [group.scope for group in plan.groups][0] == "application"
+
+    # Deterministic for a given seed
+    other = tmp_path / "other"
+    generate_corpus(other, grants=5, sections=3)
+    assert (other / "grant-0001" / "questions.yaml").read_text() == (
+        tmp_path / "grant-0001" / "questions.yaml"
+    ).read_text()
+
+
+def test_benchmarks_run_without_converters(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generate_corpus(tmp_path, grants=5, sections=3)
+    monkeypatch.setenv("PATH", "")
+
+    def unused(*args, **kwargs):
+        raise AssertionError("benchmarks looked for a converter")
+
+    monkeypatch.setattr(Converters, "probe", unused)
+    monkeypatch.setattr(builder, "PandocServer", unused)
+    results = run_benchmarks(repeat=1)
+
+    assert set(results) == {
+        "strip_markdown_formatting",
+        "process_sections",
+        "process_grant",
+        "build_all_grants",
+        "_corpus",
+    }
+    assert results["_corpus"]["grants"] == 5
+    assert json.loads((tmp_path / "docs" / "grants_index.json").read_text())
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"fast": 1.0, "slow": 1.0}
+    lines, regressed = compare({"fast": 1.1, "slow": 1.1}, baseline, 0.2)
+    assert not regressed
+    lines, regressed = compare({"fast": 1.1, "slow": 1.3}, baseline, 0.2)
+    assert regressed
+    assert "regression" in lines[1] and "regression" not in lines[0]
@@ -2,7 +2,7 @@
 
 import pytest
 from pathlib import Path
-from grants_builder.utils import strip_markdown_formatting
+from grants_builder.utils import analyze_markdown, strip_markdown_formatting
 
 
 def test_strip_markdown_headers():
@@ -37,3 +37,54 @@ def test_character_counting():
     assert len(plain) < len(text)
     assert "**" not in plain
     assert "[" not in plain
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "# Title\n\nSome **bold** and *italic* text.\n\n\n\n- one\n- two",
+        "1. First\n2. Second with `code`\n\n> Quoted [link](https://x.org)",
+        "Before\n\n```\nfenced block\n```\n\nAfter",
+        "",
+    ],
+)
+def test_analyze_markdown_counts(text):
+    """Counts match the stripped text they were accumulated from."""
+    plain, char_count, word_count = analyze_markdown(text)
+    assert plain == strip_markdown_formatting(text)
+    assert char_count == len(plain)
+    assert word_count == len(plain.split())
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("*", "*"),
+        ("a\n*", "a\n*"),
+        ("end\n-", "end\n-"),
+        ("end\n-\nnext", "end\nnext"),
+        ("a\n#", "a\n#"),
+        ("a\n# ", "a"),
+        ("- 1.", "1."),
+        ("end\n- ", "end"),
+        ("> quote\n>", "quote\n>"),
+    ],
+)
+def test_strip_markdown_last_line(text, expected):
+    """A marker needs whitespace after it on a line with no newline."""
+    assert strip_markdown_formatting(text) == expected
+
+
+def test_strip_markdown_matches_regex_quirks():
+    """Behaviour the original regex cascade had is preserved."""
+    # Italic pairs across bold, and across lines
+    assert strip_markdown_formatting("*a **b** c*") == "a b c"
+    assert strip_markdown_formatting("*one\ntwo*") == "one\ntwo"
+    # Unpaired markers and snake_case with a single underscore survive
+    assert strip_markdown_formatting("2 * 3 and snake_case") == (
+        "2 * 3 and snake_case"
+    )
+    # List markers swallow the blank lines in front of them
+    assert strip_markdown_formatting("Intro\n\n- item") == "Intro\nitem"
+    # Fenced code disappears entirely, inline code keeps its text
+    assert strip_markdown_formatting("a ```x``` b `c`") == "a  b c"
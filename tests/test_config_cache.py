@@ -0,0 +1,50 @@
+"""Tests for the parsed-YAML cache."""
+
+import datetime
+import os
+
+from grants_builder.config_cache import ConfigCache, load_yaml
+
+
+def test_unchanged_files_are_not_reparsed(tmp_path):
+    config = tmp_path / "grant.yaml"
+    config.write_text("deadline: 2025-12-01\nitems: [a, b]\n")
+    cache_path = tmp_path / "cache" / "config.pickle"
+
+    cache = ConfigCache.load(cache_path)
+    data = load_yaml(config, cache)
+    assert data == {
+        "deadline": datetime.date(2025, 12, 1),
+        "items": ["a", "b"],
+    }
+    assert (cache.hits, cache.misses) == (0, 1)
+    cache.save()
+
+    cache = ConfigCache.load(cache_path)
+    assert load_yaml(config, cache) == data
+    assert (cache.hits, cache.misses) == (1, 0)
+
+    # Same size, new mtime
+    config.write_text("deadline: 2026-12-01\nitems: [c, d]\n")
+    stat = config.stat()
+    os.utime(config, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load_yaml(config, cache)["items"] == ["c", "d"]
+    assert cache.misses == 1
+
+
+def test_unusable_or_stale_cache_starts_fresh(tmp_path):
+    config = tmp_path / "questions.yaml"
+    config.write_text("sections: {}\n")
+    cache_path = tmp_path / "config.pickle"
+    cache_path.write_bytes(b"not a pickle")
+
+    cache = ConfigCache.load(cache_path)
+    assert cache.entries == {}
+    load_yaml(config, cache)
+    cache.save()
+
+    config.unlink()
+    cache = ConfigCache.load(cache_path)
+    assert len(cache.entries) == 1
+    cache.save()
+    assert ConfigCache.load(cache_path).entries == {}
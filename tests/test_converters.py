@@ -0,0 +1,64 @@
+"""Tests for the converter probe and circuit breaker."""
+
+from grants_builder.converters import Converters
+from grants_builder.export_cache import ExportCache
+from grants_builder.scheduler import ExportScheduler
+
+FAILING_SOFFICE = """#!/bin/sh
+[ "$1" = --version ] && echo "LibreOffice 7.6" && exit
+echo call >> "$TOOL_LOG_DIR/soffice.log"
+exit 1
+"""
+
+
+def test_probe_finds_tools_once(fake_tools):
+    converters = Converters.probe()
+    assert converters.versions == {
+        "pandoc": "pandoc 3.1",
+        "soffice": "LibreOffice 7.6",
+        "xelatex": None,
+    }
+    assert converters.available("soffice")
+    assert not converters.available("xelatex")
+    assert converters.describe() == [
+        "   xelatex unavailable (xelatex not found)"
+    ]
+    assert not (fake_tools / "soffice.log").exists()
+
+
+def test_probe_shares_versions_with_cache_keys(tmp_path, fake_tools):
+    """Probing and keying an export read ``soffice --version`` once."""
+    Converters.probe()
+    ExportCache(tmp_path / "cache").key("# Doc", [], ["soffice"])
+    log = fake_tools / "soffice-version.log"
+    assert log.read_text().splitlines() == ["version"]
+
+
+def test_breaker_trips_after_consecutive_failures():
+    converters = Converters({"soffice": "7.6"}, threshold=2)
+    converters.failed("soffice")
+    converters.succeeded("soffice")
+    converters.failed("soffice")
+    assert converters.available("soffice")
+    converters.failed("soffice")
+    assert not converters.available("soffice")
+
+
+def test_broken_soffice_fails_fast(tmp_path, fake_tools):
+    soffice = fake_tools / "bin" / "soffice"
+    soffice.write_text(FAILING_SOFFICE)
+
+    scheduler = ExportScheduler(
+        converters=Converters.probe(threshold=2), batch_size=1
+    )
+    section = {"title": "Summary", "question": "What?"}
+    for grant_id in "abcdef":
+        scheduler.submit(
+            grant_id, "Grant", "Fdn", "summary", section, "Hi", tmp_path
+        )
+    jobs = scheduler.run()
+
+    # Two failed batches trip soffice; nothing else runs it
+    assert (fake_tools / "soffice.log").read_text().count("call") == 2
+    assert all("docx" in job.done and "pdf" not in job.done for job in jobs)
+    assert jobs[-1].errors == ["Failed to export PDF: no working converter"]
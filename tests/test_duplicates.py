@@ -0,0 +1,86 @@
+"""Tests for near-duplicate paragraph detection."""
+
+from grants_builder.duplicates import (
+    SignatureCache,
+    find_duplicates,
+    iter_responses,
+    minhash,
+    shingles,
+    similarity,
+)
+
+MISSION = (
+    "PolicyEngine computes the impact of public policy for the world. "
+    "We build free open-source software that lets anyone calculate how "
+    "taxes and benefits affect their household and society."
+)
+DRIFTED = MISSION.replace("for the world", "for everyone").replace(
+    "their household", "their family"
+)
+OTHER = (
+    "The budget covers two engineers for eighteen months, cloud hosting "
+    "for the public API, and travel to three partner convenings."
+)
+
+
+def test_similarity_estimates_jaccard():
+    mission, drifted = shingles(MISSION), shingles(DRIFTED)
+    jaccard = len(mission & drifted) / len(mission | drifted)
+    estimate = similarity(minhash(mission), minhash(drifted))
+    assert abs(estimate - jaccard) < 0.2
+    assert similarity(minhash(mission), minhash(mission)) == 1
+    assert similarity(minhash(mission), minhash(shingles(OTHER))) < 0.2
+
+
+def test_drifted_copies_are_reported_across_grants():
+    responses = [
+        ("pbif", "responses", "mission", f"Intro.\n\n{MISSION}"),
+        ("neo", "application", "mission", f"{DRIFTED}\n\n{OTHER}"),
+        # A copy within one response is not a reuse between grants
+        ("gitlab", "responses", "budget", f"{OTHER}\n\n{OTHER}"),
+    ]
+    report = find_duplicates(responses, threshold=0.3)
+
+    assert report["sections"] == 3
+    assert report["paragraphs"] == 5
+    pairs = [
+        [(p["grant"], p["paragraph"]) for p in pair["paragraphs"]]
+        for pair in report["pairs"]
+    ]
+    assert [("pbif", 1), ("neo", 0)] in pairs
+    assert [("neo", 1), ("gitlab", 0)] in pairs
+    assert [("gitlab", 0), ("gitlab", 1)] not in pairs
+    assert all(pair["similarity"] >= 0.3 for pair in report["pairs"])
+    assert report["pairs"][0]["similarity"] == 1
+
+
+def test_signatures_are_cached_per_section(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "demo" / "responses").mkdir(parents=True)
+    (tmp_path / "demo" / "questions.yaml").write_text(
+        "sections:\n"
+        "  mission:\n"
+        "    title: Mission\n"
+        "    file: responses/mission.md\n"
+        "  budget:\n"
+        "    title: Budget\n"
+        "    file: responses/budget.md\n"
+    )
+    (tmp_path / "demo" / "responses" / "mission.md").write_text(MISSION)
+    (tmp_path / "demo" / "responses" / "budget.md").write_text(OTHER)
+    grants = {"demo": {"path": "demo/"}}
+
+    cache = SignatureCache.load(tmp_path / "minhash.pickle")
+    first = find_duplicates(iter_responses(grants), cache=cache)
+    cache.save()
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    (tmp_path / "demo" / "responses" / "budget.md").write_text(DRIFTED)
+    cache = SignatureCache.load(tmp_path / "minhash.pickle")
+    second = find_duplicates(iter_responses(grants), cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first["pairs"] == []
+    assert [p["section"] for p in second["pairs"][0]["paragraphs"]] == [
+        "mission",
+        "budget",
+    ]
@@ -0,0 +1,68 @@
+"""Tests for the export cache."""
+
+import os
+
+from grants_builder.export_cache import ExportCache
+
+
+def test_fetch_places_stored_artifact(tmp_path):
+    """A stored artifact is placed at the requested path on a hit."""
+    cache = ExportCache(tmp_path / "cache")
+    rendered = tmp_path / "rendered.docx"
+    rendered.write_bytes(b"docx bytes")
+
+    key = cache.key("# Doc", ["--to=docx"], [])
+    output = tmp_path / "out.docx"
+    assert not cache.fetch(key, output)
+    cache.store(key, rendered)
+    assert cache.fetch(key, output)
+    assert output.read_bytes() == b"docx bytes"
+    assert cache.key("# Other", ["--to=docx"], []) != key
+
+
+def test_evicts_least_recently_used(tmp_path):
+    """Blobs beyond the size cap are evicted oldest-access first."""
+    cache = ExportCache(tmp_path / "cache", max_bytes=10)
+    source = tmp_path / "source"
+    source.write_bytes(b"12345")
+
+    keys = [cache.key(str(i), [], []) for i in range(3)]
+    cache.store(keys[0], source)
+    cache.store(keys[1], source)
+    blob = cache._blob_path(keys[0])
+    os.utime(blob, ns=(1, 1))
+    cache.store(keys[2], source)
+    # Storing never evicts; that waits for the end of the batch
+    assert blob.exists()
+
+    cache.evict()
+    assert not blob.exists()
+    assert cache._blob_path(keys[1]).exists()
+    assert cache._blob_path(keys[2]).exists()
+    assert cache.size == 10
+
+    # From then on the size is kept without scanning the directory
+    cache.store(keys[2], source)
+    assert cache.size == 10
+    cache.store(keys[0], source)
+    assert cache.size == 15
+    os.utime(cache._blob_path(keys[1]), ns=(1, 1))
+    cache.evict()
+    assert not cache._blob_path(keys[1]).exists()
+    assert cache.size == 10
+
+
+def test_evict_skips_artifacts_being_stored(tmp_path):
+    """Temp files from concurrent stores are neither counted nor evicted."""
+    cache = ExportCache(tmp_path / "cache", max_bytes=10)
+    source = tmp_path / "source"
+    source.write_bytes(b"12345")
+    key = cache.key("doc", [], [])
+    cache.store(key, source)
+    partial = cache._blob_path(key).with_name("in-progress.tmp")
+    partial.write_bytes(b"x" * 100)
+
+    cache.evict()
+    assert partial.exists()
+    assert cache.size == 5
+    assert cache._blob_path(key).exists()
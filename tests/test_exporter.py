@@ -0,0 +1,26 @@
+"""Tests for the exporter."""
+
+from grants_builder.exporter import export_response
+
+
+def test_pdf_reuses_rendered_docx(tmp_path, fake_tools):
+    """Each intermediate is produced once and shared by every format."""
+    exports = export_response(
+        "demo",
+        "Grant",
+        "Fdn",
+        "summary",
+        {"title": "Summary", "question": "What?"},
+        "Hello",
+        tmp_path / "docs" / "exports",
+        formats=("docx", "html", "pdf"),
+    )
+
+    assert exports == {
+        "docx": "exports/demo/summary.docx",
+        "html": "exports/demo/summary.html",
+        "pdf": "exports/demo/summary.pdf",
+    }
+    assert (fake_tools / "pandoc.log").read_text().count("call") == 2
+    assert (fake_tools / "soffice.log").read_text().count("call") == 1
+    assert not list((tmp_path / "docs" / "exports" / "demo").glob("*.temp*"))
@@ -0,0 +1,89 @@
+"""Tests for the build history store."""
+
+import json
+
+from grants_builder.builder import build_all_grants
+from grants_builder.cli import build, history
+from grants_builder.history import BuildHistory
+
+# A grant with an application and one report period
+AIMS = {
+    "sections": {
+        "aims": {"title": "Aims", "file": "aims.md", "word_limit": 10}
+    }
+}
+GRANTS = {
+    "demo": {
+        "status": "awarded",
+        "files": {
+            "application/questions.yaml": AIMS,
+            "application/aims.md": "Two words",
+            "reports/2025-q1/questions.yaml": AIMS,
+            "reports/2025-q1/aims.md": "Two words",
+        },
+    }
+}
+
+
+def test_builds_record_changed_sections(tmp_path, monkeypatch, write_registry):
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+    store = BuildHistory(tmp_path / "history.sqlite")
+
+    build_all_grants(history=store)
+    assert store.recorded == 2
+    build_all_grants(history=store)
+    assert store.recorded == 0
+    (tmp_path / "demo" / "application" / "aims.md").write_text(
+        "Still [TO BE COMPLETED] in progress"
+    )
+    build_all_grants(history=store)
+    assert store.recorded == 1
+
+    samples = store.query(grant_id="demo", section="aims", period="")
+    assert [s["word_count"] for s in samples] == [2, 6]
+    assert [s["build_id"] for s in samples] == [1, 3]
+    assert samples[-1]["status"] == "needs_input"
+    assert samples[-1]["word_percentage"] == 60.0
+    assert [s["period"] for s in store.query(section="aims")] == [
+        "",
+        "2025-q1",
+        "",
+    ]
+    assert store.query(since=samples[-1]["built_at"] + 1) == []
+
+    trends = store.trends()["grants"]["demo"]
+    assert trends["app_aims"]["w"] == [2, 6]
+    assert trends["report_2025-q1_aims"]["s"] == ["complete"]
+    store.close()
+
+
+def test_history_command(tmp_path, monkeypatch, capsys, write_registry):
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+    store = BuildHistory(tmp_path / "history.sqlite")
+    build_all_grants(history=store)
+    store.close()
+    capsys.readouterr()
+
+    history(["demo", "aims", "--period", "2025-q1", "--db", "history.sqlite"])
+    [line] = capsys.readouterr().out.splitlines()
+    assert "demo/2025-q1/aims  2 words  9 chars  complete" in line
+
+    history(["--db", "history.sqlite", "--export", "trends.json"])
+    trends = json.loads((tmp_path / "trends.json").read_text())
+    assert trends["version"] == 1
+    assert set(trends["grants"]["demo"]) == {"app_aims", "report_2025-q1_aims"}
+
+
+def test_history_is_opt_in(tmp_path, monkeypatch, write_registry):
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+    database = tmp_path / ".grants_cache" / "history.sqlite"
+    build([])
+    assert not database.exists()
+
+    build(["--history"])
+    store = BuildHistory(database)
+    assert store.trends()["grants"]["demo"]["app_aims"]["w"] == [2]
+    store.close()
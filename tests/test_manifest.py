@@ -0,0 +1,62 @@
+"""Tests for incremental builds."""
+
+import json
+
+from grants_builder.builder import build_all_grants
+from grants_builder.manifest import BuildManifest
+
+GRANTS = {
+    "demo": {
+        "files": {
+            "questions.yaml": {
+                "sections": {
+                    "summary": {
+                        "title": "Summary",
+                        "file": "responses/summary.md",
+                    },
+                    "budget": {
+                        "title": "Budget",
+                        "file": "responses/budget.md",
+                    },
+                }
+            },
+            "responses/summary.md": "A **short** summary",
+            "responses/budget.md": "Some money",
+        }
+    }
+}
+
+
+def test_incremental_build_reuses_unchanged_sections(
+    tmp_path, monkeypatch, write_registry
+):
+    """Only the edited section is rebuilt and the output is unchanged."""
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+
+    build_all_grants()
+    full = (tmp_path / "docs" / "grants_data.json").read_text()
+
+    build_all_grants(incremental=True)
+    build_all_grants(incremental=True)
+    assert (tmp_path / "docs" / "grants_data.json").read_text() == full
+
+    (tmp_path / "demo" / "responses" / "budget.md").write_text("More money")
+    manifest = BuildManifest.load()
+    build_all_grants(incremental=True)
+    data = json.loads((tmp_path / "docs" / "grants_data.json").read_text())
+    assert data["demo"]["responses"]["budget"]["plainText"] == "More money"
+    assert manifest.sections["demo/responses/summary"]["result"] == (
+        data["demo"]["responses"]["summary"]
+    )
+
+
+def test_manifest_detects_new_files(tmp_path):
+    """A missing input that appears later invalidates the grant."""
+    manifest = BuildManifest(tmp_path / "manifest.json")
+    missing = tmp_path / "later.md"
+    manifest.put_grant("demo", {"path": "x"}, [missing], {"responses": {}})
+    assert manifest.get_grant("demo", {"path": "x"}) == {"responses": {}}
+
+    missing.write_text("now here")
+    assert manifest.get_grant("demo", {"path": "x"}) is None
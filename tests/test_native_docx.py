@@ -0,0 +1,174 @@
+"""Tests for the in-process DOCX renderer."""
+
+import io
+import zipfile
+from xml.dom import minidom
+
+from grants_builder.exporter import (
+    NativeBackend,
+    PandocBackend,
+    export_backend,
+    export_response,
+)
+from grants_builder.native_docx import (
+    parse_blocks,
+    parse_inline,
+    render_docx,
+    rendered_natively,
+)
+from grants_builder.scheduler import ExportScheduler
+
+DOCUMENT = """# Grant
+**Fdn**
+
+---
+
+Some *italic* and **bold *both*** text
+with a [link](https://example.org?a=1&b=2) and `code`.
+
+1. First
+   - Nested
+2. Second
+
+| Year | Amount |
+|------|-------:|
+| 2025 | **$100** |
+
+```python
+x = 1 < 2
+```
+
+> Quoted
+"""
+
+
+def _parts(data):
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    return {name: archive.read(name).decode() for name in archive.namelist()}
+
+
+def test_parse_blocks():
+    assert parse_blocks(DOCUMENT) == [
+        ("heading", 1, "Grant"),
+        ("paragraph", "**Fdn**"),
+        ("rule",),
+        (
+            "paragraph",
+            "Some *italic* and **bold *both*** text with a "
+            "[link](https://example.org?a=1&b=2) and `code`.",
+        ),
+        (
+            "list",
+            [(0, True, "First"), (1, False, "Nested"), (0, True, "Second")],
+        ),
+        ("table", [["Year", "Amount"], ["2025", "**$100**"]]),
+        ("code", ["x = 1 < 2"]),
+        ("quote", "Quoted"),
+    ]
+
+
+def test_parse_inline():
+    assert parse_inline("a **b *c*** `d*` [e](u) \\*") == [
+        ("a ", {"bold": False, "italic": False}),
+        ("b ", {"bold": True, "italic": False}),
+        ("c", {"bold": True, "italic": True}),
+        (" ", {"bold": False, "italic": False}),
+        ("d*", {"bold": False, "italic": False, "code": True}),
+        (" ", {"bold": False, "italic": False}),
+        ("e", {"bold": False, "italic": False, "link": "u"}),
+        (" ", {"bold": False, "italic": False}),
+        ("*", {"bold": False, "italic": False}),
+    ]
+
+
+def test_render_docx_is_valid_and_deterministic():
+    data = render_docx(DOCUMENT)
+    assert render_docx(DOCUMENT) == data
+
+    parts = _parts(data)
+    for xml in parts.values():
+        minidom.parseString(xml)
+    document = parts["word/document.xml"]
+    assert 'w:left="1080"' in document and 'w:top="1080"' in document
+    assert "x = 1 &lt; 2" in document
+    assert "<w:tbl>" in document and '<w:numId w:val="2"/>' in document
+    assert 'w:ascii="Inter"' in parts["word/styles.xml"]
+    assert '<w:sz w:val="18"/>' in parts["word/styles.xml"]
+    assert (
+        'Target="https://example.org?a=1&amp;b=2"'
+        in parts["word/_rels/document.xml.rels"]
+    )
+
+
+def test_native_backend_needs_no_pandoc(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    assert isinstance(export_backend("auto"), NativeBackend)
+    assert isinstance(export_backend("pandoc"), PandocBackend)
+
+    export_response(
+        "demo",
+        "Grant",
+        "Fdn",
+        "summary",
+        {"title": "Summary", "question": "What?"},
+        "Hello **world**",
+        tmp_path / "docs" / "exports",
+        formats=("docx",),
+        backend=NativeBackend(),
+    )
+    parts = _parts((tmp_path / "docs/exports/demo/summary.docx").read_bytes())
+    assert "world" in parts["word/document.xml"]
+
+
+def test_other_formats_fall_back_to_pandoc(tmp_path, fake_tools):
+    exports = tmp_path / "docs" / "exports"
+    export_response(
+        "demo",
+        "Grant",
+        "Fdn",
+        "summary",
+        {"title": "Summary", "question": "What?"},
+        "Hello",
+        exports,
+        formats=("docx", "html"),
+        backend=NativeBackend(),
+    )
+    assert (fake_tools / "pandoc.log").read_text().count("call") == 1
+    assert (exports / "demo" / "summary.html").read_text().endswith("Hello\n")
+    assert zipfile.is_zipfile(exports / "demo" / "summary.docx")
+
+
+def test_auto_keeps_exports_from_other_renderers(
+    tmp_path, monkeypatch, capsys
+):
+    """Falling back to the native renderer does not replace pandoc's DOCX."""
+    monkeypatch.setenv("PATH", str(tmp_path))
+    exports = tmp_path / "docs" / "exports"
+    (exports / "a").mkdir(parents=True)
+    (exports / "a" / "summary.docx").write_bytes(b"pandoc docx")
+    section = {"title": "Summary", "question": "What?"}
+
+    def export(backend):
+        scheduler = ExportScheduler(backend=export_backend(backend))
+        for grant_id in "ab":
+            scheduler.submit(
+                grant_id,
+                "Grant",
+                "Fdn",
+                "summary",
+                section,
+                "Hi",
+                exports,
+                formats=("docx",),
+            )
+        return scheduler.run()
+
+    jobs = export("auto")
+    assert "Export backend: native" in capsys.readouterr().out
+    assert [job.kept for job in jobs] == [True, False]
+    assert all(job.complete for job in jobs)
+    assert (exports / "a" / "summary.docx").read_bytes() == b"pandoc docx"
+    assert rendered_natively(exports / "b" / "summary.docx")
+
+    export("native")
+    assert rendered_natively(exports / "a" / "summary.docx")
@@ -0,0 +1,208 @@
+"""Tests for writing grant data."""
+
+import gzip
+import json
+
+from grants_builder import output
+from grants_builder.output import (
+    JsonWriter,
+    normalize_grant,
+    write_grants_data,
+    write_sharded,
+)
+
+
+def _grants_data():
+    summary = {"title": "Summary", "plainText": "Legacy text", "charCount": 11}
+    aims = {"title": "Aims", "plainText": "Aim text", "charCount": 8}
+    progress = {"title": "Progress", "plainText": "Done", "charCount": 4}
+    return {
+        "legacy": {
+            "id": "legacy",
+            "config": {"name": "Legacy"},
+            "metadata": {},
+            "responses": {"summary": summary},
+        },
+        "modern": {
+            "id": "modern",
+            "config": {"name": "Modern"},
+            "metadata": {"program": "X"},
+            "responses": {
+                "app_aims": {**aims, "type": "application"},
+                "report_2025-q1_progress": {
+                    **progress,
+                    "type": "report",
+                    "report_period": "2025-q1",
+                },
+            },
+            "application": {"metadata": {}, "responses": {"aims": aims}},
+            "reports": [
+                {
+                    "period": "2025-q1",
+                    "metadata": {"due": "2025-04-01"},
+                    "responses": {"progress": progress},
+                }
+            ],
+        },
+    }
+
+
+def test_sharded_output_keeps_text_out_of_the_index(tmp_path):
+    """Every response's text is in exactly one shard, none in the index."""
+    written = write_sharded(_grants_data(), tmp_path)
+    index_text = (tmp_path / "grants_index.json").read_text()
+    assert "plainText" not in index_text
+
+    index = json.loads(index_text)["grants"]
+    assert index["legacy"]["responses"]["summary"]["charCount"] == 11
+    assert index["modern"]["application"]["responseKeys"] == ["aims"]
+
+    modern = json.loads((tmp_path / index["modern"]["shard"]).read_text())
+    assert modern["responses"] == {"app_aims": {"plainText": "Aim text"}}
+    report = index["modern"]["reports"][0]
+    assert report["metadata"] == {"due": "2025-04-01"}
+    period = json.loads((tmp_path / report["shard"]).read_text())
+    assert period["responses"] == {"progress": {"plainText": "Done"}}
+    assert len(written) == 4
+
+
+def test_sharded_output_removes_stale_shards(tmp_path):
+    """Shards of grants that are gone do not linger."""
+    data = _grants_data()
+    write_sharded(data, tmp_path)
+    del data["modern"]
+    write_sharded(data, tmp_path)
+    shards = sorted(
+        str(path.relative_to(tmp_path))
+        for path in (tmp_path / "grants").rglob("*.json")
+    )
+    assert shards == ["grants/legacy.json"]
+    assert not (tmp_path / "grants" / "modern").exists()
+
+
+def test_grants_data_is_unchanged(tmp_path):
+    """The default output is still the full indented JSON."""
+    data = _grants_data()
+    write_grants_data(data, tmp_path)
+    text = (tmp_path / "grants_data.json").read_text()
+    assert text == json.dumps(data, indent=2)
+
+
+def test_production_output_is_minified_and_precompressed(tmp_path):
+    """Production JSON round-trips and gets a gzip sidecar."""
+    data = _grants_data()
+    writer = JsonWriter(production=True)
+    written = write_grants_data(data, tmp_path, writer=writer)
+
+    output_path = tmp_path / "grants_data.json"
+    assert json.loads(output_path.read_bytes()) == data
+    assert b"\n" not in output_path.read_bytes()
+    gz_path = tmp_path / "grants_data.json.gz"
+    assert gzip.decompress(gz_path.read_bytes()) == output_path.read_bytes()
+    assert gz_path in written
+    assert writer.sizes["minified"] < writer.sizes["indented"]
+
+    # A regular build afterwards does not leave stale sidecars behind
+    write_grants_data(data, tmp_path)
+    assert not gz_path.exists()
+
+
+def test_minified_output_does_not_depend_on_orjson(monkeypatch):
+    """The stdlib fallback produces the same bytes as orjson."""
+    data = _grants_data()
+    data["legacy"]["config"]["name"] = "Légacy — 100%"
+    expected = JsonWriter(production=True).dumps(data)
+    monkeypatch.setattr(output, "orjson", None)
+    assert JsonWriter(production=True).dumps(data) == expected
+
+
+def test_production_summary_counts_indented_size(tmp_path):
+    """The indented size is what a default build would have written."""
+    data = _grants_data()
+    data["legacy"]["config"]["name"] = 'Légacy 😀 "{}[],:" \\'
+    data["legacy"]["metadata"] = {"empty": [], "nested": [[1, {}], {"a": []}]}
+    writer = JsonWriter(production=True)
+    write_grants_data(data, tmp_path, writer=writer, schema=2)
+    indented = json.dumps(
+        {
+            "version": 2,
+            "grants": {k: normalize_grant(v) for k, v in data.items()},
+        },
+        indent=2,
+    )
+    assert writer.sizes["indented"] == len(indented.encode())
+
+    before = writer.sizes["indented"]
+    writer.write(tmp_path / "index.json", data)
+    added = len(json.dumps(data, indent=2).encode())
+    assert writer.sizes["indented"] == before + added
+
+
+def test_streamed_output_matches_whole_object(tmp_path):
+    """Members streamed one by one give the same bytes as one dump."""
+    data = _grants_data()
+    data["legacy"]["config"]["name"] = "Légacy — 100%\nnew line"
+    for production in (False, True):
+        writer = JsonWriter(production=production)
+        with writer.stream(tmp_path / "out.json") as stream:
+            for key, value in data.items():
+                stream.add(key, value)
+            stream.close()
+        assert (tmp_path / "out.json").read_bytes() == writer.dumps(data)
+
+        with writer.stream(tmp_path / "empty.json") as stream:
+            stream.close()
+        assert (tmp_path / "empty.json").read_bytes() == writer.dumps({})
+
+    gz_path = tmp_path / "out.json.gz"
+    assert gz_path.read_bytes() == gzip.compress(
+        writer.dumps(data), compresslevel=9, mtime=0
+    )
+
+
+def test_failed_stream_keeps_previous_output(tmp_path):
+    """A build that fails part-way leaves the last good file in place."""
+    write_grants_data({"old": {"id": "old"}}, tmp_path)
+    previous = (tmp_path / "grants_data.json").read_bytes()
+
+    writer = JsonWriter(production=True)
+    try:
+        with writer.stream(tmp_path / "grants_data.json") as stream:
+            stream.add("new", {"id": "new"})
+            raise ValueError("over limit")
+    except ValueError:
+        pass
+
+    assert (tmp_path / "grants_data.json").read_bytes() == previous
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "grants_data.json"
+    ]
+
+
+def test_schema_2_stores_each_response_once(tmp_path):
+    """v2 keeps nested responses and turns the flat view into references."""
+    data = _grants_data()
+    for production in (False, True):
+        writer = JsonWriter(production=production)
+        write_grants_data(data, tmp_path, writer=writer, schema=2)
+        output_bytes = (tmp_path / "grants_data.json").read_bytes()
+        expected = {
+            "version": 2,
+            "grants": {
+                key: normalize_grant(value) for key, value in data.items()
+            },
+        }
+        assert output_bytes == writer.dumps(expected)
+
+    v2 = json.loads(output_bytes)["grants"]
+    assert v2["legacy"] == data["legacy"]
+    assert v2["modern"]["responses"] == {
+        "app_aims": {"type": "application", "key": "aims"},
+        "report_2025-q1_progress": {
+            "type": "report",
+            "report_period": "2025-q1",
+            "key": "progress",
+        },
+    }
+    assert output_bytes.count(b"Aim text") == 1
+    assert v2["modern"]["application"] == data["modern"]["application"]
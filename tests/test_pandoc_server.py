@@ -0,0 +1,81 @@
+"""Tests for the pandoc-server export backend."""
+
+import json
+
+import pytest
+
+from grants_builder.exporter import (
+    PANDOC_FORMAT_ARGS,
+    PandocBackend,
+    render_markdown,
+)
+from grants_builder.pandoc_server import PandocServer, server_options
+from grants_builder.scheduler import ExportScheduler
+
+
+def test_server_options_follow_the_command_line():
+    assert server_options(PANDOC_FORMAT_ARGS["docx"]) == {
+        "from": "markdown",
+        "to": "docx",
+        "variables": {
+            "mainfont": "Inter",
+            "fontsize": "9pt",
+            "geometry": "margin=0.75in",
+        },
+    }
+    assert server_options(PANDOC_FORMAT_ARGS["html"])["standalone"] is True
+    with pytest.raises(ValueError):
+        server_options(["--pdf-engine=xelatex"])
+
+
+def test_exports_share_one_server(tmp_path, fake_pandoc_server):
+    """Every job is posted to one server; pandoc itself never runs."""
+    exports_dir = tmp_path / "docs" / "exports"
+    section = {"title": "Summary", "question": "What?"}
+    with PandocServer() as server:
+        backend = PandocBackend(server)
+        scheduler = ExportScheduler(max_workers=2, backend=backend)
+        for grant_id in ["a", "b", "c"]:
+            scheduler.submit(
+                grant_id, "Grant", "Fdn", "summary", section, "Hi", exports_dir
+            )
+        jobs = scheduler.run()
+
+    assert all(job.complete for job in jobs)
+    assert server.process is None
+    assert not (tmp_path / "pandoc.log").exists()
+    requests = (tmp_path / "server.log").read_text().splitlines()
+    assert [json.loads(line)["to"] for line in requests] == ["docx"] * 3
+    assert (exports_dir / "c" / "summary.pdf").read_text().endswith("Hi\n")
+
+
+def test_conversion_errors_are_raised(tmp_path, fake_pandoc_server):
+    with PandocServer() as server:
+        backend = PandocBackend(server)
+        with pytest.raises(Exception, match="Pandoc DOCX conversion failed"):
+            render_markdown(
+                "FAIL", tmp_path / "out.docx", "docx", backend=backend
+            )
+    assert not (tmp_path / "pandoc.log").exists()
+
+
+def test_falls_back_to_pandoc(tmp_path, fake_tools):
+    """Without a server, or once it dies, pandoc runs per document."""
+    with PandocServer() as server:
+        backend = PandocBackend(server)
+        assert not server.available()
+        render_markdown("Hi", tmp_path / "one.docx", "docx", backend=backend)
+    assert (tmp_path / "one.docx").read_text() == "Hi"
+
+
+def test_falls_back_when_the_server_dies(tmp_path, fake_pandoc_server):
+    with PandocServer() as server:
+        backend = PandocBackend(server)
+        render_markdown("Hi", tmp_path / "one.docx", "docx", backend=backend)
+        server.process.kill()
+        server.process.wait()
+        render_markdown("Hi", tmp_path / "two.docx", "docx", backend=backend)
+        assert not server.available()
+
+    assert (tmp_path / "two.docx").read_text() == "Hi"
+    assert (tmp_path / "pandoc.log").read_text().count("call") == 1
@@ -0,0 +1,92 @@
+"""Tests for parallel grant processing."""
+
+from grants_builder.builder import build_all_grants
+from grants_builder.manifest import BuildManifest
+
+
+def _progress(period):
+    return {
+        "metadata": {"period": period},
+        "sections": {"progress": {"title": "Progress", "file": "progress.md"}},
+    }
+
+
+# A legacy grant and one with an application and reports
+GRANTS = {
+    "legacy": {
+        "files": {
+            "questions.yaml": {
+                "sections": [
+                    {
+                        "id": "summary",
+                        "title": "Summary",
+                        "file": "responses/summary.md",
+                    },
+                    {
+                        "id": "missing",
+                        "title": "Missing",
+                        "file": "responses/missing.md",
+                    },
+                ]
+            },
+            "responses/summary.md": "A *short* summary",
+        }
+    },
+    "modern": {
+        "status": "awarded",
+        "amount_requested": 2000,
+        "files": {
+            "application/questions.yaml": {
+                "sections": {"aims": {"title": "Aims", "file": "aims.md"}}
+            },
+            "application/aims.md": "- Aim one\n- Aim two",
+            "reports/2025-q1/questions.yaml": _progress("2025-q1"),
+            "reports/2025-q1/progress.md": "Progress in 2025-q1",
+            "reports/2025-q2/questions.yaml": _progress("2025-q2"),
+            "reports/2025-q2/progress.md": "Progress in 2025-q2",
+        },
+    },
+}
+
+
+def test_parallel_build_matches_serial(
+    tmp_path, monkeypatch, capsys, write_registry
+):
+    """The JSON and the per-grant log do not depend on the job count."""
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+
+    build_all_grants()
+    serial = (tmp_path / "docs" / "grants_data.json").read_text()
+    serial_log = capsys.readouterr().out
+
+    build_all_grants(jobs=3)
+    parallel = (tmp_path / "docs" / "grants_data.json").read_text()
+    assert parallel == serial
+    assert capsys.readouterr().out == serial_log
+    assert "Warning: legacy/responses/missing.md not found" in serial_log
+
+
+def test_parallel_incremental_build(tmp_path, monkeypatch, write_registry):
+    """Section results from workers are merged into the manifest."""
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+
+    build_all_grants(incremental=True, jobs=2)
+    first = (tmp_path / "docs" / "grants_data.json").read_text()
+    assert set(BuildManifest.load().sections) == {
+        "legacy/responses/summary",
+        "modern/application/aims",
+        "modern/reports/2025-q1/progress",
+        "modern/reports/2025-q2/progress",
+    }
+
+    (tmp_path / "modern" / "reports" / "2025-q2" / "progress.md").write_text(
+        "Done"
+    )
+    build_all_grants(incremental=True, jobs=2)
+    (tmp_path / "modern" / "reports" / "2025-q2" / "progress.md").write_text(
+        "Progress in 2025-q2"
+    )
+    build_all_grants(incremental=True, jobs=2)
+    assert (tmp_path / "docs" / "grants_data.json").read_text() == first
@@ -0,0 +1,94 @@
+"""Tests for the single-walk repository index."""
+
+import os
+from pathlib import Path
+
+from grants_builder.builder import plan_grant
+from grants_builder.manifest import BuildManifest
+from grants_builder.repo_index import RepoIndex
+
+# A grant with an application and two reports
+GRANTS = {
+    "demo": {
+        "files": {
+            "grant.yaml": "deadline: 2026-01-01\n",
+            "application/questions.yaml": {
+                "sections": {
+                    "summary": {
+                        "title": "Summary",
+                        "file": "responses/summary.md",
+                    }
+                }
+            },
+            "application/responses/summary.md": "Hi",
+            "reports/2025-q2/questions.yaml": {"sections": {}},
+            "reports/2025-q1/questions.yaml": {"sections": {}},
+            # Stray files are not report directories
+            "reports/notes.txt": "todo",
+        }
+    }
+}
+
+
+def test_index_records_every_path(tmp_path, write_registry):
+    """One walk captures sizes, directories and sorted listings."""
+    grant = write_registry(GRANTS) / "demo"
+    index = RepoIndex.scan(grant)
+
+    summary = grant / "application" / "responses" / "summary.md"
+    assert index.stat(summary).size == 2
+    assert index.stat(summary).mtime_ns == os.stat(summary).st_mtime_ns
+    assert index.is_dir(grant / "reports" / "2025-q1")
+    assert not index.is_dir(grant / "reports" / "notes.txt")
+    assert not index.exists(grant / "missing.md")
+    assert index.listdir(grant / "reports") == [
+        "2025-q1",
+        "2025-q2",
+        "notes.txt",
+    ]
+    # Paths outside the root are looked up on disk
+    (tmp_path / "outside.md").write_text("x")
+    assert index.exists(tmp_path / "outside.md")
+    missing = tmp_path / "nowhere"
+    assert not RepoIndex.scan(missing).exists(missing)
+
+
+def test_plan_grant_is_served_from_the_index(
+    tmp_path, monkeypatch, write_registry
+):
+    """Layout detection makes no filesystem calls of its own."""
+    grant = write_registry(GRANTS) / "demo"
+    index = RepoIndex.scan(grant)
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError("filesystem lookup outside the index")
+
+    monkeypatch.setattr(Path, "exists", forbidden)
+    monkeypatch.setattr(Path, "is_dir", forbidden)
+    monkeypatch.setattr(Path, "iterdir", forbidden)
+    monkeypatch.setattr(os, "stat", forbidden)
+    plan = plan_grant("demo", {"path": str(grant)}, index=index)
+
+    assert plan.index is index
+    assert plan.has_new_structure
+    assert [group.scope for group in plan.groups] == [
+        "application",
+        "reports/2025-q1",
+        "reports/2025-q2",
+    ]
+
+
+def test_digests_match_with_and_without_index(tmp_path, write_registry):
+    """Manifest fingerprints do not depend on where stats come from."""
+    grant = write_registry(GRANTS) / "demo"
+    index = RepoIndex.scan(grant)
+    manifest = BuildManifest(tmp_path / "manifest.json")
+    for path in (
+        grant,
+        grant / "reports",
+        grant / "grant.yaml",
+        grant / "missing.md",
+    ):
+        assert manifest.file_digest(path, index) == (
+            manifest.file_digest(path)
+        )
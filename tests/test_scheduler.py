@@ -0,0 +1,96 @@
+"""Tests for the export scheduler."""
+
+from grants_builder.export_cache import ExportCache
+from grants_builder.scheduler import ExportScheduler
+
+
+def test_pdfs_use_one_soffice_call(tmp_path, fake_tools):
+    """DOCX files from every grant are converted in a single batch."""
+    log = fake_tools / "soffice.log"
+
+    scheduler = ExportScheduler(max_workers=2)
+    exports_dir = tmp_path / "docs" / "exports"
+    section = {"title": "Summary", "question": "What?"}
+    for grant_id, key in [("a", "summary"), ("b", "budget")]:
+        scheduler.submit(
+            grant_id, "Grant", "Fdn", key, section, "Hi", exports_dir
+        )
+    jobs = scheduler.run()
+
+    assert all(job.complete for job in jobs)
+    assert log.read_text().count("call") == 1
+    assert (exports_dir / "b" / "budget.pdf").read_text().endswith("Hi\n")
+
+    # Same output names cannot share an --outdir, so they split batches
+    for grant_id in ["a", "c"]:
+        scheduler.submit(
+            grant_id, "Grant", "Fdn", "summary", section, "Hi", exports_dir
+        )
+    jobs = scheduler.run()
+    assert all(job.complete for job in jobs)
+    assert log.read_text().count("call") == 3
+    assert (exports_dir / "c" / "summary.pdf").read_text().endswith("Hi\n")
+
+
+def test_hung_batch_costs_one_timeout(tmp_path, fake_tools, monkeypatch):
+    """A batch is given one job's timeout before jobs are retried alone."""
+    timeouts = []
+    scheduler = ExportScheduler(timeout=7)
+    convert_batch = scheduler._convert_batch
+
+    def record(batch, timeout):
+        timeouts.append((len(batch), timeout))
+        convert_batch(batch, timeout)
+
+    monkeypatch.setattr(scheduler, "_convert_batch", record)
+    section = {"title": "Summary", "question": "What?"}
+    for key in ["aims", "budget", "summary", "team"]:
+        scheduler.submit("a", "Grant", "Fdn", key, section, "Hi", tmp_path)
+    assert all(job.complete for job in scheduler.run())
+    assert timeouts == [(4, 7)]
+
+
+def test_missing_tools_are_reported_per_job(tmp_path, monkeypatch):
+    """Every job collects its own errors when converters are missing."""
+    monkeypatch.setenv("PATH", str(tmp_path))
+    scheduler = ExportScheduler()
+    section = {"title": "Summary", "question": "What?"}
+    for key in ["one", "two"]:
+        scheduler.submit(
+            "a", "Grant", "Fdn", key, section, "Hi", tmp_path / "exports"
+        )
+    jobs = scheduler.run()
+
+    assert [len(job.errors) for job in jobs] == [2, 2]
+    assert not any(job.done for job in jobs)
+
+
+def test_pdf_cache_is_keyed_on_the_converter_used(tmp_path, fake_tools):
+    """A LaTeX fallback PDF is not served once soffice is back."""
+    soffice = fake_tools / "bin" / "soffice"
+    script = soffice.read_text()
+    soffice.unlink()
+    xelatex = fake_tools / "bin" / "xelatex"
+    xelatex.write_text("#!/bin/sh\necho XeTeX 3.14\n")
+    xelatex.chmod(0o755)
+
+    cache = ExportCache(tmp_path / "cache")
+    section = {"title": "Summary", "question": "What?"}
+
+    def export():
+        scheduler = ExportScheduler(cache=cache)
+        scheduler.submit(
+            "a", "Grant", "Fdn", "summary", section, "Hi", tmp_path
+        )
+        [job] = scheduler.run()
+        assert job.complete
+
+    export()
+    assert not (fake_tools / "soffice.log").exists()
+
+    soffice.write_text(script)
+    soffice.chmod(0o755)
+    export()
+    assert (fake_tools / "soffice.log").read_text().count("call") == 1
+    export()
+    assert (fake_tools / "soffice.log").read_text().count("call") == 1
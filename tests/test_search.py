@@ -0,0 +1,77 @@
+"""Tests for the full-text search index."""
+
+import json
+
+from grants_builder.search import SearchIndex, SearchIndexBuilder, shard_name
+
+
+def _response(title, text):
+    return {"title": title, "plainText": text}
+
+
+def _write_index(tmp_path):
+    builder = SearchIndexBuilder()
+    builder.add_grant(
+        "alpha",
+        {
+            "responses": {
+                "summary": _response(
+                    "Summary", "The earned income tax credit helps families."
+                ),
+                "budget": _response("Budget", "Credit for income? No."),
+                "empty": _response("Empty", ""),
+            }
+        },
+    )
+    builder.add_grant(
+        "beta",
+        {
+            "responses": {
+                "app_aims": _response(
+                    "Aims", "Tax policy and the income tax credit, credit."
+                )
+            }
+        },
+    )
+    return builder.write(tmp_path)
+
+
+def test_words_and_phrases(tmp_path):
+    _write_index(tmp_path)
+    index = SearchIndex(tmp_path)
+
+    hits = index.search("credit income")
+    assert [(hit["grant"], hit["key"]) for hit in hits] == [
+        ("beta", "app_aims"),
+        ("alpha", "summary"),
+        ("alpha", "budget"),
+    ]
+    phrase = index.search('"income tax credit" families')
+    assert [(hit["grant"], hit["key"]) for hit in phrase] == [
+        ("alpha", "summary")
+    ]
+    assert index.search('"credit income"') == []
+    assert index.search("INCOME Tax")[0]["title"] == "Aims"
+    assert index.search("missing") == [] and index.search("  ") == []
+
+
+def test_shards_are_loaded_lazily(tmp_path):
+    written = _write_index(tmp_path)
+    index = SearchIndex(tmp_path)
+    assert index.shards == {}
+    index.search("families")
+    assert set(index.shards) == {shard_name("families")}
+
+    terms = json.loads((tmp_path / "search" / "terms" / "fa.json").read_text())
+    assert terms == {"families": [[0, 6]]}
+    assert tmp_path / "search" / "index.json" in written
+
+
+def test_stale_shards_are_removed(tmp_path):
+    _write_index(tmp_path)
+    builder = SearchIndexBuilder()
+    builder.add_grant("gamma", {"responses": {"a": _response("A", "Zebra")}})
+    builder.write(tmp_path)
+    assert [
+        path.name for path in (tmp_path / "search" / "terms").iterdir()
+    ] == ["ze.json"]
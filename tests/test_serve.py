@@ -0,0 +1,172 @@
+"""Tests for serving grant data on demand."""
+
+import http.client
+import json
+import os
+import threading
+
+import pytest
+
+from grants_builder import serve
+from grants_builder.serve import (
+    DEFAULT_CORS_ORIGIN,
+    CachedGrant,
+    GrantCache,
+    GrantServer,
+    GrantService,
+)
+
+# A one-grant registry whose summary is exported
+GRANTS = {
+    "demo": {
+        "files": {
+            "questions.yaml": {
+                "sections": {
+                    "summary": {
+                        "title": "Summary",
+                        "question": "What is it?",
+                        "file": "responses/summary.md",
+                        "needs_export": True,
+                        "export_formats": ["docx"],
+                    }
+                }
+            },
+            "responses/summary.md": "A **short** summary",
+        }
+    }
+}
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch, write_registry):
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+    service = GrantService(pandoc_server=False, backend="native")
+    server = GrantServer(("127.0.0.1", 0), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def _get(server, path, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port)
+    connection.request("GET", path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_grants_are_processed_once_and_revalidated(server, tmp_path):
+    service = server.service
+    response, _ = _get(server, "/grants_index.json")
+    assert response.status == 200
+    assert service.misses == 0
+    assert response.getheader("Access-Control-Allow-Origin") == (
+        DEFAULT_CORS_ORIGIN
+    )
+
+    response, body = _get(server, "/grants/demo.json")
+    assert response.status == 200
+    assert json.loads(body)["responses"]["summary"]["plainText"] == (
+        "A short summary"
+    )
+    tag = response.getheader("ETag")
+    response, body = _get(server, "/grants/demo.json", {"If-None-Match": tag})
+    assert (response.status, body) == (304, b"")
+    assert (service.misses, service.hits) == (1, 1)
+
+    # An edited response is picked up on the next request
+    summary = tmp_path / "demo" / "responses" / "summary.md"
+    summary.write_text("A longer summary")
+    os.utime(summary, ns=(1, 1))
+    response, body = _get(server, "/grants/demo.json", {"If-None-Match": tag})
+    assert response.status == 200
+    assert response.getheader("ETag") != tag
+    assert service.misses == 2
+
+    response, _ = _get(server, "/grants/missing.json")
+    assert response.status == 404
+
+
+def test_exports_are_rendered_on_first_request(server, tmp_path):
+    response, body = _get(server, "/grants_data.json")
+    url = json.loads(body)["demo"]["responses"]["summary"]["exports"]["docx"]
+    assert url == "exports/demo/summary.docx"
+    assert not (tmp_path / "docs" / url).exists()
+
+    response, body = _get(server, f"/{url}")
+    assert response.status == 200
+    assert body[:2] == b"PK"
+    response, _ = _get(
+        server, f"/{url}", {"If-None-Match": response.getheader("ETag")}
+    )
+    assert response.status == 304
+    response, _ = _get(server, "/exports/demo/other.docx")
+    assert response.status == 404
+
+
+def test_over_limit_grant_is_reported(server, tmp_path):
+    questions = tmp_path / "demo" / "questions.yaml"
+    questions.write_text(
+        questions.read_text().replace(
+            "    file:", "    word_limit: 2\n    file:"
+        )
+    )
+    for path in ("/grants/demo.json", "/grants_data.json"):
+        response, body = _get(server, path)
+        assert (response.status, response.reason) == (
+            422,
+            "Unprocessable Entity",
+        )
+        assert "❌" in body.decode()
+        assert "exceeds word limit: 3 > 2" in body.decode()
+
+
+def test_different_grants_are_processed_concurrently(
+    tmp_path, monkeypatch, write_registry
+):
+    monkeypatch.chdir(tmp_path)
+    write_registry({"alpha": GRANTS["demo"], "beta": GRANTS["demo"]})
+    service = GrantService(pandoc_server=False, backend="native")
+    # Each grant's processing waits until the other's has started
+    started = threading.Barrier(2, timeout=5)
+    process_grant = serve.process_grant
+
+    def process(*args, **kwargs):
+        started.wait()
+        return process_grant(*args, **kwargs)
+
+    monkeypatch.setattr(serve, "process_grant", process)
+    threads = [
+        threading.Thread(target=service.grant, args=(grant_id,))
+        for grant_id in ("alpha", "beta")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not started.broken
+    assert service.misses == 2
+    assert service.grant("alpha") is service.cache.get("alpha")
+    assert service.hits == 1
+    service.close()
+
+
+def test_cache_evicts_least_recently_used():
+    cache = GrantCache(max_bytes=10)
+
+    def entry(size):
+        return CachedGrant({}, {}, b"x" * size, "", {})
+
+    cache.put("a", entry(4))
+    cache.put("b", entry(4))
+    cache.get("a")
+    cache.put("c", entry(4))
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.size == 8
+    cache.put("d", entry(20))
+    assert list(cache.entries) == ["d"]
@@ -0,0 +1,110 @@
+"""Tests for building grants in shards and merging the partials."""
+
+import shutil
+
+import pytest
+
+from grants_builder.builder import build_all_grants
+from grants_builder.shards import assign_shards, merge_partials, parse_shard
+
+
+def _grants(count=4):
+    """Return ``count`` grants, each with an exported response."""
+    questions = {
+        "sections": {
+            "summary": {
+                "title": "Summary",
+                "question": "What is it?",
+                "file": "responses/summary.md",
+                "word_limit": 500,
+                "needs_export": True,
+                "export_formats": ["docx"],
+            }
+        }
+    }
+    return {
+        f"grant{number}": {
+            "name": f"Grant {number}",
+            "foundation": f"Foundation {number}",
+            "amount_requested": 1000 * (number + 1),
+            "files": {
+                "questions.yaml": questions,
+                "responses/summary.md": (
+                    f"Grant {number} does **{'useful ' * number}work** [é]"
+                ),
+            },
+        }
+        for number in range(count)
+    }
+
+
+def _snapshot(docs):
+    return {
+        path.relative_to(docs).as_posix(): path.read_bytes()
+        for path in sorted(docs.rglob("*"))
+        if path.is_file()
+    }
+
+
+def _build(**kwargs):
+    build_all_grants(pandoc_server=False, backend="native", **kwargs)
+
+
+def test_shards_balance_cost():
+    costs = {"a": 10, "b": 9, "c": 5, "d": 4, "e": 1, "f": 1}
+    assignment = assign_shards(costs, 2)
+    assert assignment == assign_shards(dict(reversed(costs.items())), 2)
+    loads = [
+        sum(cost for key, cost in costs.items() if assignment[key] == shard)
+        for shard in (1, 2)
+    ]
+    assert sorted(loads) == [15, 15]
+    assert set(assign_shards(costs, 10).values()) == set(range(1, 7))
+
+    assert parse_shard("2/3") == (2, 3)
+    for value in ("0/3", "4/3", "3", "a/b"):
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"sharded": True, "search_index": True}, {"production": True}],
+)
+def test_merged_shards_match_single_build(
+    tmp_path, monkeypatch, write_registry, options
+):
+    monkeypatch.chdir(tmp_path)
+    write_registry(_grants())
+    _build(**options)
+    single = _snapshot(tmp_path / "docs")
+    assert "exports/grant3/summary.docx" in single
+
+    shutil.rmtree(tmp_path / "docs")
+    for index in (1, 2, 3):
+        _build(shard=(index, 3))
+    merge_partials(**options)
+    assert _snapshot(tmp_path / "docs") == single
+    assert not (tmp_path / "docs" / "partials").exists()
+
+
+def test_merge_rejects_incomplete_partials(
+    tmp_path, monkeypatch, write_registry
+):
+    monkeypatch.chdir(tmp_path)
+    write_registry(_grants(3))
+    with pytest.raises(ValueError, match="No partial builds"):
+        merge_partials()
+
+    _build(shard=(1, 2))
+    with pytest.raises(ValueError, match=r"Missing shard\(s\) 2/2"):
+        merge_partials()
+    _build(shard=(1, 3))
+    with pytest.raises(ValueError, match="split 2 and 3 ways"):
+        merge_partials()
+
+    shutil.rmtree(tmp_path / "docs" / "partials" / "1-of-3")
+    _build(shard=(2, 2))
+    write_registry(_grants(4))
+    with pytest.raises(ValueError, match="current grant registry"):
+        merge_partials()
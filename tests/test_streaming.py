@@ -0,0 +1,100 @@
+"""Tests for streaming analysis of large response files."""
+
+import random
+
+import pytest
+
+from benchmarks.corpus import markdown_document
+from grants_builder import builder
+from grants_builder.builder import process_sections
+from grants_builder.utils import analyze_markdown, analyze_markdown_file
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "# Title\n\nSome **bold** and *italic* text.\n\n\n\n- one\n- two",
+        "*one\ntwo*\nthree *four\n\nfive* six",
+        "Before\n\n```\nfenced\n\nblock\n```\n\nAfter [link\n](x.org)",
+        "-\n\nJoined\n#\n\n# Title\nsnake_case\n2 * 3\n",
+        "  - \n```\ncode\n```\n  - \n",
+        "    file_name.py and __init__.py\n",
+        "",
+    ],
+)
+def test_streamed_analysis_matches_whole_text(tmp_path, text):
+    """Markers pairing across blocks are scanned together."""
+    path = tmp_path / "response.md"
+    path.write_text(text)
+    for block_size in (1, 16, 1 << 16):
+        stats = analyze_markdown_file(path, block_size=block_size)
+        assert tuple(stats[:3]) == analyze_markdown(text)
+        assert not stats.exceeded
+
+
+def test_streamed_analysis_matches_corpus(tmp_path):
+    path = tmp_path / "response.md"
+    rng = random.Random(0)
+    for _ in range(20):
+        text = markdown_document(rng, 30)
+        path.write_text(text)
+        stats = analyze_markdown_file(path, block_size=64)
+        assert tuple(stats[:3]) == analyze_markdown(text)
+
+
+def test_streamed_analysis_matches_marker_soup(tmp_path):
+    path = tmp_path / "response.md"
+    tokens = ["*", "**", "_", "__", "`", "```", "[", "](", ")", "#", ">"]
+    tokens += ["- ", "1. ", " ", "\t", "\n", "\n\n", "word", "file_name.py"]
+    rng = random.Random(0)
+    for _ in range(500):
+        text = "".join(rng.choices(tokens, k=rng.randrange(40)))
+        path.write_text(text)
+        for block_size in (1, 5):
+            stats = analyze_markdown_file(path, block_size=block_size)
+            assert tuple(stats[:3]) == analyze_markdown(text), repr(text)
+
+
+def test_streamed_analysis_stops_at_limit(tmp_path):
+    path = tmp_path / "response.md"
+    path.write_text("word " * 50 + "\n" + "More text.\n" * 1000)
+    stats = analyze_markdown_file(path, word_limit=40, block_size=64)
+    assert stats.exceeded
+    assert 40 < stats.word_count < 1000
+    assert stats.char_count == len(stats.plain_text)
+
+    path.write_text("# Question\n\nAnswer [TO BE COMPLETED]\n")
+    stats = analyze_markdown_file(path, word_limit=40, block_size=1)
+    assert not stats.exceeded
+    assert stats.needs_completion
+    assert stats.head == "# Question\n\n"
+
+
+def test_large_responses_are_streamed(tmp_path, monkeypatch, capsys):
+    """Streamed sections come out exactly as read ones do."""
+    (tmp_path / "responses").mkdir()
+    (tmp_path / "responses" / "summary.md").write_text(
+        "# Summary\n\nA **short** summary [NEEDS TO BE COMPLETED]\n"
+    )
+    sections = {
+        "summary": {
+            "title": "Summary",
+            "question": "Summary",
+            "file": "responses/summary.md",
+            "word_limit": 50,
+        }
+    }
+
+    def process():
+        return process_sections(
+            tmp_path, tmp_path, sections, "demo", "Demo", "Foundation"
+        )
+
+    read = process()
+    monkeypatch.setattr(builder, "STREAM_THRESHOLD", 0)
+    assert process() == read
+    assert "starts with question text" in capsys.readouterr().out
+
+    sections["summary"]["word_limit"] = 2
+    with pytest.raises(ValueError, match="exceeds word limit"):
+        process()
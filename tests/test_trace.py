@@ -0,0 +1,81 @@
+"""Tests for build tracing."""
+
+import json
+
+from grants_builder import trace
+from grants_builder.builder import build_all_grants
+from grants_builder.cli import build
+
+# A legacy grant and one with a report period
+GRANTS = {
+    "legacy": {
+        "files": {
+            "questions.yaml": {
+                "sections": {
+                    "summary": {"title": "Summary", "file": "summary.md"}
+                }
+            },
+            "summary.md": "A *short* summary",
+        }
+    },
+    "modern": {
+        "status": "awarded",
+        "amount_requested": 2000,
+        "files": {
+            "reports/2025-q2/questions.yaml": {
+                "sections": {
+                    "progress": {"title": "Progress", "file": "progress.md"}
+                }
+            },
+            "reports/2025-q2/progress.md": "Progress so far",
+        },
+    },
+}
+
+
+def test_spans_are_noops_while_tracing_is_off():
+    assert trace.active() is None
+    with trace.span("read", grant="demo") as span:
+        pass
+    assert span is trace.span("other")
+
+
+def test_build_records_tagged_spans(tmp_path, monkeypatch, write_registry):
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+
+    tracer = trace.start()
+    try:
+        build_all_grants(jobs=2)
+    finally:
+        assert trace.stop() is tracer
+
+    names = {event["name"] for event in tracer.events}
+    assert {"registry", "plan", "read", "strip_markdown", "json"} <= names
+    reads = {
+        tuple(sorted(event["args"].items()))
+        for event in tracer.events
+        if event["name"] == "read"
+    }
+    assert (("grant", "legacy"), ("section", "summary")) in reads
+    assert (
+        ("grant", "modern"),
+        ("period", "2025-q2"),
+        ("section", "progress"),
+    ) in reads
+    assert "Top 3 slowest spans" in tracer.summary(top=3)
+
+
+def test_trace_option_writes_chrome_trace(
+    tmp_path, monkeypatch, capsys, write_registry
+):
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+
+    build(["--trace", "trace.json", "--no-export-cache"])
+
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+    output = capsys.readouterr().out
+    assert "Top 10 stages by total time" in output
+    assert trace.active() is None
@@ -0,0 +1,125 @@
+"""Tests for grants-validate."""
+
+import json
+
+import pytest
+
+from grants_builder.cli import validate
+from grants_builder.validate import validate_grants
+
+GRANTS = {
+    "demo": {
+        "files": {
+            "questions.yaml": {
+                "sections": [
+                    {
+                        "id": "long",
+                        "title": "Long",
+                        "question": "Why?",
+                        "file": "responses/long.md",
+                        "char_limit": 10,
+                        "word_limit": 2,
+                    },
+                    {
+                        "id": "header",
+                        "title": "Header",
+                        "question": "What?",
+                        "file": "responses/header.md",
+                    },
+                    {
+                        "id": "missing",
+                        "title": "Missing",
+                        "file": "responses/missing.md",
+                    },
+                ]
+            },
+            "responses/long.md": "Far **too** many words",
+            "responses/header.md": "# What?\n\nThis.",
+        }
+    },
+    "gone": {},
+}
+
+
+def test_collects_every_issue_without_writing(
+    tmp_path, monkeypatch, write_registry
+):
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+
+    report = validate_grants(
+        {
+            "demo": {"path": "demo/"},
+            "gone": {"path": "gone/"},
+        }
+    )
+
+    kinds = [(issue["grant"], issue["kind"]) for issue in report["issues"]]
+    assert kinds == [
+        ("demo", "char_limit"),
+        ("demo", "word_limit"),
+        ("demo", "leading_h1"),
+        ("demo", "missing_file"),
+        ("gone", "missing_grant"),
+    ]
+    assert report["sections"] == 3
+    assert report["errors"] == 2
+    assert report["warnings"] == 3
+    assert report["issues"][0]["message"] == (
+        "Response 'long' exceeds character limit: 18 > 10"
+    )
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "demo",
+        "grant_registry.yaml",
+    ]
+
+
+def test_unreadable_grants_are_reported(tmp_path, monkeypatch, write_registry):
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+    (tmp_path / "demo" / "responses" / "long.md").write_bytes(b"\xff\xfe")
+    (tmp_path / "nofile").mkdir()
+    (tmp_path / "nofile" / "questions.yaml").write_text(
+        "sections:\n  summary:\n    title: Summary\n"
+    )
+
+    report = validate_grants(
+        {"nofile": {"path": "nofile/"}, "demo": {"path": "demo/"}}
+    )
+
+    kinds = [(issue["grant"], issue["kind"]) for issue in report["issues"]]
+    assert kinds == [
+        ("nofile", "invalid_questions"),
+        ("demo", "unreadable_file"),
+        ("demo", "leading_h1"),
+        ("demo", "missing_file"),
+    ]
+    assert report["issues"][0]["message"] == "A section has no 'file' key"
+    assert report["issues"][1]["section"] == "long"
+    assert report["errors"] == 2
+
+
+def test_exit_codes(tmp_path, monkeypatch, capsys, write_registry):
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+
+    with pytest.raises(SystemExit) as exit_info:
+        validate([])
+    assert exit_info.value.code == 1
+    assert json.loads(capsys.readouterr().out)["errors"] == 2
+
+    (tmp_path / "demo" / "responses" / "long.md").write_text("Short")
+    with pytest.raises(SystemExit) as exit_info:
+        validate(["demo"])
+    assert exit_info.value.code == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["grants"] == 1
+    assert report["warnings"] == 2
+
+    with pytest.raises(SystemExit) as exit_info:
+        validate(["demo", "--strict"])
+    assert exit_info.value.code == 1
+
+    with pytest.raises(SystemExit) as exit_info:
+        validate(["--registry", "nowhere.yaml"])
+    assert exit_info.value.code == 2
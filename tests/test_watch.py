@@ -0,0 +1,175 @@
+"""Tests for watch mode."""
+
+import json
+
+from grants_builder.builder import build_all_grants
+from grants_builder.watch import GrantWatcher
+
+# Two legacy grants with two sections each
+GRANTS = {
+    grant_id: {
+        "files": {
+            "questions.yaml": {
+                "sections": {
+                    "summary": {
+                        "title": "Summary",
+                        "file": "responses/summary.md",
+                    },
+                    "budget": {
+                        "title": "Budget",
+                        "question": "What will it cost?",
+                        "file": "responses/budget.md",
+                        "needs_export": True,
+                    },
+                }
+            },
+            "responses/summary.md": "A summary",
+            "responses/budget.md": "Some money",
+        }
+    }
+    for grant_id in ("alpha", "beta")
+}
+
+
+class _Clock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+def _watcher(**kwargs):
+    watcher = GrantWatcher(debounce=1, export_delay=10, **kwargs)
+    watcher.now = _Clock()
+    return watcher
+
+
+def test_watch_rebuilds_changed_section_only(
+    tmp_path, monkeypatch, capsys, write_registry
+):
+    """An edit reprocesses one section and matches a full build."""
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+    watcher = _watcher(sharded=True)
+    watcher.build_all()
+    beta_shard = tmp_path / "docs" / "grants" / "beta.json"
+    beta_mtime = beta_shard.stat().st_mtime_ns
+    capsys.readouterr()
+
+    (tmp_path / "alpha" / "responses" / "summary.md").write_text(
+        "A **much** longer summary"
+    )
+    watcher.poll()
+    assert capsys.readouterr().out == ""  # still debouncing
+
+    watcher.now.time += 1
+    watcher.poll()
+    assert "alpha: rebuilding summary" in capsys.readouterr().out
+    assert beta_shard.stat().st_mtime_ns == beta_mtime
+
+    alpha = json.loads((tmp_path / "docs/grants/alpha.json").read_text())
+    assert alpha["responses"]["summary"]["plainText"] == (
+        "A much longer summary"
+    )
+    index = (tmp_path / "docs" / "grants_index.json").read_text()
+
+    build_all_grants(sharded=True)
+    assert (tmp_path / "docs" / "grants_index.json").read_text() == index
+
+
+def test_watch_replans_on_questions_change(
+    tmp_path, monkeypatch, write_registry
+):
+    """Adding a section to a questions file picks up the new file."""
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+    watcher = _watcher()
+    watcher.build_all()
+
+    (tmp_path / "beta" / "responses" / "aims.md").write_text("Aims")
+    with open(tmp_path / "beta" / "questions.yaml", "a") as f:
+        f.write("  aims:\n    title: Aims\n    file: responses/aims.md\n")
+    watcher.poll()
+    watcher.now.time += 1
+    watcher.poll()
+
+    data = json.loads((tmp_path / "docs" / "grants_data.json").read_text())
+    assert list(data["beta"]["responses"]) == ["summary", "budget", "aims"]
+
+
+def test_watch_defers_exports_until_quiet(
+    tmp_path, monkeypatch, write_registry
+):
+    """Exports wait for the export delay and are restarted by edits."""
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+    watcher = _watcher()
+    watcher.build_all()
+    assert set(watcher.pending_exports) == {
+        ("alpha", "budget"),
+        ("beta", "budget"),
+    }
+
+    ran = []
+
+    def run():
+        ran.extend(watcher.scheduler.jobs)
+        watcher.scheduler.jobs = []
+
+    monkeypatch.setattr(watcher.scheduler, "run", run)
+    watcher.now.time = 5
+    (tmp_path / "alpha" / "responses" / "budget.md").write_text("Less money")
+    watcher.poll()
+    watcher.now.time = 6
+    watcher.poll()
+    assert ran == []
+
+    watcher.now.time = 10
+    watcher.poll()
+    assert [job.grant_id for job in ran] == ["beta"]
+    watcher.now.time = 16
+    watcher.poll()
+    assert [job.grant_id for job in ran] == ["beta", "alpha"]
+    assert "Less money" in ran[1].document
+
+
+def test_watch_survives_grants_over_limit(
+    tmp_path, monkeypatch, capsys, write_registry
+):
+    """A failing grant is reported, and rebuilt once it is fixed."""
+    monkeypatch.chdir(tmp_path)
+    write_registry(GRANTS)
+    questions = tmp_path / "alpha" / "questions.yaml"
+    questions.write_text(
+        questions.read_text().replace(
+            "    file: responses/summary.md\n",
+            "    file: responses/summary.md\n    word_limit: 3\n",
+        )
+    )
+    summary = tmp_path / "alpha" / "responses" / "summary.md"
+    summary.write_text("A summary that is too long")
+    watcher = _watcher()
+    watcher.build_all()
+    out = capsys.readouterr().out
+    assert "❌ alpha:" in out and "exceeds word limit" in out
+    data = json.loads((tmp_path / "docs" / "grants_data.json").read_text())
+    assert list(data) == ["beta"]
+
+    summary.write_text("A short summary")
+    watcher.poll()
+    watcher.now.time += 1
+    watcher.poll()
+    assert "alpha: rebuilding grant" in capsys.readouterr().out
+    assert watcher.failed == set()
+
+    # Only alpha was serialized again, and the result matches a build
+    (tmp_path / "beta" / "responses" / "summary.md").write_text("Changed")
+    encoded = watcher.encoded["alpha"]
+    watcher.poll()
+    watcher.now.time += 1
+    watcher.poll()
+    assert watcher.encoded["alpha"] is encoded
+    written = (tmp_path / "docs" / "grants_data.json").read_bytes()
+    build_all_grants()
+    assert (tmp_path / "docs" / "grants_data.json").read_bytes() == written